@@ -0,0 +1,94 @@
+"""
+Benchmark: archiving cold games into monthly archive DBs. Reports archive
+time, live DB and hot-backup size before/after, the cost of round
+streams that reach into the archives, and that the games counter (what
+/stats shows) is unchanged by archiving.
+
+    python benchmarks/bench_archive.py --games 500000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.connections.pool import init_pool, close_pool, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.counters import repair_counters, read_counters  # noqa: E402
+from plugins.connections.online_backup import backup_database  # noqa: E402
+from plugins.connections.maintenance import run_maintenance, db_file_size  # noqa: E402
+from plugins.connections.archive import archive_old_games  # noqa: E402
+from plugins.game.history import iter_rounds, pack_entries  # noqa: E402
+
+ROUNDS = 6
+
+
+def populate(games, months, rng, now):
+    span = months * 30 * 86400
+    with db_write() as conn:
+        for game_id in range(1, games + 1):
+            ended = now - timedelta(seconds=span * (games - game_id) / games)
+            at = ended.strftime("%Y-%m-%d %H:%M:%S")
+            group_id = -1000 - rng.randrange(300)
+            conn.execute("INSERT INTO games (id, group_id, ended_at) VALUES (?, ?, ?)", (game_id, group_id, at))
+            players = rng.sample(range(1, 50_001), 6)
+            conn.executemany(
+                "INSERT INTO game_rounds (game_id, round_no, group_id, played_at, target, data) VALUES (?, ?, ?, ?, ?, ?)",
+                [(game_id, n, group_id, at, 40.0, pack_entries((u, 50, -1, -n, 0) for u in players))
+                 for n in range(1, ROUNDS + 1)],
+            )
+            conn.executemany("INSERT INTO game_players (user_id, game_id) VALUES (?, ?)", [(u, game_id) for u in players])
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=200_000)
+    ap.add_argument("--months", type=int, default=24)
+    args = ap.parse_args()
+    now = datetime.utcnow()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)       # archives/ is relative to the working directory
+        init_pool(os.path.join(tmp, "live.db"))
+        init_db()
+        populate(args.games, args.months, random.Random(5), now)
+        repair_counters()
+        old_since = (now - timedelta(days=30 * (args.months - 1))).strftime("%Y-%m-%d")
+        old_until = (now - timedelta(days=30 * (args.months - 2))).strftime("%Y-%m-%d")
+
+        size0 = db_file_size()
+        backup0 = backup_database(os.path.join(tmp, "before.db"))["bytes"]
+        games0 = read_counters()["games"]
+        rounds0, t_rounds0 = timed(lambda: sum(1 for _ in iter_rounds(since=old_since, until=old_until)))
+
+        moved, t_archive = timed(archive_old_games)
+        run_maintenance(budget_sec=600, force=True)
+        size1 = db_file_size()
+        backup1 = backup_database(os.path.join(tmp, "after.db"))["bytes"]
+        games1 = read_counters()["games"]
+        rounds1, t_rounds1 = timed(lambda: sum(1 for _ in iter_rounds(since=old_since, until=old_until)))
+        archives = sum(os.path.getsize(os.path.join("archives", f)) for f in os.listdir("archives"))
+
+        print(f"archived {sum(moved.values())} of {args.games} games in {len(moved)} months, {t_archive:.1f}s")
+        print(f"live DB   : {size0 / 2**20:7.1f} MB -> {size1 / 2**20:7.1f} MB (archives {archives / 2**20:.1f} MB)")
+        print(f"hot backup: {backup0 / 2**20:7.1f} MB -> {backup1 / 2**20:7.1f} MB")
+        print(f"old-month rounds: {rounds0} in {t_rounds0 * 1e3:.0f} ms -> {rounds1} in {t_rounds1 * 1e3:.0f} ms")
+        print(f"bot_counters games: {games0} -> {games1} (drift after repair: {repair_counters() or 'none'})")
+        close_pool()
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
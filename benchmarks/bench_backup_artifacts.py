@@ -0,0 +1,84 @@
+"""
+Benchmark: compression ratio and throughput of backup artifacts (gzip vs
+lzma, chunked) on a synthetic DB, plus reassembly/verification speed.
+
+    python benchmarks/bench_backup_artifacts.py --users 2000000 --games 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.connections.pool import init_pool, close_pool, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.online_backup import backup_database  # noqa: E402
+from plugins.connections.artifacts import build_artifact, reassemble, select_retained  # noqa: E402
+from plugins.game.history import pack_entries  # noqa: E402
+
+NAMES = ["Alex", "Sam", "Riya", "Jon", "Mia", "Omar", "Lena", "Ken", "Ana", "Ivan", "Zoe", "Ali"]
+
+
+def populate(users, games, rng):
+    with db_write() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, first_name, username, games_played, wins, losses, total_score, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((uid, f"{rng.choice(NAMES)} {uid % 997}", f"user{uid}" if uid % 3 else None,
+              g, g // 5, g - g // 5, rng.randint(-50, 50), "2025-01-01 00:00:00")
+             for uid in range(1, users + 1) for g in (rng.randint(0, 40),)),
+        )
+        for game_id in range(1, games + 1):
+            group_id = -1000 - rng.randrange(2000)
+            ended = f"2025-{1 + game_id % 12:02d}-{1 + game_id % 28:02d} 12:00:00"
+            conn.execute("INSERT INTO games (group_id, ended_at) VALUES (?, ?)", (group_id, ended))
+            players = rng.sample(range(1, users + 1), 6)
+            conn.executemany(
+                "INSERT INTO game_rounds (game_id, round_no, group_id, played_at, target, data) VALUES (?, ?, ?, ?, ?, ?)",
+                [(game_id, n, group_id, ended, rng.uniform(0, 80),
+                  pack_entries((uid, rng.randint(0, 100), -1, -n, 0) for uid in players)) for n in range(1, 9)],
+            )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=500_000)
+    ap.add_argument("--games", type=int, default=50_000)
+    ap.add_argument("--chunk-mb", type=float, default=19)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        init_pool(os.path.join(tmp, "live.db"))
+        init_db()
+        populate(args.users, args.games, random.Random(3))
+        snap = backup_database(os.path.join(tmp, "snap.db"))
+        raw_mb = snap["bytes"] / 2**20
+        print(f"snapshot: {raw_mb:.0f} MB")
+
+        for codec in ("gzip", "lzma"):
+            out = os.path.join(tmp, codec)
+            os.mkdir(out)
+            t0 = time.perf_counter()
+            manifest = build_artifact(snap["path"], out, f"bench_{codec}", codec=codec, chunk_mb=args.chunk_mb)
+            build = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            reassemble(manifest, out, os.path.join(out, "restored.db"))
+            restore = time.perf_counter() - t0
+            comp_mb = manifest["compressed_bytes"] / 2**20
+            print(f"{codec:<5}: {comp_mb:7.1f} MB (ratio {raw_mb / comp_mb:4.1f}) in {len(manifest['chunks'])} chunks | "
+                  f"compress {raw_mb / build:6.1f} MB/s | reassemble+verify {raw_mb / restore:6.1f} MB/s")
+        close_pool()
+
+    # retention over 60 days of 12-hourly backups plus a few manual ones
+    now = datetime(2025, 6, 1, 12)
+    times = [now - timedelta(hours=12 * i) for i in range(120)] + [now - timedelta(hours=i) for i in range(1, 5)]
+    print(f"retention: {len(times)} backups -> keep {len(select_retained(times, now=now))}")
+
+
+if __name__ == "__main__":
+    main()
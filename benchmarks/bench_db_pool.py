@@ -0,0 +1,170 @@
+"""
+Benchmark: per-call sqlite3.connect vs the pooled WAL connection layer
+on the /join -> end_game persistence path.
+
+    python benchmarks/bench_db_pool.py --games 300 --players 7
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugins.connections.pool import init_pool, close_pool  # noqa: E402
+from plugins.connections import db as conn_db  # noqa: E402
+from plugins.game import db as game_db  # noqa: E402
+from plugins.connections.writebehind import touch_user, flush_users  # noqa: E402
+
+
+class U:
+    def __init__(self, uid):
+        self.id = uid
+        self.first_name = f"Player{uid}"
+        self.username = f"p{uid}"
+
+
+# ---------- baseline: one connection per helper call (pre-pool behaviour) ----------
+def legacy_ensure_user_exists(path, user):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT user_id FROM users WHERE user_id = ?", (user.id,))
+    if not c.fetchone():
+        c.execute("INSERT INTO users (user_id, first_name, username) VALUES (?, ?, ?)",
+                  (user.id, user.first_name, user.username))
+    else:
+        c.execute("UPDATE users SET first_name = ?, username = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?",
+                  (user.first_name, user.username, user.id))
+    conn.commit()
+    conn.close()
+
+
+def legacy_ensure_columns_exist(path):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("PRAGMA table_info(users)")
+    c.fetchall()
+    conn.commit()
+    conn.close()
+
+
+def legacy_update_user_after_game(path, uid, score, won):
+    conn = sqlite3.connect(path)
+    legacy_ensure_columns_exist(path)
+    c = conn.cursor()
+    c.execute("SELECT user_id FROM users WHERE user_id = ?", (uid,))
+    if not c.fetchone():
+        c.execute("INSERT INTO users (user_id, first_name, username) VALUES (?, ?, ?)", (uid, "", ""))
+    c.execute(
+        """
+        UPDATE users
+        SET games_played = COALESCE(games_played,0) + 1,
+            wins = COALESCE(wins,0) + ?,
+            losses = COALESCE(losses,0) + ?,
+            total_score = COALESCE(total_score,0) + ?,
+            last_score = ?
+        WHERE user_id = ?
+        """,
+        (1 if won else 0, 0 if won else 1, score, score, uid),
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_record_group_game_end(path, group_id, players, winner, now):
+    conn = sqlite3.connect(path, timeout=10)
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO groups (group_id, title, games_played, last_game_at) VALUES (?, ?, 1, ?)
+        ON CONFLICT(group_id) DO UPDATE SET games_played=groups.games_played+1, last_game_at=excluded.last_game_at
+    """, (group_id, "Bench", now))
+    for uid in players:
+        c.execute("""
+            INSERT INTO user_group_stats (user_id, group_id, games_played, wins, updated_at) VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(user_id, group_id) DO UPDATE SET games_played = user_group_stats.games_played + 1,
+              wins = user_group_stats.wins + ?, updated_at = excluded.updated_at
+        """, (uid, group_id, 1 if uid == winner else 0, now, 1 if uid == winner else 0))
+    conn.commit()
+    conn.close()
+
+
+def legacy_insert_game(path, group_id, now):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("INSERT INTO games (group_id, ended_at) VALUES (?, ?)", (group_id, now))
+    conn.commit()
+    conn.close()
+
+
+def run_legacy(path, games, players):
+    for g in range(games):
+        group_id = -1000 - (g % 50)
+        uids = [g * players + i for i in range(players)]
+        for uid in uids:                                   # /join
+            legacy_ensure_user_exists(path, U(uid))
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        legacy_record_group_game_end(path, group_id, uids, uids[0], now)
+        legacy_insert_game(path, group_id, now)
+        for uid in uids:                                   # end_game
+            legacy_ensure_user_exists(path, U(uid))
+            legacy_update_user_after_game(path, uid, -3, uid == uids[0])
+
+
+# ---------- pooled layer, batched game-end commit ----------
+def run_pooled(games, players):
+    for g in range(games):
+        group_id = -1000 - (g % 50)
+        uids = [g * players + i for i in range(players)]
+        for uid in uids:
+            touch_user(U(uid))
+        flush_users()
+        results = [
+            {"user_id": uid, "first_name": f"Player{uid}", "username": f"p{uid}", "score": -3,
+             "won": uid == uids[0], "eliminated": False, "rounds_played": 0, "penalties": 0}
+            for uid in uids
+        ]
+        game_db.commit_game_result(group_id, "Bench", results)
+
+
+def prepare(path):
+    init_pool(path)
+    conn_db.init_db()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=300)
+    ap.add_argument("--players", type=int, default=7)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+
+        prepare(legacy_path)
+        close_pool()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+        t0 = time.perf_counter()
+        run_legacy(legacy_path, args.games, args.players)
+        legacy = time.perf_counter() - t0
+
+        prepare(pooled_path)
+        t0 = time.perf_counter()
+        run_pooled(args.games, args.players)
+        pooled = time.perf_counter() - t0
+        close_pool()
+
+    per_game = lambda total: total / args.games * 1000  # noqa: E731
+    print(f"games={args.games} players={args.players}")
+    print(f"per-call connect : {legacy:8.3f}s  ({per_game(legacy):6.2f} ms/game)")
+    print(f"pooled + batched : {pooled:8.3f}s  ({per_game(pooled):6.2f} ms/game)")
+    print(f"speedup          : {legacy / pooled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: pick reminders/timeouts for many concurrent games, the old
+four-tasks-per-player layout vs the per-game DeadlineScheduler. Reports
+task counts, scheduling cost, CPU time and event-loop lag over one round
+(PICK_TIME_SEC scaled down to --round seconds).
+
+    python benchmarks/bench_game_timers.py --games 1000 --players 7
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugins.game.timers import DeadlineScheduler  # noqa: E402
+
+PICK_TIME_SEC = 120
+THRESHOLDS = (60, 30, 10)
+
+
+async def noop(*_):
+    pass
+
+
+def schedule_tasks(games, players, scale):
+    """The old start_round layout: one sleeping task per threshold and player."""
+    tasks = []
+    for g in range(games):
+        for uid in range(players):
+            for secs in THRESHOLDS:
+                async def alert(d=(PICK_TIME_SEC - secs) * scale):
+                    await asyncio.sleep(d)
+                    await noop()
+                tasks.append(asyncio.create_task(alert()))
+
+            async def timeout(d=PICK_TIME_SEC * scale):
+                await asyncio.sleep(d)
+                await noop()
+            tasks.append(asyncio.create_task(timeout()))
+    return tasks
+
+
+def schedule_deadlines(games, players, scale):
+    schedulers = []
+    for g in range(games):
+        timers = DeadlineScheduler()
+        for uid in range(players):
+            for secs in THRESHOLDS:
+                timers.schedule(uid, secs, (PICK_TIME_SEC - secs) * scale, noop)
+            timers.schedule(uid, "timeout", PICK_TIME_SEC * scale, noop)
+        schedulers.append(timers)
+    return schedulers
+
+
+async def measure(label, setup, games, players, round_sec):
+    scale = round_sec / PICK_TIME_SEC
+    lags = []
+    stop = False
+
+    async def ticker():
+        while not stop:
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append((time.perf_counter() - t0 - 0.005) * 1e3)
+
+    tick = asyncio.create_task(ticker())
+    base_tasks = len(asyncio.all_tasks())
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    handles = setup(games, players, scale)
+    schedule_ms = (time.perf_counter() - t0) * 1e3
+    peak = len(asyncio.all_tasks()) - base_tasks
+    await asyncio.sleep(round_sec + 0.2)
+    cpu = time.process_time() - cpu0
+    stop = True
+    await tick
+    lags.sort()
+    print(f"{label:<10}: live tasks {peak:>6} | schedule {schedule_ms:7.1f} ms | CPU {cpu * 1e3:7.1f} ms "
+          f"| loop lag p99 {lags[int(len(lags) * .99)]:5.2f} ms max {lags[-1]:6.2f} ms")
+    return handles
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=1000)
+    ap.add_argument("--players", type=int, default=7)
+    ap.add_argument("--round", type=float, default=3.0, help="seconds standing in for PICK_TIME_SEC")
+    args = ap.parse_args()
+    print(f"{args.games} games x {args.players} players, {len(THRESHOLDS)} reminders + timeout each")
+    asyncio.run(measure("tasks", schedule_tasks, args.games, args.players, args.round))
+    asyncio.run(measure("deadlines", schedule_deadlines, args.games, args.players, args.round))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: cost of one leaderboard page tap at increasing depth, keyset
+pagination vs LIMIT/OFFSET, on a large users table.
+
+    python benchmarks/bench_leaderboard_pages.py --users 1000000
+"""
+import argparse
+import importlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.connections.pool import init_pool, close_pool, db_read, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.ranking import get_rank_index  # noqa: E402
+
+leaderboard = importlib.import_module("plugins.helpers.leaderboard")
+
+
+def populate(n, rng):
+    with db_write() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, first_name, wins, total_score) VALUES (?, ?, ?, ?)",
+            ((uid, f"p{uid}", int(rng.expovariate(1 / 4)), rng.randint(-40, 40)) for uid in range(1, n + 1)),
+        )
+
+
+def offset_page(offset, limit):
+    with db_read() as conn:
+        return conn.execute(
+            "SELECT user_id, first_name, wins, total_score FROM users "
+            "ORDER BY wins DESC, total_score DESC, user_id DESC LIMIT ? OFFSET ?",
+            (limit, offset),
+        ).fetchall()
+
+
+def timed(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=1_000_000)
+    ap.add_argument("--reps", type=int, default=20)
+    args = ap.parse_args()
+    per_page = leaderboard.PER_PAGE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        init_pool(os.path.join(tmp, "lb.db"))
+        init_db()
+        populate(args.users, random.Random(7))
+        get_rank_index()
+
+        print(f"users={args.users} per_page={per_page}")
+        for page in (1, 100, 10_000, args.users // per_page):
+            cursor = leaderboard.get_page_cursor(page)
+            keyset = timed(lambda: leaderboard.get_leaderboard_page("next", cursor), args.reps)
+            offset = timed(lambda: offset_page((page - 1) * per_page, per_page), args.reps)
+            print(f"page {page:>7}: keyset {keyset:9.1f} µs | offset {offset:11.1f} µs")
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
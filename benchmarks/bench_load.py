@@ -0,0 +1,254 @@
+"""
+Load test: the real Application (game + chat metadata handlers, outbox,
+SQLite) against the fake Bot API in benchmarks/fake_bot_api.py. A driver in
+a child process plays N groups x 7 synthetic players end to end: /startgame
+-> Solo -> /join x7 -> a DM pick per player per round -> end_game. The bot's
+own event loop only runs the bot, so its lag is measured cleanly.
+
+Reports, per level: latency from a round's last pick to its results message
+reaching the API, Bot API calls per game, and event-loop lag. Outbox limits
+are multiplied by --speedup (Telegram's real 30 msg/s would make 1,000
+games a multi-hour run); the DB is a throwaway file.
+
+    python benchmarks/bench_load.py --games 10 100 1000 --rtt 50 --speedup 100
+    python benchmarks/bench_load.py --games 100 --concurrent-updates 0
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from telegram.ext import ApplicationBuilder  # noqa: E402
+from config import (  # noqa: E402
+    MAX_PLAYERS, UPDATE_CONCURRENCY, OUTBOUND_GLOBAL_RATE, OUTBOUND_GROUP_RATE, OUTBOUND_GROUP_BURST,
+    OUTBOUND_PRIVATE_RATE, OUTBOUND_PRIVATE_BURST, OUTBOUND_BULK_RESERVE,
+)
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.pool import init_pool, close_pool  # noqa: E402
+from plugins.connections.worker import shutdown_workers  # noqa: E402
+from plugins.game import core, game_handlers  # noqa: E402
+from plugins.utils import outbound  # noqa: E402
+from plugins.utils.chatmeta import chatmeta_handlers  # noqa: E402
+from plugins.utils.outbound import OutboundScheduler  # noqa: E402
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+
+TOKEN = "123456:LOAD"
+ROUND_DM = re.compile(r"(\d+)")
+RESULTS = re.compile(r"𝗥𝗼𝘂𝗻𝗱 (\d+) 𝗥𝗲𝘀𝘂𝗹𝘁𝘀")
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+# ---------------------------------------------------------------- driver (child process)
+
+class Driver:
+    """Plays every group's players by reacting to what the bot sends."""
+
+    def __init__(self, api: FakeBotAPI, games: int, think: float, ramp: float, seed: int):
+        self.api, self.think, self.ramp = api, think, ramp
+        self.rng = random.Random(seed)
+        self.groups = [-1001000000000 - g for g in range(games)]
+        self.players = {gid: [10_000_000 + g * 10 + i for i in range(MAX_PLAYERS)]
+                        for g, gid in enumerate(self.groups)}
+        self.group_of = {gid: gid for gid in self.groups}
+        for gid, uids in self.players.items():
+            self.group_of.update((uid, gid) for uid in uids)
+        self.calls = Counter()          # group -> Bot API calls for its chat and its players
+        self.last_pick = {}             # (group, round) -> time of the latest pick sent
+        self.latencies = []
+        self.rounds = 0
+        self.done = set()
+        self.started = asyncio.Event()
+        self.finished = asyncio.Event()
+
+    def later(self, delay, fn, *args):
+        asyncio.get_running_loop().call_later(delay, fn, *args)
+
+    def begin(self):
+        for i, gid in enumerate(self.groups):
+            self.later(self.ramp * i / len(self.groups), self.api.push_text, gid, self.players[gid][0], "/startgame")
+
+    def pick(self, gid, uid, round_no):
+        self.api.push_text(uid, uid, str(self.rng.randrange(101)))
+        key = (gid, round_no)
+        self.last_pick[key] = time.perf_counter()
+
+    def on_call(self, method, params):
+        if method == "getUpdates":
+            self.started.set()
+            return
+        try:
+            chat_id = int(params.get("chat_id", 0))
+        except (TypeError, ValueError):
+            return
+        gid = self.group_of.get(chat_id)
+        if gid is None:
+            return
+        self.calls[gid] += 1
+        text = str(params.get("text") or params.get("caption") or "")
+
+        if chat_id != gid:
+            if "Send a number" in text:
+                round_no = int(ROUND_DM.search(text).group(1))
+                self.later(self.rng.uniform(0, self.think), self.pick, gid, chat_id, round_no)
+        elif method == "sendPhoto" and "Choose game mode" in text:
+            self.api.push_callback(gid, self.players[gid][0], f"start_solo:{gid}", params.get("message_id", 1))
+        elif method == "editMessageCaption" and "/join" in text:
+            for uid in self.players[gid]:
+                self.later(self.rng.uniform(0, self.think), self.api.push_text, gid, uid, "/join")
+        elif (m := RESULTS.search(text)) is not None:
+            picked = self.last_pick.pop((gid, int(m.group(1))), None)
+            if picked is not None:
+                self.latencies.append(time.perf_counter() - picked)
+            self.rounds += 1
+        elif text.startswith("The game has ended"):
+            self.done.add(gid)
+            if len(self.done) == len(self.groups):
+                self.finished.set()
+
+
+async def drive(args: dict, ports: mp.Queue, results: mp.Queue, stop):
+    api = FakeBotAPI(args["rtt"] / 1000)
+    driver = Driver(api, args["games"], args["think"] / 1000, args["ramp"], args["seed"])
+    api.on_call = driver.on_call
+    ports.put(await api.start())
+
+    await driver.started.wait()
+    t0 = time.perf_counter()
+    driver.begin()
+    try:
+        await asyncio.wait_for(driver.finished.wait(), args["timeout"])
+    except asyncio.TimeoutError:
+        pass
+    results.put({
+        "elapsed": time.perf_counter() - t0,
+        "done": len(driver.done),
+        "rounds": driver.rounds,
+        "latencies": driver.latencies,
+        "calls": [driver.calls[gid] for gid in driver.done],
+        "methods": dict(api.calls),
+    })
+    while not stop.is_set():
+        await asyncio.sleep(0.1)
+    await api.stop()
+
+
+def drive_process(args, ports, results, stop):
+    asyncio.run(drive(args, ports, results, stop))
+
+
+# ---------------------------------------------------------------- bot (this process)
+
+async def watch_lag(samples, interval=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - t - interval)
+
+
+async def level(games, args, tmp):
+    s = args.speedup
+    outbound.outbox = OutboundScheduler(
+        global_rate=OUTBOUND_GLOBAL_RATE * s, global_burst=OUTBOUND_GLOBAL_RATE,
+        group_rate=OUTBOUND_GROUP_RATE * s, group_burst=OUTBOUND_GROUP_BURST,
+        private_rate=OUTBOUND_PRIVATE_RATE * s, private_burst=OUTBOUND_PRIVATE_BURST,
+        bulk_reserve=OUTBOUND_BULK_RESERVE,
+    )
+    init_pool(os.path.join(tmp, f"load{games}.db"))
+    init_db()
+
+    ctx = mp.get_context("spawn")
+    ports, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    opts = {"games": games, "rtt": args.rtt, "think": args.think, "ramp": args.ramp,
+            "timeout": args.timeout, "seed": games}
+    proc = ctx.Process(target=drive_process, args=(opts, ports, results, stop), daemon=True)
+    proc.start()
+    port = await asyncio.to_thread(ports.get, True, 30)
+
+    builder = ApplicationBuilder().token(TOKEN).base_url(f"http://127.0.0.1:{port}/bot")
+    if args.concurrent_updates:
+        builder = builder.concurrent_updates(args.concurrent_updates)
+    app = builder.build()
+    chatmeta_handlers(app)
+    game_handlers(app)
+
+    lag = []
+    watcher = asyncio.create_task(watch_lag(lag))
+    await app.initialize()
+    await app.start()
+    await app.updater.start_polling(poll_interval=0.0, timeout=5)
+    while True:
+        try:
+            report = await asyncio.to_thread(results.get, True, 1.0)
+            break
+        except queue.Empty:
+            if not proc.is_alive():
+                raise RuntimeError("load driver exited early")
+    while outbound.outbox.stats()["queued"]:
+        await asyncio.sleep(0.05)
+    watcher.cancel()
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    stop.set()
+    proc.join(10)
+
+    stuck = len(core.active_games)
+    core.active_games.clear()
+    core.user_active_game.clear()
+    close_pool()
+
+    lat = [x * 1e3 for x in report["latencies"]]
+    calls = report["calls"]
+    api_total = sum(report["methods"].values()) - report["methods"].get("getUpdates", 0)
+    print(f"{games:>5} games: {report['done']} finished, {stuck} stuck, {report['rounds']} rounds "
+          f"in {report['elapsed']:.1f}s ({api_total / report['elapsed']:,.0f} API calls/s)")
+    print(f"       last pick -> results : p50 {pct(lat, .5):7.1f} ms  p99 {pct(lat, .99):7.1f} ms  max {max(lat, default=0):7.1f} ms")
+    print(f"       API calls per game   : mean {sum(calls) / len(calls) if calls else float('nan'):6.1f}  "
+          f"p99 {pct(calls, .99)}  ({', '.join(f'{k} {v}' for k, v in Counter(report['methods']).most_common(5))})")
+    print(f"       event-loop lag       : p50 {pct(lag, .5) * 1e3:6.1f} ms  p99 {pct(lag, .99) * 1e3:6.1f} ms  "
+          f"max {max(lag, default=0) * 1e3:6.1f} ms")
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        for games in args.games:
+            await level(games, args, tmp)
+    shutdown_workers()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--rtt", type=float, default=50.0, help="fake Bot API latency per call, ms")
+    ap.add_argument("--think", type=float, default=500.0, help="max player delay before a /join or pick, ms")
+    ap.add_argument("--ramp", type=float, default=5.0, help="seconds over which the games start")
+    ap.add_argument("--speedup", type=float, default=100.0, help="multiplier on the outbox rate limits")
+    ap.add_argument("--concurrent-updates", type=int, default=UPDATE_CONCURRENCY,
+                    help="PTB concurrent_updates, as bot.py builds it (0: sequential)")
+    ap.add_argument("--timeout", type=float, default=900.0, help="per level, seconds")
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"fake API rtt {args.rtt:.0f} ms, players think up to {args.think:.0f} ms, "
+          f"outbox limits x{args.speedup:g}, concurrent_updates={args.concurrent_updates or 'off'}")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Migrate a copy of the shipped mindscale.db to the current schema, check the
+result, and measure what dropping per-call schema introspection saves on the
+leaderboard / userinfo queries.
+
+    python benchmarks/bench_migrations.py --db mindscale.db --iterations 2000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugins.connections.pool import init_pool, close_pool, db_read, db_write  # noqa: E402
+from plugins.connections.migrations import migrate, SCHEMA_VERSION  # noqa: E402
+
+LEGACY_REQUIRED = {
+    "games_played": "INTEGER DEFAULT 0",
+    "wins": "INTEGER DEFAULT 0",
+    "losses": "INTEGER DEFAULT 0",
+    "rounds_played": "INTEGER DEFAULT 0",
+    "eliminations": "INTEGER DEFAULT 0",
+    "total_score": "INTEGER DEFAULT 0",
+    "last_score": "INTEGER DEFAULT 0",
+    "penalties": "INTEGER DEFAULT 0",
+}
+
+LEGACY_TOP = """
+    SELECT user_id, IFNULL(username, '') AS username, IFNULL(first_name, '') AS first_name,
+           IFNULL(games_played, 0), IFNULL(wins, 0), IFNULL(losses, 0), IFNULL(rounds_played, 0),
+           IFNULL(eliminations, 0), IFNULL(total_score, 0), IFNULL(penalties, 0)
+    FROM users ORDER BY wins DESC, total_score DESC LIMIT 100
+"""
+CURRENT_TOP = """
+    SELECT user_id, IFNULL(username, '') AS username, IFNULL(first_name, '') AS first_name,
+           games_played, wins, losses, rounds_played, eliminations, total_score, penalties
+    FROM users ORDER BY wins DESC, total_score DESC LIMIT 100
+"""
+LEGACY_ROW = """
+    SELECT first_name, username, IFNULL(games_played,0), IFNULL(wins,0), IFNULL(losses,0),
+           IFNULL(rounds_played,0), IFNULL(eliminations,0), IFNULL(total_score,0),
+           IFNULL(last_score,0), IFNULL(penalties,0)
+    FROM users WHERE user_id = ?
+"""
+CURRENT_ROW = """
+    SELECT first_name, username, games_played, wins, losses, rounds_played,
+           eliminations, total_score, last_score, penalties
+    FROM users WHERE user_id = ?
+"""
+
+
+def legacy_ensure_columns_exist():
+    """What every leaderboard / userinfo call used to do before querying."""
+    with db_write() as conn:
+        c = conn.cursor()
+        c.execute("PRAGMA table_info(users)")
+        existing = [col[1] for col in c.fetchall()]
+        for col, col_type in LEGACY_REQUIRED.items():
+            if col not in existing:
+                c.execute(f"ALTER TABLE users ADD COLUMN {col} {col_type}")
+
+
+def run_query(sql, params=()):
+    with db_read() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def timed(fn, iterations):
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1e6  # µs per call
+
+
+def check_schema(path):
+    conn = sqlite3.connect(path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        assert version == SCHEMA_VERSION, f"user_version={version}, expected {SCHEMA_VERSION}"
+        users = {r[1]: (r[2], r[3]) for r in conn.execute("PRAGMA table_info(users)")}
+        for col in ("total_score", "last_score", "wins", "games_played", "rounds_played"):
+            assert users[col] == ("INTEGER", 1), f"users.{col} is {users[col]}"
+        groups = {r[1] for r in conn.execute("PRAGMA table_info(groups)")}
+        assert {"last_game_at", "updated_at", "invite_link"} <= groups, groups
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.path.join(root, "mindscale.db"))
+    ap.add_argument("--iterations", type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mindscale.db")
+        shutil.copyfile(args.db, path)
+        src = sqlite3.connect(path)
+        users_before = src.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        sample = src.execute("SELECT user_id FROM users LIMIT 1").fetchone()
+        src.close()
+        uid = sample[0] if sample else 0
+
+        init_pool(path)
+        t0 = time.perf_counter()
+        start, current = migrate()
+        migrate_ms = (time.perf_counter() - t0) * 1000
+        again = migrate()
+        close_pool()
+
+        users_after = check_schema(path)
+        assert users_after == users_before, f"lost users: {users_before} -> {users_after}"
+        assert again == (SCHEMA_VERSION, SCHEMA_VERSION), again
+
+        init_pool(path)
+        rows = [
+            ("leaderboard top 100",
+             lambda: (legacy_ensure_columns_exist(), run_query(LEGACY_TOP)),
+             lambda: run_query(CURRENT_TOP)),
+            ("userinfo row",
+             lambda: (legacy_ensure_columns_exist(), run_query(LEGACY_ROW, (uid,))),
+             lambda: run_query(CURRENT_ROW, (uid,))),
+        ]
+        results = [(name, timed(old, args.iterations), timed(new, args.iterations)) for name, old, new in rows]
+        close_pool()
+
+    print(f"migrated v{start} -> v{current} in {migrate_ms:.1f} ms ({users_after} users), re-run is a no-op")
+    for name, old, new in results:
+        print(f"{name:20s}: {old:8.1f} µs -> {new:8.1f} µs  (saved {old - new:7.1f} µs/query)")
+
+
+if __name__ == "__main__":
+    main()
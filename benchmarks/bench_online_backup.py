@@ -0,0 +1,104 @@
+"""
+Benchmark: online backup of a large database while games keep committing.
+Reports backup metrics, event-loop lag and write latency during the copy,
+and checks the copy really paused `--sleep-ms` between steps.
+
+    python benchmarks/bench_online_backup.py --mb 2048
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from config import BACKUP_STEP_SLEEP_MS  # noqa: E402
+from plugins.connections.pool import init_pool, close_pool, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.worker import run_write, shutdown_workers  # noqa: E402
+from plugins.connections.online_backup import backup_database  # noqa: E402
+
+ROW_BYTES = 1000
+
+
+def populate(mb):
+    rows = mb * 2**20 // ROW_BYTES
+    pad = "x" * (ROW_BYTES - 100)
+    with db_write() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, first_name, username) VALUES (?, ?, ?)",
+            ((uid, f"p{uid}", pad) for uid in range(1, rows + 1)),
+        )
+    return rows
+
+
+def one_write(uid):
+    with db_write() as conn:
+        conn.execute("UPDATE users SET total_score = total_score + 1 WHERE user_id = ?", (uid,))
+
+
+def pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+async def run(dst, rows, sleep_ms):
+    done = asyncio.Event()
+    lags, writes = [], []
+
+    async def ticker():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - t0 - 0.01) * 1e3)
+
+    async def writer():
+        uid = 0
+        while not done.is_set():
+            uid = uid % rows + 1
+            t0 = time.perf_counter()
+            await run_write(one_write, uid)
+            writes.append((time.perf_counter() - t0) * 1e3)
+            await asyncio.sleep(0.005)
+
+    async def backup():
+        try:
+            return await asyncio.to_thread(backup_database, dst, sleep_ms=sleep_ms)
+        finally:
+            done.set()
+
+    metrics, *_ = await asyncio.gather(backup(), ticker(), writer())
+    return metrics, lags, writes
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=int, default=512)
+    ap.add_argument("--sleep-ms", type=int, default=BACKUP_STEP_SLEEP_MS, help="pause between backup steps")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        init_pool(os.path.join(tmp, "live.db"))
+        init_db()
+        rows = populate(args.mb)
+
+        metrics, lags, writes = asyncio.run(run(os.path.join(tmp, "backup.db"), rows, args.sleep_ms))
+        print(f"backup: {metrics['bytes'] / 2**20:.0f} MB, {metrics['pages']} pages, {metrics['steps']} steps, "
+              f"copy {metrics['copy_sec']:.2f}s ({metrics['mb_per_sec']:.0f} MB/s), "
+              f"integrity_check {metrics['check_sec']:.2f}s -> {metrics['integrity']}")
+        print(f"event loop lag : p50 {pct(lags, .5):6.2f} ms | p99 {pct(lags, .99):6.2f} ms | max {max(lags):6.2f} ms")
+        print(f"writes ({len(writes):>5}) : p50 {pct(writes, .5):6.2f} ms | p99 {pct(writes, .99):6.2f} ms")
+        # every step but the last is followed by a pause
+        floor = (metrics["steps"] - 1) * args.sleep_ms / 1000
+        print(f"pauses         : copy {metrics['copy_sec']:.2f}s >= {floor:.2f}s of {args.sleep_ms} ms pauses")
+        if metrics["copy_sec"] < floor:
+            raise SystemExit("backup did not pause between steps")
+        shutdown_workers()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: round-result latency of live games while a large /cast runs.
+Every game posts its round burst (reveal, results, 7 DMs) on a fixed
+cadence against a fake Bot API; the broadcast either rides the bulk lane
+or (as before lanes existed) competes in the same lane as the games.
+Telegram's limits are scaled by --speedup so a 100k-recipient broadcast
+fits in seconds; latencies are reported in unscaled (real bot) seconds.
+
+    python benchmarks/bench_priority_lanes.py --games 40 --recipients 100000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from config import (  # noqa: E402
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_GROUP_RATE, OUTBOUND_GROUP_BURST,
+    OUTBOUND_PRIVATE_RATE, OUTBOUND_PRIVATE_BURST, OUTBOUND_BULK_RESERVE,
+)
+from plugins.utils import outbound  # noqa: E402
+from plugins.utils.outbound import OutboundScheduler, REALTIME, BULK  # noqa: E402
+
+PLAYERS = 7
+
+
+class FakeBot:
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.calls = 0
+
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(self.rtt)
+        self.calls += 1
+
+
+async def game(bot, group_id, rounds, cadence, latencies, offset):
+    await asyncio.sleep(offset)
+    for r in range(rounds):
+        t0 = time.perf_counter()
+        futures = [outbound.outbox.submit(group_id, partial(bot.send_message, group_id, "reveal")),
+                   outbound.outbox.submit(group_id, partial(bot.send_message, group_id, "results"))]
+        futures += [outbound.outbox.submit(uid, partial(bot.send_message, uid, "round"))
+                    for uid in range(group_id * -100, group_id * -100 + PLAYERS)]
+        await asyncio.gather(*futures)
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(max(0.0, cadence - (time.perf_counter() - t0)))
+
+
+async def scenario(label, args, broadcast_lane):
+    s = args.speedup
+    outbound.outbox = OutboundScheduler(
+        global_rate=OUTBOUND_GLOBAL_RATE * s, global_burst=OUTBOUND_GLOBAL_RATE,
+        group_rate=OUTBOUND_GROUP_RATE * s, group_burst=OUTBOUND_GROUP_BURST,
+        private_rate=OUTBOUND_PRIVATE_RATE * s, private_burst=OUTBOUND_PRIVATE_BURST,
+        bulk_reserve=OUTBOUND_BULK_RESERVE,
+    )
+    bot = FakeBot(args.rtt / 1000 / s)
+    latencies = []
+    cast = None
+    if broadcast_lane is not None:
+        recipients = ((uid, partial(bot.send_message, uid, "cast")) for uid in range(10**9, 10**9 + args.recipients))
+        cast = asyncio.create_task(outbound.fan_out(recipients, lane=broadcast_lane))
+    cadence = args.cadence / s
+    t0 = time.perf_counter()
+    await asyncio.gather(*(game(bot, -(1000 + g), args.rounds, cadence, latencies, cadence * g / args.games)
+                           for g in range(args.games)))
+    elapsed = time.perf_counter() - t0
+    cast_sent = bot.calls - len(latencies) * (PLAYERS + 2)
+    if cast is not None:
+        cast.cancel()
+    latencies = sorted(x * s for x in latencies)
+    pct = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))]  # noqa: E731
+    print(f"{label:<22}: round burst p50 {pct(.5):6.2f}s p95 {pct(.95):6.2f}s max {latencies[-1]:6.2f}s "
+          f"| broadcast {cast_sent / (elapsed * s):5.1f} msg/s ({cast_sent} sent)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=40)
+    ap.add_argument("--rounds", type=int, default=8)
+    ap.add_argument("--cadence", type=float, default=30.0, help="seconds between a game's rounds")
+    ap.add_argument("--recipients", type=int, default=100_000)
+    ap.add_argument("--rtt", type=float, default=80.0, help="Bot API round trip, ms")
+    ap.add_argument("--speedup", type=float, default=100.0)
+    args = ap.parse_args()
+    print(f"{args.games} games x {args.rounds} rounds every {args.cadence:.0f}s, "
+          f"{PLAYERS + 2} messages per round; broadcast to {args.recipients} chats")
+    asyncio.run(scenario("no broadcast", args, None))
+    asyncio.run(scenario("broadcast, bulk lane", args, BULK))
+    asyncio.run(scenario("broadcast, same lane", args, REALTIME))
+
+
+if __name__ == "__main__":
+    main()
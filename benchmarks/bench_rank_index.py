@@ -0,0 +1,114 @@
+"""
+Benchmark: exact global rank via the in-memory RankIndex vs SQL on a large
+users table (default 1M users).
+
+    python benchmarks/bench_rank_index.py --users 1000000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugins.connections.pool import init_pool, close_pool, db_read, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections import ranking  # noqa: E402
+
+SQL_RANK = """
+    SELECT COUNT(*) + 1 FROM users
+    WHERE wins > ?1
+       OR (wins = ?1 AND total_score > ?2)
+       OR (wins = ?1 AND total_score = ?2 AND user_id > ?3)
+"""
+
+
+def populate(n, rng):
+    with db_write() as conn:
+        batch = []
+        for uid in range(1, n + 1):
+            wins = int(rng.expovariate(1 / 4))
+            batch.append((uid, f"p{uid}", wins, wins * 3 - rng.randint(0, 40)))
+            if len(batch) == 50000:
+                conn.executemany("INSERT INTO users (user_id, first_name, wins, total_score) VALUES (?, ?, ?, ?)", batch)
+                batch.clear()
+        if batch:
+            conn.executemany("INSERT INTO users (user_id, first_name, wins, total_score) VALUES (?, ?, ?, ?)", batch)
+
+
+def sql_rank(uid):
+    with db_read() as conn:
+        wins, score = conn.execute("SELECT wins, total_score FROM users WHERE user_id = ?", (uid,)).fetchone()
+        return conn.execute(SQL_RANK, (wins, score, uid)).fetchone()[0]
+
+
+def top100_scan(uid):
+    """Pre-index behaviour: scan the top 100, anyone else gets 101."""
+    with db_read() as conn:
+        rows = conn.execute("SELECT user_id FROM users ORDER BY wins DESC, total_score DESC LIMIT 100").fetchall()
+    for i, (row_uid,) in enumerate(rows, start=1):
+        if row_uid == uid:
+            return i
+    return len(rows) + 1
+
+
+def per_call_us(fn, args):
+    t0 = time.perf_counter()
+    for a in args:
+        fn(a)
+    return (time.perf_counter() - t0) / len(args) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=1_000_000)
+    ap.add_argument("--lookups", type=int, default=2000)
+    ap.add_argument("--sql-lookups", type=int, default=20)
+    args = ap.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        init_pool(os.path.join(tmp, "rank.db"))
+        init_db()
+        t0 = time.perf_counter()
+        populate(args.users, rng)
+        print(f"populated {args.users} users in {time.perf_counter() - t0:.1f}s")
+
+        ranking.reset_rank_index()
+        t0 = time.perf_counter()
+        index = ranking.get_rank_index()
+        print(f"index load       : {time.perf_counter() - t0:8.2f} s")
+
+        sample = [rng.randint(1, args.users) for _ in range(args.lookups)]
+        for uid in sample[:args.sql_lookups]:
+            assert index.rank(uid) == sql_rank(uid), uid
+
+        idx_us = per_call_us(index.rank, sample)
+        sql_us = per_call_us(sql_rank, sample[:args.sql_lookups])
+        scan_us = per_call_us(top100_scan, sample[:args.sql_lookups])
+        nb_us = per_call_us(lambda u: index.neighbours(u, 2, 2), sample)
+
+        updates = [(uid, rng.randint(0, 60), rng.randint(-200, 200)) for uid in sample]
+        t0 = time.perf_counter()
+        for row in updates:
+            index.update(*row)
+        upd_us = (time.perf_counter() - t0) / len(updates) * 1e6
+        with db_write() as conn:
+            conn.executemany("UPDATE users SET wins = ?, total_score = ? WHERE user_id = ?",
+                             [(w, s, u) for u, w, s in updates])
+        for uid in sample[:args.sql_lookups]:
+            assert index.rank(uid) == sql_rank(uid), uid
+        assert index.at(1) is not None and index.rank(index.at(1)) == 1
+        close_pool()
+
+    print(f"rank (index)     : {idx_us:8.1f} µs")
+    print(f"neighbours ±2    : {nb_us:8.1f} µs")
+    print(f"update (index)   : {upd_us:8.1f} µs")
+    print(f"rank (SQL count) : {sql_us:8.1f} µs")
+    print(f"top-100 scan     : {scan_us:8.1f} µs  (wrong for anyone outside the top 100)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: time from round start to the last "🎯 Round N" DM delivered,
+sequential awaits (the old start_round loop) vs the bounded concurrent
+fan-out in start_round, against a fake Bot API with a fixed round trip.
+Also reports how far apart the players' pick deadlines end up.
+
+    python benchmarks/bench_round_dms.py --players 7 50 --rtt 150
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.game import core  # noqa: E402
+from plugins.utils import outbound  # noqa: E402
+from plugins.utils.outbound import OutboundScheduler, send  # noqa: E402
+
+GROUP_ID = -1001234567890
+
+
+class FakeBot:
+    username = "bench_bot"
+
+    def __init__(self, rtt, jitter, rng):
+        self.rtt, self.jitter, self.rng = rtt, jitter, rng
+        self.delivered = {}
+
+    async def _call(self, chat_id):
+        await asyncio.sleep(self.rtt * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+        if chat_id > 0:
+            self.delivered[chat_id] = time.perf_counter()
+        return SimpleNamespace(message_id=1)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return await self._call(chat_id)
+
+    async def send_video(self, chat_id, **kwargs):
+        return await self._call(chat_id)
+
+    async def edit_message_text(self, chat_id, **kwargs):
+        return await self._call(chat_id)
+
+
+def new_game(players):
+    game = core.MindScaleGame(GROUP_ID)
+    for uid in range(1, players + 1):
+        game.add_player(SimpleNamespace(id=uid, full_name=f"P{uid}", username=None))
+    core.active_games[GROUP_ID] = game
+    return game
+
+
+async def sequential(bot, players):
+    """The old loop: one awaited DM after another, all timers from round start."""
+    game = new_game(players)
+    t0 = time.perf_counter()
+    for p in game.active_players:
+        try:
+            await send(bot.send_message, chat_id=p.user_id, text="🎯 Round 1")
+        except Exception:
+            pass
+    return t0, {p.user_id: t0 for p in game.active_players}
+
+
+async def concurrent(bot, players):
+    game = new_game(players)
+    t0 = time.perf_counter()
+    await core.start_round(SimpleNamespace(bot=bot), GROUP_ID)
+    loop_now, wall_now = asyncio.get_running_loop().time(), time.perf_counter()
+    starts = {key[0]: wall_now - (loop_now - (entry[0] - core.PICK_TIME_SEC))
+              for key, entry in game.timers._entries.items() if key[1] == "timeout"}
+    game.timers.cancel_all()
+    return t0, starts
+
+
+async def run(mode, players, args):
+    outbound.outbox = OutboundScheduler()
+    bot = FakeBot(args.rtt / 1000, args.jitter, random.Random(players))
+    t0, starts = await (sequential if mode == "sequential" else concurrent)(bot, players)
+    core.active_games.pop(GROUP_ID, None)
+    last = max(bot.delivered.values()) - t0
+    lags = [bot.delivered[uid] - starts[uid] for uid in bot.delivered]
+    print(f"{players:>3} players {mode:<10}: last DM at {last * 1e3:7.0f} ms | "
+          f"timer start vs own DM delivery: worst {max(abs(x) for x in lags) * 1e3:6.0f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--players", type=int, nargs="+", default=[7, 50])
+    ap.add_argument("--rtt", type=float, default=150.0, help="Bot API round trip, ms")
+    ap.add_argument("--jitter", type=float, default=0.3, help="+/- fraction of rtt")
+    args = ap.parse_args()
+    for players in args.players:
+        for mode in ("sequential", "concurrent"):
+            asyncio.run(run(mode, players, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: the game-end commit with and without round history on top of a
+large game_rounds table, and streaming throughput of `iter_rounds`.
+
+    python benchmarks/bench_round_history.py --rounds 2000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.connections.pool import init_pool, close_pool, db_read, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.game.db import commit_game_result  # noqa: E402
+from plugins.game.history import RoundRecord, pack_entries, iter_rounds  # noqa: E402
+
+PLAYERS = 8
+ROUNDS_PER_GAME = 10
+GROUPS = 500
+
+
+def fake_rounds(rng, user_ids, start):
+    rounds = []
+    scores = dict.fromkeys(user_ids, 0)
+    for n in range(1, ROUNDS_PER_GAME + 1):
+        entries = []
+        for uid in user_ids:
+            delta = rng.choice((-1, -1, 0, 1))
+            scores[uid] += delta
+            entries.append((uid, rng.randint(0, 100), delta, scores[uid], 1 if delta > 0 else 0))
+        at = (start + timedelta(seconds=60 * n)).strftime("%Y-%m-%d %H:%M:%S")
+        rounds.append(RoundRecord(n, at, rng.uniform(0, 80), pack_entries(entries)))
+    return rounds
+
+
+def preload(total_rounds, rng):
+    """Bulk-fill game_rounds/game_players directly, bypassing the game-end path."""
+    games = total_rounds // ROUNDS_PER_GAME
+    start = datetime.utcnow() - timedelta(days=365)
+    with db_write() as conn:
+        for game_id in range(1, games + 1):
+            user_ids = rng.sample(range(1, 200_001), PLAYERS)
+            group_id = -1000 - rng.randrange(GROUPS)
+            at = start + timedelta(seconds=game_id * 10)
+            conn.executemany(
+                "INSERT INTO game_rounds (game_id, round_no, group_id, played_at, target, data) VALUES (?, ?, ?, ?, ?, ?)",
+                [(game_id, r.round_no, group_id, r.played_at, r.target, r.data) for r in fake_rounds(rng, user_ids, at)],
+            )
+            conn.executemany("INSERT INTO game_players (user_id, game_id) VALUES (?, ?)",
+                             [(uid, game_id) for uid in user_ids])
+        # keep AUTOINCREMENT ahead of the preloaded ids
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('games', ?)", (games,))
+
+
+def results(rng):
+    user_ids = rng.sample(range(1, 200_001), PLAYERS)
+    return [
+        {"user_id": uid, "first_name": f"p{uid}", "username": None, "score": rng.randint(-10, 10),
+         "won": i == 0, "eliminated": False, "rounds_played": ROUNDS_PER_GAME, "penalties": 0}
+        for i, uid in enumerate(user_ids)
+    ]
+
+
+def time_commits(n, rng, with_history):
+    samples = []
+    for _ in range(n):
+        res = results(rng)
+        rounds = fake_rounds(rng, [r["user_id"] for r in res], datetime.utcnow()) if with_history else None
+        t0 = time.perf_counter()
+        commit_game_result(-1000 - rng.randrange(GROUPS), "bench", res, rounds=rounds)
+        samples.append((time.perf_counter() - t0) * 1e3)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def time_stream(label, it):
+    t0 = time.perf_counter()
+    n = sum(1 for _ in it)
+    dt = time.perf_counter() - t0
+    print(f"stream {label:<14}: {n:>9} rounds in {dt:6.2f} s ({n / dt if dt else 0:,.0f} rounds/s)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=2_000_000)
+    ap.add_argument("--games", type=int, default=300)
+    args = ap.parse_args()
+    rng = random.Random(11)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        init_pool(path)
+        init_db()
+        t0 = time.perf_counter()
+        preload(args.rounds, rng)
+        print(f"preloaded {args.rounds} rounds in {time.perf_counter() - t0:.1f} s "
+              f"({os.path.getsize(path) / 2**20:.0f} MB)")
+
+        for with_history in (False, True):
+            p50, p99 = time_commits(args.games, rng, with_history)
+            label = "with history" if with_history else "no history"
+            print(f"commit_game_result {label:<12}: p50 {p50:6.2f} ms | p99 {p99:6.2f} ms")
+
+        since = (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d %H:%M:%S")
+        time_stream("all", iter_rounds())
+        time_stream("one group", iter_rounds(group_id=-1000))
+        with db_read() as conn:
+            user_id = conn.execute("SELECT user_id FROM game_players ORDER BY game_id LIMIT 1").fetchone()[0]
+        time_stream("one user", iter_rounds(user_id=user_id))
+        time_stream("last 30 days", iter_rounds(since=since))
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark: the pure round scoring engine (plugins/game/scoring.py) vs the
+rules as they were inlined in process_round_results (replicated below on
+Player objects, without the Telegram sends). Checks both agree on every
+generated round, then reports rounds per minute for each.
+
+    python benchmarks/bench_scoring.py --rounds 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.game.core import Player  # noqa: E402
+from plugins.game.scoring import score_round  # noqa: E402
+
+
+def legacy_round(players, sticky):
+    """The pre-engine rules, verbatim apart from I/O. Mutates `players`."""
+    active = [p for p in players if not p.eliminated]
+    picks = [(p.user_id, p.current_number) for p in active if isinstance(p.current_number, (int, float))]
+    if not picks:
+        return None
+    nums = [n for _, n in picks]
+    target = sum(nums) / len(nums) * 0.8
+    alive_players = [p for p in players if not p.eliminated]
+
+    counts = {}
+    for uid, num in picks:
+        counts[num] = counts.get(num, 0) + 1
+    num_alive = len([p for p in players if not p.eliminated])
+    num_eliminated = len([p for p in players if p.eliminated])
+    if num_alive <= 2 and sticky:
+        sticky = False
+    sticky_next = num_eliminated == 0 and any(c >= 4 for c in counts.values())
+    apply_now = (num_alive > 2 and num_eliminated >= 1) or sticky
+    duplicate_nums = {n for n, c in counts.items() if c > 1} if apply_now else set()
+
+    duplicate_players = []
+    duplicates_exist = False
+    if apply_now and duplicate_nums:
+        duplicates_exist = True
+        for p in active:
+            if isinstance(p.current_number, (int, float)) and p.current_number in duplicate_nums:
+                p.score -= 1
+                duplicate_players.append(p)
+
+    winner_players = []
+    diffs = [(p, abs(p.current_number - target)) for p in alive_players if isinstance(p.current_number, (int, float))]
+    if diffs:
+        min_diff = min(d for _, d in diffs)
+        winner_players = [p for p, d in diffs if d == min_diff and not p.eliminated]
+
+    alive_now = [p for p in players if not p.eliminated]
+    zero_vs_hundred = False
+    if len(alive_now) == 2:
+        vals = [p.current_number for p in alive_now if isinstance(p.current_number, (int, float))]
+        if 0 in vals and 100 in vals:
+            p100 = next(p for p in alive_now if p.current_number == 100)
+            winner_players = [p100]
+            zero_vs_hundred = True
+            for p in alive_now:
+                if p != p100 and p not in duplicate_players:
+                    p.score -= 1
+
+    special = False
+    num_eliminated = len([p for p in players if p.eliminated])
+    if num_eliminated >= 2 and not zero_vs_hundred and not duplicates_exist:
+        exact = [p for p in alive_players if p.current_number == round(target)]
+        if exact:
+            winner_players = exact
+            special = True
+            for p in alive_players:
+                if p not in winner_players and p not in duplicate_players:
+                    p.score -= 2
+
+    if not zero_vs_hundred:
+        for p in alive_players:
+            if p in duplicate_players or p in winner_players:
+                continue
+            if p.timeout_penalty_applied or duplicates_exist or special:
+                continue
+            p.score -= 1
+
+    eliminated_now = []
+    for p in players:
+        if not p.eliminated and p.score <= -10:
+            p.eliminated = True
+            eliminated_now.append(p)
+    alive_after = len([p for p in players if not p.eliminated])
+    return target, winner_players, duplicate_players, eliminated_now, sticky or sticky_next, alive_after
+
+
+def random_round(rng):
+    n = rng.randint(5, 7)
+    hot = rng.randrange(101)
+    picks, scores, eliminated = [], [], []
+    out = rng.choice((0, 0, 1, 2, 3, n - 2))
+    for i in range(n):
+        r = rng.random()
+        if r < 0.05:
+            picks.append("Skipped")
+        elif r < 0.35:
+            picks.append(hot)
+        elif r < 0.45:
+            picks.append(rng.choice((0, 100)))
+        else:
+            picks.append(rng.randrange(101))
+        scores.append(rng.randint(-11, 0))
+        eliminated.append(i < out)
+    return picks, scores, eliminated, rng.random() < 0.3
+
+
+def make_players(picks, scores, eliminated):
+    players = []
+    for i, (v, s, e) in enumerate(zip(picks, scores, eliminated)):
+        p = Player(i, f"P{i}")
+        p.current_number, p.score, p.eliminated = v, s, e
+        players.append(p)
+    return players
+
+
+def check(cases):
+    mismatches = 0
+    for picks, scores, eliminated, sticky in cases:
+        players = make_players(picks, scores, eliminated)
+        before = [p.score for p in players]
+        legacy = legacy_round(players, sticky)
+        out = score_round(picks, scores, eliminated, sticky)
+        if legacy is None:
+            mismatches += out.target is not None
+            continue
+        target, winners, dups, elim, sticky_next, alive_after = legacy
+        same = (
+            out.target == target
+            and list(out.deltas) == [p.score - b for p, b in zip(players, before)]
+            and list(out.winners) == [p.user_id for p in winners]
+            and list(out.duplicates) == [p.user_id for p in dups]
+            and list(out.eliminated) == [p.user_id for p in elim]
+            and out.sticky == sticky_next
+            and out.alive_after == alive_after
+        )
+        mismatches += not same
+    return mismatches
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=1_000_000)
+    ap.add_argument("--check", type=int, default=200_000, help="rounds compared against the legacy rules")
+    args = ap.parse_args()
+    rng = random.Random(22)
+    cases = [random_round(rng) for _ in range(min(args.rounds, 100_000))]
+
+    print(f"equivalence: {check(cases[:args.check] + [random_round(rng) for _ in range(max(0, args.check - len(cases)))])} "
+          f"mismatches in {args.check} rounds")
+
+    reps = max(1, args.rounds // len(cases))
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for picks, scores, eliminated, sticky in cases:
+            score_round(picks, scores, eliminated, sticky)
+    engine = time.perf_counter() - t0
+    total = reps * len(cases)
+
+    legacy_cases = cases[:max(1, total // 10)]
+    t0 = time.perf_counter()
+    for picks, scores, eliminated, sticky in legacy_cases:
+        legacy_round(make_players(picks, scores, eliminated), sticky)
+    legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for picks, scores, eliminated, _ in legacy_cases:
+        make_players(picks, scores, eliminated)
+    setup = time.perf_counter() - t0
+    legacy = max(legacy - setup, 1e-9)
+
+    print(f"engine : {total / engine * 60 / 1e6:6.2f} M rounds/min ({engine / total * 1e6:.2f} us/round)")
+    print(f"legacy : {len(legacy_cases) / legacy * 60 / 1e6:6.2f} M rounds/min "
+          f"({legacy / len(legacy_cases) * 1e6:.2f} us/round, Player setup excluded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Headless Mind Scale simulator: plays whole games between bot strategies on
+MindScaleGame/Player with the same rules as the live bot (score_round plus
+the timeout penalty from start_round), no Telegram involved. Games are
+spread over a process pool. Reports games/s, the rounds-per-game
+distribution and how often each special rule fires.
+
+Strategies: random (uniform 0-100), levelk (k rounds of 80%-of-the-mean
+reasoning from 50, k = 0..3 per player, plus noise), copycat (repeats last
+round's closest pick). --strategies mixed seats a random mix per game.
+
+    python benchmarks/bench_simulator.py --games 20000 --strategies mixed --workers 4
+    python benchmarks/bench_simulator.py --games 5000 --strategies levelk copycat --miss-rate 0.02
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from config import MIN_PLAYERS, MAX_PLAYERS, TARGET_PERCENTAGE  # noqa: E402
+from plugins.game.core import MindScaleGame, Player  # noqa: E402
+from plugins.game.scoring import score_round, RULE_ZERO_VS_HUNDRED, RULE_EXACT_TARGET  # noqa: E402
+
+STRATEGIES = ("random", "levelk", "copycat")
+
+
+def clamp(v):
+    return max(0, min(100, v))
+
+
+def pick_random(rng, seat, last):
+    return rng.randrange(101)
+
+
+def pick_levelk(rng, seat, last):
+    # level 0 expects the room at 50 (or at last round's target); level k
+    # shades that k times by TARGET_PERCENTAGE
+    guess = 50 if last is None else last[0]
+    return clamp(round(guess * TARGET_PERCENTAGE ** seat["k"] + rng.gauss(0, 3)))
+
+
+def pick_copycat(rng, seat, last):
+    return rng.randrange(101) if last is None or last[1] is None else last[1]
+
+
+PICKERS = {"random": pick_random, "levelk": pick_levelk, "copycat": pick_copycat}
+
+
+def play_game(rng, strategies, miss_rate, max_rounds, stats):
+    """Play one game to the end; returns the number of rounds scored."""
+    game = MindScaleGame(0)
+    seats = {}
+    for uid in range(1, rng.randint(MIN_PLAYERS, MAX_PLAYERS) + 1):
+        game.players[uid] = Player(uid, f"P{uid}")
+        name = rng.choice(strategies)
+        seats[uid] = {"pick": PICKERS[name], "k": rng.randint(0, 3)}
+    players = list(game.players.values())
+    last = None   # (target, winning pick) of the previous round
+
+    while game.round_number < max_rounds:
+        if not game.active_players:
+            stats["end_no_players"] += 1
+            return game.round_number
+        game.round_number += 1
+        game.reset_round_picks()
+        for p in game.active_players:
+            if rng.random() < miss_rate:
+                # handle_miss: first miss costs 2 and skips the pick, second eliminates
+                stats["timeouts"] += 1
+                if p.timeout_count == 0:
+                    p.score -= 2
+                    p.total_penalties += 1
+                    p.timeout_count = 1
+                    p.current_number = "Skipped"
+                else:
+                    p.eliminated = True
+                    stats["timeout_eliminations"] += 1
+                continue
+            p.current_number = seats[p.user_id]["pick"](rng, seats[p.user_id], last)
+
+        outcome = score_round(
+            [p.current_number for p in players],
+            [p.score for p in players],
+            [p.eliminated for p in players],
+            game.duplicate_rule_sticky,
+            [p.timeout_penalty_applied for p in players],
+        )
+        if outcome.target is None:
+            stats["end_no_picks"] += 1
+            return game.round_number
+        stats["rounds"] += 1
+        if outcome.rule == RULE_ZERO_VS_HUNDRED:
+            stats["zero_vs_hundred"] += 1
+        elif outcome.rule == RULE_EXACT_TARGET:
+            stats["exact_target"] += 1
+        if outcome.duplicates_active:
+            stats["duplicate_penalty"] += 1
+            stats["duplicate_players"] += len(outcome.duplicates)
+        if outcome.sticky_triggered:
+            stats["sticky_triggered"] += 1
+        if game.duplicate_rule_sticky:
+            stats["sticky_rounds"] += 1
+        stats["eliminations"] += len(outcome.eliminated)
+
+        for p, delta in zip(players, outcome.deltas):
+            p.score += delta
+            p.total_penalties -= delta
+        for i in outcome.eliminated:
+            players[i].eliminated = True
+        win = players[outcome.winners[0]].current_number if outcome.winners else None
+        last = (outcome.target, win)
+
+        if outcome.alive_after <= 1:
+            return game.round_number
+        game.duplicate_rule_sticky = outcome.sticky
+
+    stats["end_capped"] += 1
+    return game.round_number
+
+
+def run_batch(seed, games, strategies, miss_rate, max_rounds):
+    rng = random.Random(seed)
+    stats, lengths = Counter(), Counter()
+    for _ in range(games):
+        lengths[play_game(rng, strategies, miss_rate, max_rounds, stats)] += 1
+    return stats, lengths
+
+
+def percentile(lengths, q):
+    total = sum(lengths.values())
+    seen = 0
+    for rounds in sorted(lengths):
+        seen += lengths[rounds]
+        if seen >= total * q:
+            return rounds
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=20_000)
+    ap.add_argument("--strategies", nargs="+", default=["mixed"], choices=STRATEGIES + ("mixed",))
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--batch", type=int, default=500, help="games per pool task")
+    ap.add_argument("--miss-rate", type=float, default=0.0, help="chance a player times out on a round")
+    ap.add_argument("--max-rounds", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    strategies = STRATEGIES if "mixed" in args.strategies else tuple(args.strategies)
+
+    sizes = [args.batch] * (args.games // args.batch)
+    if args.games % args.batch:
+        sizes.append(args.games % args.batch)
+    stats, lengths = Counter(), Counter()
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_batch, args.seed * 1_000_003 + i, n, strategies, args.miss_rate, args.max_rounds)
+                   for i, n in enumerate(sizes)]
+        for f in futures:
+            s, l = f.result()
+            stats.update(s)
+            lengths.update(l)
+    elapsed = time.perf_counter() - t0
+
+    games, rounds = sum(lengths.values()), stats["rounds"]
+    print(f"{games} games, {rounds} rounds, strategies {'/'.join(strategies)}, "
+          f"miss rate {args.miss_rate:.0%}, {args.workers} workers")
+    print(f"throughput : {games / elapsed:,.0f} games/s, {rounds / elapsed:,.0f} rounds/s ({elapsed:.2f}s)")
+    print(f"rounds/game: mean {sum(r * n for r, n in lengths.items()) / games:.1f} | "
+          f"min {min(lengths)} p50 {percentile(lengths, .5)} p90 {percentile(lengths, .9)} "
+          f"p99 {percentile(lengths, .99)} max {max(lengths)}")
+    width = max(1, max(lengths) // 20 + 1)
+    buckets = Counter((r // width) * width for r in lengths.elements())
+    top = max(buckets.values())
+    for lo in sorted(buckets):
+        print(f"  {lo:4d}-{lo + width - 1:<4d} {buckets[lo]:7d} {'#' * max(1, buckets[lo] * 40 // top)}")
+    per_round = lambda k: f"{stats[k]:8d}  ({stats[k] / max(1, rounds):6.2%} of rounds)"  # noqa: E731
+    print("special rules:")
+    print(f"  0 vs 100          {per_round('zero_vs_hundred')}")
+    print(f"  exact target      {per_round('exact_target')}")
+    print(f"  duplicate penalty {per_round('duplicate_penalty')}, {stats['duplicate_players']} players penalised")
+    print(f"  sticky triggered  {per_round('sticky_triggered')}")
+    print(f"  sticky active     {per_round('sticky_rounds')}")
+    print(f"  timeouts          {stats['timeouts']:8d}  ({stats['timeout_eliminations']} eliminations)")
+    print(f"endings: last player standing {games - stats['end_no_picks'] - stats['end_no_players'] - stats['end_capped']}, "
+          f"no valid picks {stats['end_no_picks']}, no players {stats['end_no_players']}, "
+          f"capped at {args.max_rounds} rounds {stats['end_capped']}")
+
+
+if __name__ == "__main__":
+    main()
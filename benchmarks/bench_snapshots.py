@@ -0,0 +1,143 @@
+"""
+Benchmark: game checkpoints (plugins/game/snapshots.py). Measures what a
+pick pays (`checkpoints.mark`), how long a flush of N mid-round games takes
+on the loop and on the writer thread, and the row size. It then simulates a
+crash: clears the registries, runs `resume_games` and checks every game
+came back with its scores, picks and re-armed pick timers.
+
+    python benchmarks/bench_snapshots.py --games 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.pool import init_pool, close_pool, db_read  # noqa: E402
+from plugins.connections.worker import shutdown_workers  # noqa: E402
+from plugins.game import core, recovery  # noqa: E402
+from plugins.game.history import RoundRecord, pack_entries  # noqa: E402
+from plugins.game.snapshots import pack_game  # noqa: E402
+from plugins.utils import outbound  # noqa: E402
+from plugins.utils.outbound import OutboundScheduler  # noqa: E402
+
+
+class FakeBot:
+    username = "bench_bot"
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent += 1
+        return SimpleNamespace(message_id=self.sent)
+
+
+async def noop():
+    pass
+
+
+def new_game(gid, rng):
+    game = core.MindScaleGame(gid)
+    game.join_phase_active = False
+    game.current_round_active = True
+    game.round_number = rng.randint(1, 15)
+    game.duplicate_rule_sticky = rng.random() < 0.2
+    for i in range(7):
+        uid = gid * -10 + i
+        game.add_player(SimpleNamespace(id=uid, full_name=f"Plåyer {i} 🎲", username=None if i % 2 else f"p{uid}"))
+    for i, p in enumerate(game.players.values()):
+        p.score = -rng.randint(0, 9)
+        p.eliminated = i > 0 and rng.random() < 0.15
+        game.round_start_scores[p.user_id] = p.score
+        if not p.eliminated:
+            # the first player is always still thinking, so every game resumes mid-round
+            if i > 0 and rng.random() < 0.5:
+                p.current_number = rng.randrange(101)
+            else:
+                game.timers.schedule(p.user_id, "timeout", rng.uniform(5, 120), noop)
+    game.score_history = [RoundRecord(r, "2026-10-17 12:00:00", 33.6,
+                                      pack_entries((p.user_id, 40, -1, p.score, 0) for p in game.players.values()))
+                          for r in range(1, game.round_number)]
+    core.active_games[gid] = game
+    return game
+
+
+def state(game):
+    return (game.round_number, game.duplicate_rule_sticky, game.score_history,
+            [(p.user_id, p.name, p.username, p.score, p.current_number, p.eliminated)
+             for p in game.players.values()])
+
+
+async def run(args):
+    outbound.outbox = OutboundScheduler()
+    rng = random.Random(25)
+    games = [new_game(-(1000 + g), rng) for g in range(args.games)]
+    before = {g.group_id: state(g) for g in games}
+    pending = sum(g.timers.pending("timeout") for g in games)
+    cp = core.checkpoints
+
+    t0 = time.perf_counter()
+    for _ in range(args.marks // len(games)):
+        for g in games:
+            cp.mark(g.group_id)
+    mark_ns = (time.perf_counter() - t0) / (args.marks // len(games) * len(games)) * 1e9
+
+    t0 = time.perf_counter()
+    rows = await cp.flush(everything=True)
+    flush = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for g in games:
+        pack_game(g)
+    loop_time = time.perf_counter() - t0
+
+    with db_read() as conn:
+        size = conn.execute("SELECT SUM(LENGTH(players) + LENGTH(names) + LENGTH(rounds) + 40) FROM game_snapshots").fetchone()[0]
+
+    # crash: nothing survives but the database
+    for g in games:
+        g.timers.cancel_all()
+    core.active_games.clear()
+    core.user_active_game.clear()
+    bot = FakeBot()
+    app = SimpleNamespace(context_types=SimpleNamespace(context=lambda app: SimpleNamespace(bot=bot)))
+    t0 = time.perf_counter()
+    resumed = await recovery.resume_games(app)
+    resume = time.perf_counter() - t0
+
+    mismatches = sum(state(core.active_games[gid]) != s for gid, s in before.items())
+    rearmed = sum(g.timers.pending("timeout") for g in core.active_games.values())
+    for g in core.active_games.values():
+        g.timers.cancel_all()
+
+    print(f"{args.games} mid-round games, 7 players each")
+    print(f"mark() on the pick path : {mark_ns:6.0f} ns")
+    print(f"flush                   : {rows} rows in {flush * 1e3:6.1f} ms "
+          f"(serializing on the loop {loop_time * 1e3:5.1f} ms, {loop_time / len(games) * 1e6:.1f} us/game)")
+    print(f"row size                : {size / len(games):6.0f} bytes/game")
+    print(f"resume after crash      : {resumed} games in {resume * 1e3:6.1f} ms, {mismatches} mismatches, "
+          f"{rearmed}/{pending} pick timers re-armed")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=1000)
+    ap.add_argument("--marks", type=int, default=1_000_000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        init_pool(os.path.join(tmp, "snap.db"))
+        init_db()
+        asyncio.run(run(args))
+        shutdown_workers()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
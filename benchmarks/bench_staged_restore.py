@@ -0,0 +1,102 @@
+"""
+Benchmark: staged restore while games keep writing and handlers keep
+reading. Reports the staging time, the writer pause at the swap, the worst
+write/read latency around it and any errors seen by the load.
+
+    python benchmarks/bench_staged_restore.py --users 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plugins.game  # noqa: E402,F401  (import order avoids the helpers<->game cycle)
+from plugins.connections.pool import init_pool, close_pool, db_read, db_write  # noqa: E402
+from plugins.connections.db import init_db  # noqa: E402
+from plugins.connections.worker import run_read, run_write, shutdown_workers  # noqa: E402
+from plugins.connections.online_backup import backup_database  # noqa: E402
+from plugins.connections.restore import restore_from_file  # noqa: E402
+from plugins.connections.ranking import get_rank_index  # noqa: E402
+
+
+def populate(n, marker):
+    with db_write() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, first_name, wins, total_score) VALUES (?, ?, ?, ?)",
+            ((uid, marker, uid % 50, uid % 97) for uid in range(1, n + 1)),
+        )
+
+
+def one_write(uid):
+    with db_write() as conn:
+        conn.execute("UPDATE users SET games_played = games_played + 1 WHERE user_id = ?", (uid,))
+
+
+def one_read(uid):
+    with db_read() as conn:
+        return conn.execute("SELECT first_name FROM users WHERE user_id = ?", (uid,)).fetchone()[0]
+
+
+async def run(src, users):
+    done = asyncio.Event()
+    writes, reads, errors = [], [], []
+
+    async def load(fn, samples):
+        uid = 0
+        while not done.is_set():
+            uid = uid % users + 1
+            t0 = time.perf_counter()
+            try:
+                await (run_write(fn, uid) if fn is one_write else run_read(fn, uid))
+            except Exception as e:
+                errors.append(repr(e))
+            samples.append((time.perf_counter() - t0) * 1e3)
+            await asyncio.sleep(0.002)
+
+    async def restore():
+        await asyncio.sleep(0.2)
+        t0 = time.perf_counter()
+        try:
+            return await restore_from_file(src), time.perf_counter() - t0
+        finally:
+            await asyncio.sleep(0.2)
+            done.set()
+
+    (info, total), *_ = await asyncio.gather(restore(), load(one_write, writes), load(one_read, reads))
+    return info, total, writes, reads, errors
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=300_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # the backup to restore: same users, different marker
+        init_pool(os.path.join(tmp, "old.db"))
+        init_db()
+        populate(args.users, "restored")
+        src = backup_database(os.path.join(tmp, "backup.db"))["path"]
+
+        init_pool(os.path.join(tmp, "live.db"))
+        init_db()
+        populate(args.users, "live")
+        get_rank_index()
+
+        info, total, writes, reads, errors = asyncio.run(run(src, args.users))
+        marker = one_read(1)
+        print(f"restore: total {total:.2f}s, writers paused {info['pause_ms']:.1f} ms, "
+              f"schema v{info['from_version']} -> v{info['to_version']}")
+        print(f"writes: {len(writes)} max {max(writes):7.1f} ms | reads: {len(reads)} max {max(reads):7.1f} ms")
+        print(f"errors during restore: {len(errors)} {errors[:3]}")
+        print(f"live DB now serves the backup: {marker == 'restored'} ({len(get_rank_index())} ranked users)")
+        shutdown_workers()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Local stand-in for the Telegram Bot API, for load tests. PTB talks to it
+through `base_url`:
+
+    ApplicationBuilder().token("123456:LOAD").base_url("http://127.0.0.1:8081/bot")
+
+Every method answers {"ok": true, ...} after an optional --rtt delay, send*/
+edit* return a plausible Message, and getUpdates long-polls a queue that
+tests fill with `push_*` (group commands, DMs, button presses). `on_call`
+sees every request, so a driver can react to what the bot sends.
+
+Standalone (e.g. to point a dev bot at it and watch the calls):
+
+    python benchmarks/fake_bot_api.py --port 8081 --rtt 50 --verbose
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Callable, Optional
+from urllib.parse import parse_qsl
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Mind Scale", "username": "load_test_bot"}
+# sent as plain strings by PTB; everything else is JSON encoded
+RAW_FIELDS = {"text", "caption", "parse_mode", "photo", "video", "url", "callback_query_id", "data"}
+
+
+def user(uid: int) -> dict:
+    return {"id": uid, "is_bot": False, "first_name": f"P{uid}"}
+
+
+def chat(chat_id: int, title: Optional[str] = None) -> dict:
+    if chat_id > 0:
+        return {"id": chat_id, "type": "private", "first_name": f"P{chat_id}"}
+    return {"id": chat_id, "type": "supergroup", "title": title or f"Load {chat_id}"}
+
+
+class FakeBotAPI:
+    """Minimal HTTP/1.1 Bot API server on asyncio streams (keep-alive, form or JSON bodies)."""
+
+    def __init__(self, rtt: float = 0.0, on_call: Optional[Callable[[str, dict], None]] = None):
+        self.rtt = rtt
+        self.on_call = on_call
+        self.calls = Counter()
+        self._server = None
+        self._updates: list = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._has_updates = asyncio.Event()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._serve, host, port, backlog=4096)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---------------- updates fed to getUpdates ----------------
+
+    def push(self, update: dict):
+        update["update_id"] = next(self._update_ids)
+        self._updates.append(update)
+        self._has_updates.set()
+
+    def message(self, chat_id: int, from_id: int, text: str) -> dict:
+        msg = {"message_id": next(self._message_ids), "date": int(time.time()),
+               "chat": chat(chat_id), "from": user(from_id), "text": text}
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return msg
+
+    def push_text(self, chat_id: int, from_id: int, text: str):
+        self.push({"message": self.message(chat_id, from_id, text)})
+
+    def push_callback(self, chat_id: int, from_id: int, data: str, message_id: int = 1):
+        msg = {"message_id": message_id, "date": int(time.time()), "chat": chat(chat_id), "from": BOT_USER}
+        self.push({"callback_query": {"id": str(next(self._message_ids)), "from": user(from_id),
+                                      "chat_instance": str(chat_id), "data": data, "message": msg}})
+
+    async def _get_updates(self, params: dict):
+        offset = int(params.get("offset") or 0)
+        if offset:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:int(params.get("limit") or 100)]
+
+    # ---------------- Bot API methods ----------------
+
+    def _sent(self, params: dict, **extra) -> dict:
+        chat_id = int(params.get("chat_id", 0))
+        msg = {"message_id": int(params.get("message_id") or next(self._message_ids)),
+               "date": int(time.time()), "chat": chat(chat_id), "from": BOT_USER}
+        for key in ("text", "caption"):
+            if key in params:
+                msg[key] = params[key]
+        msg.update(extra)
+        return msg
+
+    async def _result(self, method: str, params: dict):
+        if method == "getupdates":
+            return await self._get_updates(params)
+        if method == "getme":
+            return BOT_USER
+        if method.startswith("send") or method in ("forwardmessage", "copymessage"):
+            return self._sent(params)
+        if method.startswith("edit"):
+            return self._sent(params) if "chat_id" in params else True
+        if method == "getchat":
+            chat_id = int(params["chat_id"])
+            return dict(chat(chat_id), accent_color_id=0, max_reaction_count=11)
+        if method == "exportchatinvitelink":
+            return f"https://t.me/+load{abs(int(params['chat_id']))}"
+        if method == "getchatmember":
+            return {"status": "administrator", "user": user(int(params["user_id"])),
+                    "can_be_edited": False, "is_anonymous": False, "can_manage_chat": True,
+                    "can_delete_messages": True, "can_manage_video_chats": True,
+                    "can_restrict_members": True, "can_promote_members": False,
+                    "can_change_info": True, "can_invite_users": True, "can_post_stories": False,
+                    "can_edit_stories": False, "can_delete_stories": False}
+        return True
+
+    # ---------------- HTTP ----------------
+
+    @staticmethod
+    def _params(headers: dict, body: bytes) -> dict:
+        kind = headers.get("content-type", "")
+        if not body:
+            return {}
+        if kind.startswith("application/json"):
+            return json.loads(body)
+        if kind.startswith("multipart/"):
+            return {}   # uploads: the tests only send file ids and URLs
+        params = {}
+        for key, value in parse_qsl(body.decode(), keep_blank_values=True):
+            if key not in RAW_FIELDS:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            params[key] = value
+        return params
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                path = lines[0].split(" ")[1]
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                method = path.rsplit("/", 1)[-1]
+                params = self._params(headers, body)
+                self.calls[method] += 1
+                if self.on_call is not None:
+                    self.on_call(method, params)
+                if self.rtt and method != "getUpdates":
+                    await asyncio.sleep(self.rtt)
+                payload = json.dumps({"ok": True, "result": await self._result(method.lower(), params)}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(payload), payload))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass    # client went away, or the server is shutting down
+        finally:
+            writer.close()
+
+
+async def _main(args):
+    def show(method, params):
+        if args.verbose and method != "getUpdates":
+            print(method, {k: v for k, v in params.items() if k != "reply_markup"})
+
+    api = FakeBotAPI(args.rtt / 1000, show)
+    port = await api.start(args.host, args.port)
+    print(f"fake Bot API on http://{args.host}:{port}/bot<token>/<method>")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(dict(api.calls))
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8081)
+    ap.add_argument("--rtt", type=float, default=0.0, help="added latency per call, ms")
+    ap.add_argument("--verbose", action="store_true")
+    try:
+        asyncio.run(_main(ap.parse_args()))
+    except KeyboardInterrupt:
+        pass
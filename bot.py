@@ -1,18 +1,53 @@
 from telegram.ext import ApplicationBuilder
-from config import BOT_TOKEN
+from config import BOT_TOKEN, UPDATE_CONCURRENCY, WRITE_BEHIND_FLUSH_SEC
 from plugins.connections.logger import setup_logger
 from plugins.connections.db import init_db
+from plugins.connections.pool import close_pool
+from plugins.connections.ranking import get_rank_index
+from plugins.connections.worker import shutdown_workers
+from plugins.connections.writebehind import flush_users, flush_users_job
 from plugins.utils.cleanup import clean_temp_job
+from plugins.utils.chatmeta import chatmeta_handlers
 from datetime import timedelta
 
 
 logger = setup_logger("mind-scale-bot")
 
+
+async def on_startup(app):
+    try:
+        from plugins.game import resume_games
+        await resume_games(app)
+    except Exception:
+        logger.exception("Failed to resume games")
+
+
+async def on_shutdown(app):
+    # checkpoint running games while the DB writer is still up
+    try:
+        from plugins.game import flush_checkpoints
+        await flush_checkpoints()
+    except Exception:
+        logger.exception("Failed to checkpoint games")
+    shutdown_workers()
+    flush_users()
+    close_pool()
+
+
 if __name__ == "__main__":
     # Init DB
     init_db()
+    get_rank_index()
+
+    app = (
+        ApplicationBuilder().token(BOT_TOKEN)
+        .concurrent_updates(UPDATE_CONCURRENCY)
+        .post_init(on_startup).post_shutdown(on_shutdown)
+        .build()
+    )
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    # chat titles/usernames/links shared by every plugin, fed from incoming updates
+    chatmeta_handlers(app)
 
     try:
         from plugins.game import game_handlers
@@ -32,5 +67,12 @@ if __name__ == "__main__":
         first=300           
     )
 
+    app.job_queue.run_repeating(
+        flush_users_job,
+        interval=WRITE_BEHIND_FLUSH_SEC,
+        first=WRITE_BEHIND_FLUSH_SEC,
+        name="flush_users_job",
+    )
+
     print("✅ Bot is running...")
     app.run_polling()
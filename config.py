@@ -6,6 +6,13 @@ OWNER_ID = 7995262033
 
 DB_PATH = "mindscale.db"
 
+# SQLite connection layer
+DB_READ_POOL_SIZE = 4
+DB_CACHE_SIZE_KB = 16384      # page cache per connection
+DB_MMAP_SIZE_MB = 64
+DB_BUSY_TIMEOUT_MS = 10000
+DB_SIZE_BUDGET_MB = 500       # storage quota shown in /stats
+
 MIN_PLAYERS = 5
 MAX_PLAYERS = 7
 PICK_TIME_SEC = 120
@@ -24,4 +31,64 @@ VIDEO_ROUND_ANNOUNCE = "BAACAgUAAyEFAAS3OY5mAAIH_WjcAQai-HhFDKRdLmAMLxBm27m3AAJV
 VIDEO_ELIMINATION = "BAACAgUAAyEFAAS3OY5mAAIG_GjcAQWFyh2q8_qgBCE1qFRiIlLxAAJpHgAC00rhVgreiWfsIyY_NgQ"
 VIDEO_WINNER = "BAACAgUAAyEFAAS3OY5mAAIG_mjcAQWjT5k0VtEounHroJd-hiHfAAJrHgAC00rhVrBRCwxYF9-UNgQ"
 
-BACKUP_FOLDER = "backups"
\ No newline at end of file
+BACKUP_FOLDER = "backups"
+
+# Write-behind buffer for /start and /join profile touches
+WRITE_BEHIND_FLUSH_SEC = 5
+WRITE_BEHIND_MAX_PENDING = 200
+
+# Online backups: pages copied per backup step and pause between steps
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP_MS = 5
+
+# Backup artifacts: compressed ("gzip" or "lzma") and split into chunks small
+# enough for the Bot API (uploads up to 50 MB, but bots only download 20 MB)
+BACKUP_CODEC = "gzip"
+BACKUP_CHUNK_MB = 19
+# newest auto backup kept per hour / day / ISO week, for this many slots
+BACKUP_RETENTION = {"hourly": 24, "daily": 7, "weekly": 4}
+
+# Database maintenance (checkpoint, incremental vacuum, optimize, analyze)
+MAINTENANCE_INTERVAL_MIN = 60
+MAINTENANCE_BUDGET_SEC = 5
+MAINTENANCE_QUIET_MINUTES = 15       # low traffic = at most N games ended in this window
+MAINTENANCE_MAX_RECENT_GAMES = 1
+MAINTENANCE_VACUUM_STEP_PAGES = 256
+MAINTENANCE_CONVERT_MAX_MB = 200     # largest DB converted to auto_vacuum=INCREMENTAL with a full VACUUM
+MAINTENANCE_CONVERT_MB_PER_SEC = 20  # conservative full-VACUUM throughput, to fit it in the budget
+
+# Cold games (and their round history) move to monthly archive DBs
+ARCHIVE_FOLDER = "archives"
+ARCHIVE_HORIZON_DAYS = 180
+ARCHIVE_BATCH = 2000
+
+# Cached chat metadata (titles, usernames, invite links) refreshed from updates
+CHAT_META_TTL_SEC = 6 * 3600
+CHAT_META_MISS_TTL_SEC = 300         # back-off after a failed get_chat
+
+# Outbound message scheduler (Telegram limits: ~30 msg/s overall, about
+# 20 msg/min in a group, about 1 msg/s in a private chat)
+OUTBOUND_GLOBAL_RATE = 30
+OUTBOUND_GROUP_RATE = 20 / 60
+OUTBOUND_GROUP_BURST = 20
+OUTBOUND_PRIVATE_RATE = 1
+OUTBOUND_PRIVATE_BURST = 3
+OUTBOUND_MAX_RETRIES = 5
+# Bulk traffic (/cast, new-game notify) only gets global tokens while more
+# than this many are left for gameplay, with at most WINDOW sends queued
+OUTBOUND_BULK_RESERVE = 10
+OUTBOUND_BULK_WINDOW = 100
+
+# Updates handled at once; sends wait in the outbox, so one throttled chat
+# must not hold up every other game's handlers
+UPDATE_CONCURRENCY = 64
+
+# Round-start DMs in flight at once per game
+ROUND_DM_CONCURRENCY = 10
+
+# Checkpoints of running games, restored on boot: picks and round results
+# are written within DEBOUNCE seconds, every game again each INTERVAL
+SNAPSHOT_DEBOUNCE_SEC = 1
+SNAPSHOT_INTERVAL_SEC = 30
+SNAPSHOT_MAX_AGE_SEC = 6 * 3600      # older checkpoints are dropped, not resumed
+SNAPSHOT_RESUME_GRACE_SEC = 30       # least pick time left to a player after a restart
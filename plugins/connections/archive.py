@@ -0,0 +1,145 @@
+# plugins/connections/archive.py
+import os
+import re
+import logging
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from config import ARCHIVE_FOLDER, ARCHIVE_HORIZON_DAYS, ARCHIVE_BATCH
+from plugins.connections.pool import db_read, db_write
+from plugins.connections.counters import bump
+
+logger = logging.getLogger(__name__)
+
+# Cold `games` rows (and their round history) move into one file per month:
+# archives/games_YYYY_MM.db, keyed by the month the game ended in. Aggregates
+# (users, groups, user_group_stats, rollups, bot_counters) stay in the main DB.
+ALIAS = "arch"
+_FILE = re.compile(r"^games_(\d{4})_(\d{2})\.db$")
+
+_ARCHIVE_SCHEMA = (
+    f"""CREATE TABLE IF NOT EXISTS {ALIAS}.games (
+        id       INTEGER PRIMARY KEY,
+        group_id INTEGER NOT NULL,
+        ended_at TEXT    NOT NULL
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {ALIAS}.idx_games_ended_at ON games(ended_at)",
+    f"CREATE INDEX IF NOT EXISTS {ALIAS}.idx_games_group ON games(group_id, ended_at)",
+    f"""CREATE TABLE IF NOT EXISTS {ALIAS}.game_rounds (
+        game_id   INTEGER NOT NULL,
+        round_no  INTEGER NOT NULL,
+        group_id  INTEGER NOT NULL,
+        played_at TEXT    NOT NULL,
+        target    REAL    NOT NULL,
+        data      BLOB    NOT NULL,
+        PRIMARY KEY (game_id, round_no)
+    ) WITHOUT ROWID""",
+    f"CREATE INDEX IF NOT EXISTS {ALIAS}.idx_rounds_group ON game_rounds(group_id, played_at)",
+    f"CREATE INDEX IF NOT EXISTS {ALIAS}.idx_rounds_time ON game_rounds(played_at)",
+    f"""CREATE TABLE IF NOT EXISTS {ALIAS}.game_players (
+        user_id INTEGER NOT NULL,
+        game_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, game_id)
+    ) WITHOUT ROWID""",
+)
+
+
+def archive_path(month: str, folder: str = ARCHIVE_FOLDER) -> str:
+    """`month` is 'YYYY-MM'."""
+    return os.path.join(folder, f"games_{month[:4]}_{month[5:7]}.db")
+
+
+def archive_files(since: str | None = None, until: str | None = None,
+                  folder: str = ARCHIVE_FOLDER) -> list[tuple[str, str]]:
+    """(month, path) of the archives overlapping [since, until), oldest first."""
+    if not os.path.isdir(folder):
+        return []
+    out = []
+    for name in os.listdir(folder):
+        m = _FILE.match(name)
+        if not m:
+            continue
+        month = f"{m.group(1)}-{m.group(2)}"
+        if since and month < since[:7]:
+            continue
+        if until and month > until[:7]:
+            continue
+        out.append((month, os.path.join(folder, name)))
+    return sorted(out)
+
+
+@contextmanager
+def attached(conn, path: str):
+    """Attach an archive file to `conn` as `arch` for the duration of the block."""
+    conn.execute(f"ATTACH DATABASE ? AS {ALIAS}", (path,))
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"DETACH DATABASE {ALIAS}")
+
+
+def _archive_batch(path: str, month: str, batch: int) -> int:
+    """Move up to `batch` games of `month` (with their rounds) into `path`."""
+    with db_write() as conn:
+        with attached(conn, path):
+            for ddl in _ARCHIVE_SCHEMA:
+                conn.execute(ddl)
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM games WHERE ended_at >= ? AND ended_at < ? ORDER BY id LIMIT ?",
+                (f"{month}-01", _next_month(month) + "-01", batch),
+            )]
+            if not ids:
+                return 0
+            marks = ",".join("?" * len(ids))
+            # INSERT OR IGNORE keeps a re-run after a crash between the two
+            # files' commits idempotent (attached WAL DBs don't commit atomically)
+            conn.execute(f"INSERT OR IGNORE INTO {ALIAS}.games SELECT id, group_id, ended_at FROM games WHERE id IN ({marks})", ids)
+            conn.execute(f"INSERT OR IGNORE INTO {ALIAS}.game_rounds SELECT * FROM game_rounds WHERE game_id IN ({marks})", ids)
+            conn.execute(f"INSERT OR IGNORE INTO {ALIAS}.game_players SELECT * FROM game_players WHERE game_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM game_rounds WHERE game_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM game_players WHERE game_id IN ({marks})", ids)
+            moved = conn.execute(f"DELETE FROM games WHERE id IN ({marks})", ids).rowcount
+            bump(conn, archived_games=moved)
+            conn.commit()
+    return moved
+
+
+def _next_month(month: str) -> str:
+    y, m = int(month[:4]), int(month[5:7])
+    return f"{y + m // 12:04d}-{m % 12 + 1:02d}"
+
+
+def archive_old_games(horizon_days: int = ARCHIVE_HORIZON_DAYS, batch: int = ARCHIVE_BATCH,
+                      now: datetime | None = None) -> dict:
+    """
+    Move every whole month of games that ended before the horizon into its
+    archive file, `batch` games per writer transaction. Returns {month: moved}.
+    """
+    now = now or datetime.utcnow()
+    cutoff = (now - timedelta(days=horizon_days)).strftime("%Y-%m") + "-01"
+    with db_read() as conn:
+        months = [r[0] for r in conn.execute(
+            "SELECT DISTINCT substr(ended_at, 1, 7) FROM games WHERE ended_at < ? ORDER BY 1", (cutoff,)
+        )]
+    os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
+    moved = {}
+    for month in months:
+        path = archive_path(month)
+        total = 0
+        while n := _archive_batch(path, month, batch):
+            total += n
+        moved[month] = total
+        logger.info("Archived %d games from %s into %s", total, month, path)
+    return moved
+
+
+async def archive_job(context):
+    """JobQueue callback: archive cold games off the event loop."""
+    try:
+        moved = await asyncio.to_thread(archive_old_games)
+        if moved:
+            logger.info("Archived games per month: %s", moved)
+    except Exception:
+        logger.exception("Failed to archive old games")
@@ -0,0 +1,246 @@
+# plugins/connections/artifacts.py
+import os
+import re
+import json
+import lzma
+import zlib
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from config import BACKUP_CODEC, BACKUP_CHUNK_MB, BACKUP_RETENTION
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".manifest.json"
+CODEC_SUFFIX = {"gzip": ".gz", "lzma": ".xz"}
+
+_READ_BLOCK = 1024 * 1024
+_NAME_TS = re.compile(r"_(\d{8}_\d{6})$")
+
+
+def _compressor(codec: str):
+    if codec == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)      # wbits 31 = gzip container
+    if codec == "lzma":
+        return lzma.LZMACompressor(preset=3)
+    raise ValueError(f"Unknown backup codec: {codec}")
+
+
+def _decompressor(codec: str):
+    if codec == "gzip":
+        return zlib.decompressobj(31)
+    if codec == "lzma":
+        return lzma.LZMADecompressor()
+    raise ValueError(f"Unknown backup codec: {codec}")
+
+
+class _ChunkWriter:
+    """File-like sink that rolls over to a new numbered chunk every `limit` bytes."""
+
+    def __init__(self, base: str, limit: int):
+        self.base = base
+        self.limit = max(1, limit)
+        self.chunks: list[dict] = []
+        self._f = None
+        self._hash = None
+        self._size = 0
+
+    def _open(self):
+        path = f"{self.base}.{len(self.chunks) + 1:03d}"
+        self._f = open(path, "wb")
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self.chunks.append({"file": os.path.basename(path)})
+
+    def _close(self):
+        if self._f is not None:
+            self._f.close()
+            self.chunks[-1].update(bytes=self._size, sha256=self._hash.hexdigest())
+            self._f = None
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            if self._f is None:
+                self._open()
+            n = min(len(view), self.limit - self._size)
+            self._f.write(view[:n])
+            self._hash.update(view[:n])
+            self._size += n
+            view = view[n:]
+            if self._size >= self.limit:
+                self._close()
+
+    def close(self) -> list[dict]:
+        self._close()
+        return self.chunks
+
+
+def build_artifact(db_path: str, out_dir: str, name: str, codec: str = BACKUP_CODEC,
+                   chunk_mb: float = BACKUP_CHUNK_MB) -> dict:
+    """
+    Stream `db_path` through `codec` into `<name>.db<.gz|.xz>.NNN` chunks of at
+    most `chunk_mb` each and write `<name>.manifest.json` next to them.
+    Returns the manifest (with `manifest_path` added). Blocking.
+    """
+    suffix = CODEC_SUFFIX.get(codec)
+    if suffix is None:
+        raise ValueError(f"Unknown backup codec: {codec}")
+    t0 = time.perf_counter()
+    comp = _compressor(codec)
+    raw_hash = hashlib.sha256()
+    raw_bytes = 0
+    sink = _ChunkWriter(os.path.join(out_dir, f"{name}.db{suffix}"), int(chunk_mb * 2**20))
+    try:
+        with open(db_path, "rb") as f:
+            while block := f.read(_READ_BLOCK):
+                raw_hash.update(block)
+                raw_bytes += len(block)
+                sink.write(comp.compress(block))
+        sink.write(comp.flush())
+    finally:
+        chunks = sink.close()
+    elapsed = time.perf_counter() - t0
+
+    compressed = sum(c["bytes"] for c in chunks)
+    manifest = {
+        "format": 1,
+        "name": name,
+        "created_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "codec": codec,
+        "raw_bytes": raw_bytes,
+        "raw_sha256": raw_hash.hexdigest(),
+        "compressed_bytes": compressed,
+        "chunks": chunks,
+    }
+    write_manifest(manifest, os.path.join(out_dir, name + MANIFEST_SUFFIX))
+    logger.info(
+        "Backup artifact %s: %.1f MB -> %.1f MB %s (ratio %.2f) in %d chunk(s), %.1f MB/s",
+        name, raw_bytes / 2**20, compressed / 2**20, codec,
+        raw_bytes / compressed if compressed else 0.0, len(chunks),
+        raw_bytes / 2**20 / elapsed if elapsed > 0 else 0.0,
+    )
+    return manifest
+
+
+def write_manifest(manifest: dict, path: str):
+    """Write the manifest atomically; `manifest_path` records where it lives."""
+    manifest["manifest_path"] = path
+    data = {k: v for k, v in manifest.items() if k != "manifest_path"}
+    tmp = path + ".part"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def read_manifest(path: str) -> dict:
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != 1 or "chunks" not in manifest:
+        raise ValueError("Not a backup manifest")
+    manifest["manifest_path"] = path
+    return manifest
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_READ_BLOCK):
+            h.update(block)
+    return h.hexdigest()
+
+
+def reassemble(manifest: dict, chunk_dir: str, dst: str) -> str:
+    """
+    Check every chunk against the manifest, decompress them in order into
+    `dst` and verify the database checksum. Raises ValueError on any mismatch.
+    """
+    for chunk in manifest["chunks"]:
+        path = os.path.join(chunk_dir, chunk["file"])
+        if not os.path.exists(path):
+            raise ValueError(f"Missing backup chunk {chunk['file']}")
+        if os.path.getsize(path) != chunk["bytes"] or _sha256_file(path) != chunk["sha256"]:
+            raise ValueError(f"Checksum mismatch in backup chunk {chunk['file']}")
+
+    decomp = _decompressor(manifest["codec"])
+    raw_hash = hashlib.sha256()
+    tmp = dst + ".part"
+    with open(tmp, "wb") as out:
+        for chunk in manifest["chunks"]:
+            with open(os.path.join(chunk_dir, chunk["file"]), "rb") as f:
+                while block := f.read(_READ_BLOCK):
+                    data = decomp.decompress(block)
+                    raw_hash.update(data)
+                    out.write(data)
+        if manifest["codec"] == "gzip":
+            data = decomp.flush()
+            raw_hash.update(data)
+            out.write(data)
+    if raw_hash.hexdigest() != manifest["raw_sha256"]:
+        os.remove(tmp)
+        raise ValueError("Reassembled database does not match the manifest checksum")
+    os.replace(tmp, dst)
+    return dst
+
+
+def artifact_time(name: str) -> datetime | None:
+    m = _NAME_TS.search(name)
+    return datetime.strptime(m.group(1), "%Y%m%d_%H%M%S") if m else None
+
+
+def delete_artifact(manifest: dict, directory: str):
+    for chunk in manifest["chunks"]:
+        try:
+            os.remove(os.path.join(directory, chunk["file"]))
+        except FileNotFoundError:
+            pass
+    os.remove(manifest["manifest_path"])
+
+
+def select_retained(times: list[datetime], retention: dict = BACKUP_RETENTION,
+                    now: datetime | None = None) -> set[datetime]:
+    """
+    Tiered retention: the newest artifact of each of the last `hourly` hours,
+    `daily` days and `weekly` ISO weeks is kept.
+    """
+    now = now or datetime.now()
+    tiers = {
+        "hourly": (lambda t: t.strftime("%Y%m%d%H"), timedelta(hours=retention.get("hourly", 0))),
+        "daily": (lambda t: t.strftime("%Y%m%d"), timedelta(days=retention.get("daily", 0))),
+        "weekly": (lambda t: "%d-%02d" % t.isocalendar()[:2], timedelta(weeks=retention.get("weekly", 0))),
+    }
+    keep = set()
+    for slot, span in tiers.values():
+        newest = {}
+        for t in times:
+            if now - t < span:
+                key = slot(t)
+                if key not in newest or t > newest[key]:
+                    newest[key] = t
+        keep.update(newest.values())
+    if times:
+        keep.add(max(times))        # never drop the latest backup
+    return keep
+
+
+def prune_artifacts(directory: str, prefix: str, retention: dict = BACKUP_RETENTION) -> int:
+    """Apply tiered retention to the `<prefix>_*` artifacts in `directory`."""
+    manifests = {}
+    for fname in os.listdir(directory):
+        if fname.startswith(prefix + "_") and fname.endswith(MANIFEST_SUFFIX):
+            name = fname[: -len(MANIFEST_SUFFIX)]
+            t = artifact_time(name)
+            if t is not None:
+                manifests[t] = os.path.join(directory, fname)
+    keep = select_retained(list(manifests), retention)
+    removed = 0
+    for t, path in manifests.items():
+        if t in keep:
+            continue
+        try:
+            delete_artifact(read_manifest(path), directory)
+            removed += 1
+        except Exception as e:
+            logger.warning(f"Failed to delete old backup artifact {path}: {e}")
+    return removed
@@ -0,0 +1,68 @@
+# plugins/connections/counters.py
+import logging
+from plugins.connections.pool import db_read, db_write
+from plugins.connections.worker import run_write
+
+logger = logging.getLogger(__name__)
+
+# name -> SQL that recomputes it from scratch (used by the repair job)
+COUNTER_SOURCES = {
+    "users":          "SELECT COUNT(*) FROM users",
+    "groups":         "SELECT COUNT(*) FROM groups",
+    # archived games live in archives/*.db; the archiver bumps `archived_games`
+    "games":          "SELECT COUNT(*) + COALESCE((SELECT value FROM bot_counters WHERE name = 'archived_games'), 0) FROM games",
+    "games_played":   "SELECT COALESCE(SUM(games_played), 0) FROM users",
+    "wins":           "SELECT COALESCE(SUM(wins), 0) FROM users",
+    "losses":         "SELECT COALESCE(SUM(losses), 0) FROM users",
+    "penalties":      "SELECT COALESCE(SUM(penalties), 0) FROM users",
+    "total_score":    "SELECT COALESCE(SUM(total_score), 0) FROM users",
+    "inactive_users": "SELECT COUNT(*) FROM users WHERE games_played = 0",
+}
+
+
+def bump(c, **deltas):
+    """
+    Add `deltas` to bot_counters using the caller's cursor/connection, so the
+    counters commit (or roll back) with the write that changed them.
+    """
+    rows = [(name, int(delta)) for name, delta in deltas.items() if delta]
+    if rows:
+        c.executemany(
+            "INSERT INTO bot_counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = bot_counters.value + excluded.value",
+            rows,
+        )
+
+
+def read_counters(conn=None) -> dict:
+    """All counters in one small-table read; missing ones are 0."""
+    if conn is None:
+        with db_read() as conn:
+            return read_counters(conn)
+    values = dict(conn.execute("SELECT name, value FROM bot_counters").fetchall())
+    return {name: values.get(name, 0) for name in COUNTER_SOURCES}
+
+
+def rebuild_counters(c) -> dict:
+    """Recompute every counter from the base tables and store it."""
+    values = {name: c.execute(sql).fetchone()[0] for name, sql in COUNTER_SOURCES.items()}
+    c.executemany("INSERT OR REPLACE INTO bot_counters (name, value) VALUES (?, ?)", list(values.items()))
+    return values
+
+
+def repair_counters() -> dict:
+    """Rebuild the counters and return {name: (old, new)} for any that drifted."""
+    with db_write() as conn:
+        old = dict(conn.execute("SELECT name, value FROM bot_counters").fetchall())
+        new = rebuild_counters(conn)
+    return {name: (old.get(name), value) for name, value in new.items() if old.get(name) != value}
+
+
+async def repair_counters_job(context):
+    """JobQueue callback: periodic full rebuild, logging any drift."""
+    try:
+        drift = await run_write(repair_counters)
+        if drift:
+            logger.warning("bot_counters drift repaired: %s", drift)
+    except Exception:
+        logger.exception("Failed to repair bot_counters")
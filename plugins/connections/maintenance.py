@@ -0,0 +1,160 @@
+# plugins/connections/maintenance.py
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from config import (
+    MAINTENANCE_BUDGET_SEC, MAINTENANCE_QUIET_MINUTES, MAINTENANCE_MAX_RECENT_GAMES,
+    MAINTENANCE_VACUUM_STEP_PAGES, MAINTENANCE_CONVERT_MAX_MB, MAINTENANCE_CONVERT_MB_PER_SEC,
+)
+from plugins.connections.pool import get_pool, db_read, db_write
+
+logger = logging.getLogger(__name__)
+
+# Hot queries whose plans are compared before/after ANALYZE
+WATCHED_QUERIES = {
+    "leaderboard_page": "SELECT user_id FROM users WHERE (wins, total_score, user_id) < (0, 0, 0) "
+                        "ORDER BY wins DESC, total_score DESC, user_id DESC LIMIT 11",
+    "group_top": "SELECT first_name FROM user_group_stats WHERE group_id = 0 AND games_played > 0 "
+                 "ORDER BY wins DESC, total_score DESC LIMIT 3",
+    "recent_games": "SELECT COUNT(*) FROM games WHERE ended_at >= '2000-01-01'",
+    "daily_window": "SELECT SUM(games) FROM activity_daily WHERE group_id = 0 AND day BETWEEN '2000-01-01' AND '2000-01-07'",
+    "group_rounds": "SELECT data FROM game_rounds WHERE group_id = 0 AND played_at >= '2000-01-01' ORDER BY played_at",
+}
+
+
+def db_file_size(path: str | None = None) -> int:
+    """Bytes on disk for the database, its WAL and shared-memory file."""
+    path = path or get_pool().path
+    return sum(os.path.getsize(path + s) for s in ("", "-wal", "-shm") if os.path.exists(path + s))
+
+
+def is_quiet(minutes: int = MAINTENANCE_QUIET_MINUTES, max_games: int = MAINTENANCE_MAX_RECENT_GAMES) -> bool:
+    """Low traffic = at most `max_games` games ended in the last `minutes` (idx_games_ended_at)."""
+    since = (datetime.utcnow() - timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+    with db_read() as conn:
+        recent = conn.execute("SELECT COUNT(*) FROM games WHERE ended_at >= ?", (since,)).fetchone()[0]
+    return recent <= max_games
+
+
+def _pragma(conn, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def _plans(conn) -> dict:
+    plans = {}
+    for name, sql in WATCHED_QUERIES.items():
+        try:
+            plans[name] = " | ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+        except Exception as e:
+            plans[name] = f"error: {e}"
+    return plans
+
+
+def run_maintenance(budget_sec: float = MAINTENANCE_BUDGET_SEC, force: bool = False) -> dict:
+    """
+    Checkpoint, incremental vacuum, PRAGMA optimize and ANALYZE within
+    `budget_sec`. Each step takes the writer briefly, so game commits
+    interleave with it. Skipped unless traffic is low (or `force`).
+    Blocking: run it on a worker thread, not the writer executor.
+    """
+    if not force and not is_quiet():
+        logger.info("Maintenance skipped: games are being played")
+        return {"skipped": True}
+
+    t0 = time.perf_counter()
+    deadline = t0 + budget_sec
+    steps = {}
+    with db_read() as conn:
+        plans_before = _plans(conn)
+    with db_write() as conn:
+        page_size = _pragma(conn, "page_size")
+        free_before = _pragma(conn, "freelist_count")
+        auto_vacuum = _pragma(conn, "auto_vacuum")
+    size_before = db_file_size()
+
+    def step(name, fn):
+        if time.perf_counter() >= deadline:
+            steps[name] = "out of budget"
+            return
+        s = time.perf_counter()
+        try:
+            skipped = fn()
+            steps[name] = skipped or f"{(time.perf_counter() - s) * 1000:.0f} ms"
+        except Exception as e:
+            logger.exception("Maintenance step %s failed", name)
+            steps[name] = f"failed: {e}"
+
+    def checkpoint():
+        with db_write() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+    def incremental_vacuum():
+        if auto_vacuum != 2:
+            # the file predates auto_vacuum=INCREMENTAL; convert once with a
+            # full VACUUM, which holds the writer throughout, so only when
+            # the estimated time fits what is left of the budget
+            if size_before > MAINTENANCE_CONVERT_MAX_MB * 2**20:
+                return "skipped: too large to convert to auto_vacuum=INCREMENTAL"
+            estimate = size_before / 2**20 / MAINTENANCE_CONVERT_MB_PER_SEC
+            if estimate > deadline - time.perf_counter():
+                return f"skipped: conversion needs ~{estimate:.1f}s, over the remaining budget"
+            with db_write() as conn:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            return
+        while time.perf_counter() < deadline:
+            with db_write() as conn:
+                if not _pragma(conn, "freelist_count"):
+                    return
+                conn.execute(f"PRAGMA incremental_vacuum({int(MAINTENANCE_VACUUM_STEP_PAGES)})").fetchall()
+
+    def optimize():
+        with db_write() as conn:
+            conn.execute("PRAGMA optimize")
+
+    def analyze():
+        with db_write() as conn:
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("ANALYZE")
+
+    step("checkpoint", checkpoint)
+    step("incremental_vacuum", incremental_vacuum)
+    step("optimize", optimize)
+    step("analyze", analyze)
+    step("checkpoint_after", checkpoint)
+
+    with db_write() as conn:
+        free_after = _pragma(conn, "freelist_count")
+    with db_read() as conn:
+        plans_after = _plans(conn)
+    size_after = db_file_size()
+    changed = {name: (plans_before[name], plan) for name, plan in plans_after.items() if plans_before[name] != plan}
+
+    metrics = {
+        "skipped": False,
+        "elapsed_sec": time.perf_counter() - t0,
+        "steps": steps,
+        "freelist_before": free_before,
+        "freelist_after": free_after,
+        "reclaimed_bytes": max(free_before - free_after, 0) * page_size,
+        "size_before": size_before,
+        "size_after": size_after,
+        "plan_changes": changed,
+    }
+    logger.info(
+        "Maintenance done in %.2fs: freelist %d -> %d pages, size %.1f -> %.1f MB, steps %s",
+        metrics["elapsed_sec"], free_before, free_after, size_before / 2**20, size_after / 2**20, steps,
+    )
+    for name, (before, after) in changed.items():
+        logger.info("Query plan for %s changed: %s -> %s", name, before, after)
+    return metrics
+
+
+async def maintenance_job(context):
+    """JobQueue callback: periodic maintenance off the event loop."""
+    try:
+        await asyncio.to_thread(run_maintenance)
+    except Exception:
+        logger.exception("Database maintenance failed")
@@ -0,0 +1,356 @@
+# plugins/connections/migrations.py
+import sqlite3
+import logging
+from plugins.connections.pool import db_write
+from plugins.connections.counters import rebuild_counters
+
+logger = logging.getLogger(__name__)
+
+# Migrations are keyed on PRAGMA user_version. Each step runs in its own
+# transaction together with the version bump, so a crash mid-way leaves the
+# database at the previous version and the step is simply retried on boot.
+
+
+def _columns(c: sqlite3.Cursor, table: str) -> set[str]:
+    c.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in c.fetchall()}
+
+
+def _add_missing_columns(c: sqlite3.Cursor, table: str, required: dict[str, str]):
+    existing = _columns(c, table)
+    for col, col_type in required.items():
+        if col not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type}")
+
+
+def _v1_baseline(c: sqlite3.Cursor):
+    """
+    Create every table the bot uses and back-fill columns that older
+    deployments missed (the old per-module init functions disagreed on
+    which columns `users` and `groups` had).
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            first_name TEXT,
+            username TEXT,
+            games_played INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            rounds_played INTEGER DEFAULT 0,
+            eliminations INTEGER DEFAULT 0,
+            total_score INTEGER DEFAULT 0,
+            last_score INTEGER DEFAULT 0,
+            penalties INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _add_missing_columns(c, "users", {
+        "first_name": "TEXT",
+        "username": "TEXT",
+        "games_played": "INTEGER DEFAULT 0",
+        "wins": "INTEGER DEFAULT 0",
+        "losses": "INTEGER DEFAULT 0",
+        "rounds_played": "INTEGER DEFAULT 0",
+        "eliminations": "INTEGER DEFAULT 0",
+        "total_score": "INTEGER DEFAULT 0",
+        "last_score": "INTEGER DEFAULT 0",
+        "penalties": "INTEGER DEFAULT 0",
+        # ALTER TABLE cannot add a CURRENT_TIMESTAMP default
+        "created_at": "TIMESTAMP",
+        "updated_at": "TIMESTAMP",
+    })
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS groups (
+            group_id INTEGER PRIMARY KEY,
+            title TEXT,
+            invite_link TEXT,
+            added_by TEXT,
+            games_played INTEGER DEFAULT 0,
+            last_game_at TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP
+        )
+    """)
+    _add_missing_columns(c, "groups", {
+        "title": "TEXT",
+        "invite_link": "TEXT",
+        "added_by": "TEXT",
+        "games_played": "INTEGER DEFAULT 0",
+        "last_game_at": "TEXT",
+        "created_at": "TIMESTAMP",
+        "updated_at": "TIMESTAMP",
+    })
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS user_group_stats (
+            user_id       INTEGER NOT NULL,
+            group_id      INTEGER NOT NULL,
+            first_name    TEXT,
+            username      TEXT,
+            games_played  INTEGER DEFAULT 0,
+            wins          INTEGER DEFAULT 0,
+            total_score   INTEGER DEFAULT 0,
+            eliminations  INTEGER DEFAULT 0,
+            penalties     INTEGER DEFAULT 0,
+            updated_at    TEXT,
+            PRIMARY KEY (user_id, group_id)
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ugs_group_updated ON user_group_stats(group_id, updated_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ugs_group_games ON user_group_stats(group_id, games_played)")
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS games (
+            id       INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_id INTEGER NOT NULL,
+            ended_at TEXT    NOT NULL   -- UTC: 'YYYY-MM-DD HH:MM:SS'
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_games_ended_at ON games(ended_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_games_group ON games(group_id, ended_at)")
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS mods (
+            mod_id INTEGER PRIMARY KEY,
+            username TEXT,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS notify_optins (
+            group_id INTEGER NOT NULL,
+            user_id  INTEGER NOT NULL,
+            first_name TEXT,
+            PRIMARY KEY (group_id, user_id)
+        )
+    """)
+
+
+def _v2_canonical_users_groups(c: sqlite3.Cursor):
+    """
+    Rebuild `users` and `groups` with one canonical schema: integer scores
+    (older DBs stored REAL) and NOT NULL counters, so readers need no IFNULL.
+    """
+    c.execute("""
+        CREATE TABLE users_v2 (
+            user_id       INTEGER PRIMARY KEY,
+            first_name    TEXT,
+            username      TEXT,
+            games_played  INTEGER NOT NULL DEFAULT 0,
+            wins          INTEGER NOT NULL DEFAULT 0,
+            losses        INTEGER NOT NULL DEFAULT 0,
+            rounds_played INTEGER NOT NULL DEFAULT 0,
+            eliminations  INTEGER NOT NULL DEFAULT 0,
+            total_score   INTEGER NOT NULL DEFAULT 0,
+            last_score    INTEGER NOT NULL DEFAULT 0,
+            penalties     INTEGER NOT NULL DEFAULT 0,
+            created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("""
+        INSERT INTO users_v2 (user_id, first_name, username, games_played, wins, losses, rounds_played,
+                              eliminations, total_score, last_score, penalties, created_at, updated_at)
+        SELECT user_id, first_name, username,
+               COALESCE(games_played, 0), COALESCE(wins, 0), COALESCE(losses, 0),
+               COALESCE(rounds_played, 0), COALESCE(eliminations, 0),
+               CAST(ROUND(COALESCE(total_score, 0)) AS INTEGER),
+               CAST(ROUND(COALESCE(last_score, 0)) AS INTEGER),
+               COALESCE(penalties, 0), created_at, updated_at
+        FROM users
+    """)
+    c.execute("DROP TABLE users")
+    c.execute("ALTER TABLE users_v2 RENAME TO users")
+
+    c.execute("""
+        CREATE TABLE groups_v2 (
+            group_id     INTEGER PRIMARY KEY,
+            title        TEXT,
+            invite_link  TEXT,
+            added_by     TEXT,
+            games_played INTEGER NOT NULL DEFAULT 0,
+            last_game_at TEXT,
+            created_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at   TIMESTAMP
+        )
+    """)
+    c.execute("""
+        INSERT INTO groups_v2 (group_id, title, invite_link, added_by, games_played, last_game_at, created_at, updated_at)
+        SELECT group_id, title, invite_link, added_by, COALESCE(games_played, 0), last_game_at, created_at, updated_at
+        FROM groups
+    """)
+    c.execute("DROP TABLE groups")
+    c.execute("ALTER TABLE groups_v2 RENAME TO groups")
+
+
+def _v3_leaderboard_index(c: sqlite3.Cursor):
+    """Keyset pagination index for the leaderboard (scanned backwards)."""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_leaderboard ON users(wins, total_score, user_id)")
+
+
+def _v4_bot_counters(c: sqlite3.Cursor):
+    """Precomputed /stats aggregates, seeded from the current tables."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS bot_counters (
+            name  TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_groups_games ON groups(games_played)")
+    rebuild_counters(c)
+
+
+def _v5_activity_rollups(c: sqlite3.Cursor):
+    """
+    Hourly/daily activity rollups (group_id 0 = whole bot), back-filled from
+    games, user_group_stats (last game per player) and users.created_at.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS activity_hourly (
+            group_id INTEGER NOT NULL,
+            bucket   TEXT    NOT NULL,   -- UTC 'YYYY-MM-DD HH'
+            games    INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_id, bucket)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS activity_daily (
+            group_id       INTEGER NOT NULL,
+            day            TEXT    NOT NULL,   -- UTC 'YYYY-MM-DD'
+            games          INTEGER NOT NULL DEFAULT 0,
+            new_users      INTEGER NOT NULL DEFAULT 0,
+            active_players INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_id, day)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS activity_daily_players (
+            group_id INTEGER NOT NULL,
+            day      TEXT    NOT NULL,
+            user_id  INTEGER NOT NULL,
+            PRIMARY KEY (group_id, day, user_id)
+        ) WITHOUT ROWID
+    """)
+
+    for scope in ("0", "group_id"):
+        c.execute(f"""
+            INSERT INTO activity_hourly (group_id, bucket, games)
+            SELECT {scope}, substr(ended_at, 1, 13), COUNT(*) FROM games GROUP BY 1, 2
+            ON CONFLICT(group_id, bucket) DO UPDATE SET games = activity_hourly.games + excluded.games
+        """)
+        c.execute(f"""
+            INSERT INTO activity_daily (group_id, day, games)
+            SELECT {scope}, substr(ended_at, 1, 10), COUNT(*) FROM games GROUP BY 1, 2
+            ON CONFLICT(group_id, day) DO UPDATE SET games = activity_daily.games + excluded.games
+        """)
+        c.execute(f"""
+            INSERT OR IGNORE INTO activity_daily_players (group_id, day, user_id)
+            SELECT {scope}, substr(updated_at, 1, 10), user_id FROM user_group_stats
+            WHERE updated_at IS NOT NULL AND games_played > 0
+        """)
+    c.execute("""
+        INSERT INTO activity_daily (group_id, day, active_players)
+        SELECT group_id, day, COUNT(*) FROM activity_daily_players GROUP BY group_id, day
+        ON CONFLICT(group_id, day) DO UPDATE SET active_players = excluded.active_players
+    """)
+    c.execute("""
+        INSERT INTO activity_daily (group_id, day, new_users)
+        SELECT 0, substr(created_at, 1, 10), COUNT(*) FROM users WHERE created_at IS NOT NULL GROUP BY 2
+        ON CONFLICT(group_id, day) DO UPDATE SET new_users = excluded.new_users
+    """)
+
+
+def _v6_round_history(c: sqlite3.Cursor):
+    """
+    Append-only round history: one packed blob per round (see
+    plugins/game/history.py), plus a user -> game index for per-player reads.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS game_rounds (
+            game_id   INTEGER NOT NULL,
+            round_no  INTEGER NOT NULL,
+            group_id  INTEGER NOT NULL,
+            played_at TEXT    NOT NULL,   -- UTC 'YYYY-MM-DD HH:MM:SS'
+            target    REAL    NOT NULL,
+            data      BLOB    NOT NULL,
+            PRIMARY KEY (game_id, round_no)
+        ) WITHOUT ROWID
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_rounds_group ON game_rounds(group_id, played_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_rounds_time ON game_rounds(played_at)")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS game_players (
+            user_id INTEGER NOT NULL,
+            game_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, game_id)
+        ) WITHOUT ROWID
+    """)
+
+
+def _v7_game_snapshots(c: sqlite3.Cursor):
+    """
+    Checkpoints of running games (see plugins/game/snapshots.py), one row per
+    group, rewritten in place and deleted when the game ends.
+    """
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS game_snapshots (
+            group_id INTEGER PRIMARY KEY,
+            saved_at REAL    NOT NULL,   -- unix time
+            round_no INTEGER NOT NULL,
+            state    INTEGER NOT NULL,   -- SNAP_* flags
+            players  BLOB    NOT NULL,   -- packed player entries
+            names    BLOB    NOT NULL,   -- NUL separated name/username pairs
+            rounds   BLOB    NOT NULL    -- scored rounds not yet in game_rounds
+        ) WITHOUT ROWID
+    """)
+
+
+MIGRATIONS = [
+    (1, _v1_baseline),
+    (2, _v2_canonical_users_groups),
+    (3, _v3_leaderboard_index),
+    (4, _v4_bot_counters),
+    (5, _v5_activity_rollups),
+    (6, _v6_round_history),
+    (7, _v7_game_snapshots),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_connection(conn: sqlite3.Connection) -> tuple[int, int]:
+    """Bring `conn`'s database to SCHEMA_VERSION. Returns (old, new) versions."""
+    start = current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{current} is newer than this build (v{SCHEMA_VERSION})")
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception("Schema migration to v%s failed", version)
+            raise
+        logger.info("Database migrated to schema v%s (%s)", version, step.__name__)
+        current = version
+    return start, current
+
+
+def migrate() -> tuple[int, int]:
+    """Run pending migrations on the shared writer connection."""
+    with db_write() as conn:
+        return migrate_connection(conn)
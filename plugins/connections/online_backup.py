@@ -0,0 +1,85 @@
+# plugins/connections/online_backup.py
+import os
+import time
+import sqlite3
+import logging
+from config import BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS
+from plugins.connections.pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+
+def backup_database(dst: str, src_path: str | None = None, pages: int = BACKUP_PAGES_PER_STEP,
+                    sleep_ms: int = BACKUP_STEP_SLEEP_MS) -> dict:
+    """
+    Copy the live database to `dst` with the SQLite online backup API and
+    return timing/integrity metrics. Blocking: call it from a worker thread.
+
+    The source connection holds one WAL read snapshot for the whole copy, so
+    concurrent commits neither tear the file nor restart the backup; the copy
+    advances `pages` pages per step and sleeps `sleep_ms` between steps to
+    leave I/O for the game. The result is written to `dst + ".part"`,
+    switched to a single-file journal mode, checked with
+    `PRAGMA integrity_check` and only then renamed to `dst`.
+    """
+    src_path = src_path or get_pool().path
+    tmp = dst + ".part"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    steps = 0
+    total_pages = 0
+
+    def _progress(status, remaining, total):
+        nonlocal steps, total_pages
+        steps += 1
+        total_pages = total
+        # Connection.backup only honours its own `sleep` on BUSY/LOCKED, so pause here
+        if remaining > 0 and sleep_ms > 0:
+            time.sleep(sleep_ms / 1000)
+
+    t0 = time.perf_counter()
+    src = sqlite3.connect(src_path, check_same_thread=False)
+    dest = sqlite3.connect(tmp, check_same_thread=False)
+    try:
+        src.execute("PRAGMA query_only=ON")
+        # pin one read snapshot for the whole copy
+        src.execute("BEGIN")
+        src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        src.backup(dest, pages=max(1, pages), progress=_progress, sleep=0)
+        src.rollback()
+        copied = time.perf_counter()
+
+        dest.execute("PRAGMA journal_mode=DELETE")
+        integrity = dest.execute("PRAGMA integrity_check").fetchone()[0]
+        checked = time.perf_counter()
+        if integrity != "ok":
+            raise sqlite3.DatabaseError(f"Backup failed integrity_check: {integrity}")
+    except Exception:
+        dest.close()
+        os.remove(tmp)
+        raise
+    finally:
+        src.close()
+        dest.close()
+
+    os.replace(tmp, dst)
+
+    size = os.path.getsize(dst)
+    copy_sec = copied - t0
+    metrics = {
+        "path": dst,
+        "bytes": size,
+        "pages": total_pages,
+        "steps": steps,
+        "copy_sec": copy_sec,
+        "check_sec": checked - copied,
+        "total_sec": checked - t0,
+        "mb_per_sec": size / 2**20 / copy_sec if copy_sec > 0 else 0.0,
+        "integrity": integrity,
+    }
+    logger.info(
+        "Backup %s: %.1f MB, %d pages in %d steps, copy %.2fs (%.1f MB/s), integrity_check %.2fs",
+        dst, size / 2**20, total_pages, steps, copy_sec, metrics["mb_per_sec"], metrics["check_sec"],
+    )
+    return metrics
@@ -0,0 +1,222 @@
+# plugins/connections/pool.py
+import os
+import sqlite3
+import threading
+import queue
+import logging
+from contextlib import contextmanager
+from config import DB_PATH, DB_READ_POOL_SIZE, DB_CACHE_SIZE_KB, DB_MMAP_SIZE_MB, DB_BUSY_TIMEOUT_MS
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    One long-lived writer connection plus a small pool of query-only readers,
+    all on the same WAL-mode database file.
+    """
+
+    def __init__(self, path: str = DB_PATH, readers: int = DB_READ_POOL_SIZE,
+                 cache_size_kb: int = DB_CACHE_SIZE_KB, mmap_size_mb: int = DB_MMAP_SIZE_MB,
+                 busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.max_readers = max(1, readers)
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.RLock()
+        self._write_depth = 0
+        self._readers: queue.LifoQueue = queue.LifoQueue()
+        self._readers_open = 0
+        self._readers_lock = threading.Lock()
+        self._open_gate = threading.Event()     # cleared while the file is being swapped
+        self._open_gate.set()
+        self._closed = False
+
+    # ---------- connection setup ----------
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        c = conn.cursor()
+        if not readonly:
+            # only takes effect on a new, empty file; older files are converted
+            # by the maintenance job (plugins/connections/maintenance.py)
+            c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # journal_mode is persistent in the file, set it from the writer only
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+        c.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        c.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        c.execute(f"PRAGMA mmap_size={int(self.mmap_size_mb) * 1024 * 1024}")
+        c.execute("PRAGMA temp_store=MEMORY")
+        if readonly:
+            c.execute("PRAGMA query_only=ON")
+        c.close()
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._connect(readonly=False)
+        return self._writer
+
+    # ---------- public API ----------
+    @contextmanager
+    def write(self):
+        """
+        Yield the writer connection inside a transaction. Commits on exit,
+        rolls back on error. Nested `write()` blocks join the outer transaction.
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            conn = self._get_writer()
+            self._write_depth += 1
+            try:
+                yield conn
+                if self._write_depth == 1:
+                    conn.commit()
+            except BaseException:
+                if self._write_depth == 1:
+                    conn.rollback()
+                raise
+            finally:
+                self._write_depth -= 1
+
+    @contextmanager
+    def read(self):
+        """Yield a query-only connection from the reader pool."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        self._open_gate.wait()
+        conn = self._checkout_reader()
+        try:
+            yield conn
+        finally:
+            # Never leave a read transaction open, it pins the WAL
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def _checkout_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        if self._writer is None:
+            # make sure the file exists and is in WAL mode before readers attach
+            with self._writer_lock:
+                self._get_writer()
+        with self._readers_lock:
+            if self._readers_open < self.max_readers:
+                self._readers_open += 1
+                try:
+                    return self._connect(readonly=True)
+                except Exception:
+                    self._readers_open -= 1
+                    raise
+        return self._readers.get()
+
+    def _close_connections(self):
+        # caller holds the writer lock and the readers lock
+        while self._readers_open:
+            conn = self._readers.get()     # waits for checked-out readers to come back
+            try:
+                conn.close()
+            except Exception:
+                logger.exception("Failed to close reader connection")
+            self._readers_open -= 1
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                logger.exception("Failed to close writer connection")
+            self._writer = None
+
+    def close(self):
+        """Close every connection. Blocks until the writer is idle."""
+        with self._writer_lock:
+            self._closed = True
+            with self._readers_lock:
+                self._close_connections()
+
+    def replace_file(self, staged_path: str):
+        """
+        Atomically swap the database file for `staged_path` (same filesystem).
+
+        New writes queue on the writer lock and new reads wait on the gate
+        while in-flight reads finish; every connection is closed, the old
+        WAL/SHM files are moved aside so they can't be replayed into the new
+        file, and the rename happens. Connections reopen lazily on next use.
+        """
+        retired = []
+        with self._writer_lock:
+            if self._write_depth:
+                raise RuntimeError("replace_file() called inside a write transaction")
+            self._open_gate.clear()
+            try:
+                with self._readers_lock:
+                    self._close_connections()
+                    # move the old files aside (cheap renames/links); unlinking
+                    # them can take a while and happens after the gate reopens
+                    for suffix in ("-wal", "-shm", ""):
+                        old = self.path + suffix
+                        if not os.path.exists(old):
+                            continue
+                        aside = old + ".old"
+                        if os.path.exists(aside):
+                            os.remove(aside)
+                        if suffix:
+                            os.replace(old, aside)
+                        else:
+                            os.link(old, aside)
+                        retired.append(aside)
+                    os.replace(staged_path, self.path)
+            finally:
+                self._open_gate.set()
+        for path in retired:
+            try:
+                os.remove(path)
+            except OSError:
+                logger.warning("Could not remove replaced database file %s", path)
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def init_pool(path: str = DB_PATH, **kwargs) -> ConnectionPool:
+    """Replace the shared pool (closing the old one), e.g. to point at another file."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, ConnectionPool(path, **kwargs)
+    if old is not None:
+        old.close()
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
+
+def db_write():
+    """Shortcut for `get_pool().write()`."""
+    return get_pool().write()
+
+
+def db_read():
+    """Shortcut for `get_pool().read()`."""
+    return get_pool().read()
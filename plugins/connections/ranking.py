@@ -0,0 +1,217 @@
+# plugins/connections/ranking.py
+import threading
+import logging
+from bisect import bisect_left, insort
+from plugins.connections.pool import db_read
+
+logger = logging.getLogger(__name__)
+
+
+class RankIndex:
+    """
+    In-memory order-statistics index over users, ordered like the leaderboard:
+    wins DESC, total_score DESC, user_id DESC.
+
+    Keys live in sorted buckets of ~LOAD entries; a Fenwick tree over bucket
+    sizes turns "how many keys sort before this one" and "which key is at
+    position k" into O(log n) operations.
+    """
+
+    LOAD = 512
+
+    def __init__(self):
+        self._lists: list[list[tuple]] = []
+        self._maxes: list[tuple] = []
+        self._tree: list[int] = []
+        self._keys: dict[int, tuple] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(user_id: int, wins: int, total_score: int) -> tuple:
+        # negate so ascending tuple order == leaderboard order
+        return (-int(wins or 0), -int(total_score or 0), -int(user_id))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ---------- bulk load ----------
+    def load(self, rows):
+        """Replace the contents with `rows` of (user_id, wins, total_score)."""
+        keys = {uid: self._key(uid, w, s) for uid, w, s in rows}
+        ordered = sorted(keys.values())
+        with self._lock:
+            self._keys = keys
+            self._lists = [ordered[i:i + self.LOAD] for i in range(0, len(ordered), self.LOAD)]
+            self._maxes = [lst[-1] for lst in self._lists]
+            self._rebuild_tree()
+
+    # ---------- Fenwick tree over bucket sizes ----------
+    def _rebuild_tree(self):
+        tree = [len(lst) for lst in self._lists]
+        for i in range(len(tree)):
+            j = i | (i + 1)
+            if j < len(tree):
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, i: int, delta: int):
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i |= i + 1
+
+    def _prefix(self, i: int) -> int:
+        """Number of keys in buckets [0, i)."""
+        total = 0
+        while i > 0:
+            total += self._tree[i - 1]
+            i &= i - 1
+        return total
+
+    def _locate(self, pos: int) -> tuple[int, int]:
+        """Bucket index and offset of the key at 0-based position `pos`."""
+        tree = self._tree
+        idx = 0
+        bit = 1 << (len(tree).bit_length() - 1) if tree else 0
+        while bit:
+            nxt = idx + bit
+            if nxt <= len(tree) and tree[nxt - 1] <= pos:
+                pos -= tree[nxt - 1]
+                idx = nxt
+            bit >>= 1
+        return idx, pos
+
+    # ---------- key insert / remove ----------
+    def _insert(self, key: tuple):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._lists[i], key)
+        self._tree_add(i, 1)
+        lst = self._lists[i]
+        if len(lst) > 2 * self.LOAD:
+            self._lists[i:i + 1] = [lst[:self.LOAD], lst[self.LOAD:]]
+            self._maxes[i:i + 1] = [self._lists[i][-1], self._lists[i + 1][-1]]
+            self._rebuild_tree()
+
+    def _remove(self, key: tuple):
+        i = bisect_left(self._maxes, key)
+        lst = self._lists[i]
+        del lst[bisect_left(lst, key)]
+        if lst:
+            self._maxes[i] = lst[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+
+    def _position(self, key: tuple) -> int:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return len(self._keys)
+        return self._prefix(i) + bisect_left(self._lists[i], key)
+
+    # ---------- public API ----------
+    def update(self, user_id: int, wins: int, total_score: int):
+        key = self._key(user_id, wins, total_score)
+        with self._lock:
+            old = self._keys.get(user_id)
+            if old == key:
+                return
+            if old is not None:
+                self._remove(old)
+            self._keys[user_id] = key
+            self._insert(key)
+
+    def add_missing(self, user_ids):
+        """Register users that are not indexed yet with zero wins and score."""
+        with self._lock:
+            for uid in user_ids:
+                if uid not in self._keys:
+                    key = self._key(uid, 0, 0)
+                    self._keys[uid] = key
+                    self._insert(key)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            old = self._keys.pop(user_id, None)
+            if old is not None:
+                self._remove(old)
+
+    def rank(self, user_id: int) -> int | None:
+        """1-based rank of `user_id`, or None if unknown."""
+        with self._lock:
+            key = self._keys.get(user_id)
+            if key is None:
+                return None
+            return self._position(key) + 1
+
+    def at(self, rank: int) -> int | None:
+        """user_id at 1-based `rank`, or None if out of range."""
+        with self._lock:
+            if rank < 1 or rank > len(self._keys):
+                return None
+            b, off = self._locate(rank - 1)
+            return -self._lists[b][off][2]
+
+    def neighbours(self, user_id: int, before: int = 1, after: int = 1) -> list[tuple[int, int]]:
+        """(rank, user_id) pairs around `user_id`, the user included."""
+        with self._lock:
+            rank = self.rank(user_id)
+            if rank is None:
+                return []
+            lo = max(1, rank - before)
+            hi = min(len(self._keys), rank + after)
+            return [(r, self.at(r)) for r in range(lo, hi + 1)]
+
+
+_index: RankIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_rank_index() -> RankIndex:
+    """The shared index, loaded from the users table on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = RankIndex()
+                with db_read() as conn:
+                    index.load(conn.execute("SELECT user_id, wins, total_score FROM users"))
+                logger.info("Rank index loaded with %d users", len(index))
+                _index = index
+    return _index
+
+
+def update_ranks(rows):
+    """Apply committed (user_id, wins, total_score) rows to a loaded index."""
+    with _index_lock:
+        index = _index
+    if index is None:
+        return  # the first get_rank_index() reads committed state anyway
+    for uid, wins, score in rows:
+        index.update(uid, wins, score)
+
+
+def add_ranked_users(user_ids):
+    """Make newly inserted users rankable (they start at 0 wins / 0 score)."""
+    with _index_lock:
+        index = _index
+    if index is not None:
+        index.add_missing(user_ids)
+
+
+def reset_rank_index():
+    """Drop the index so the next use reloads it (e.g. after a restore)."""
+    global _index
+    with _index_lock:
+        _index = None
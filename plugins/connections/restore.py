@@ -0,0 +1,67 @@
+# plugins/connections/restore.py
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from plugins.connections.pool import get_pool
+from plugins.connections.worker import run_read, run_write
+from plugins.connections.online_backup import backup_database
+from plugins.connections.migrations import migrate_connection
+from plugins.connections.ranking import get_rank_index, reset_rank_index
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_TABLES = {"users", "groups", "games"}
+
+
+def stage_restore(src_path: str) -> dict:
+    """
+    Copy `src_path` next to the live DB (so the swap is a same-filesystem
+    rename), check its integrity and tables, and migrate the copy to the
+    current schema. Blocking, but never touches the live file.
+    """
+    staged = get_pool().path + ".staged"
+    backup_database(staged, src_path=src_path)      # raises if integrity_check fails
+    try:
+        conn = sqlite3.connect(staged)
+        try:
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            missing = REQUIRED_TABLES - tables
+            if missing:
+                raise ValueError(f"Not a MindScale database (missing {', '.join(sorted(missing))})")
+            old, new = migrate_connection(conn)       # rejects a schema newer than this build
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+    except Exception:
+        os.remove(staged)
+        raise
+    return {"staged": staged, "from_version": old, "to_version": new}
+
+
+def swap_in(staged: str) -> float:
+    """Swap the staged file in on the writer thread; returns the pause in ms."""
+    t0 = time.perf_counter()
+    get_pool().replace_file(staged)
+    reset_rank_index()
+    return (time.perf_counter() - t0) * 1000
+
+
+async def restore_from_file(src_path: str) -> dict:
+    """
+    Staged restore: validate and migrate a copy off the event loop, swap it
+    in behind the queued writes, then reload the rank index. bot_counters
+    need no rebuild: they commit with the writes they count, so any snapshot
+    is consistent (and the v4 migration builds them for older backups).
+    """
+    info = await asyncio.to_thread(stage_restore, src_path)
+    info["pause_ms"] = await run_write(swap_in, info["staged"])
+    logger.info("Database restored from %s (schema v%s -> v%s), writers paused %.1f ms",
+                src_path, info["from_version"], info["to_version"], info["pause_ms"])
+    try:
+        await run_read(get_rank_index)
+    except Exception:
+        logger.exception("Failed to reload the rank index after restore")
+    return info
+
@@ -0,0 +1,115 @@
+# plugins/connections/rollups.py
+import logging
+from datetime import datetime, timedelta
+from plugins.connections.pool import db_write
+from plugins.connections.worker import run_write
+
+logger = logging.getLogger(__name__)
+
+# group_id used for the bot-wide rows in every rollup table
+GLOBAL = 0
+
+HOURLY_KEEP_DAYS = 8
+DAILY_PLAYERS_KEEP_DAYS = 190
+
+_TS = "%Y-%m-%d %H:%M:%S"
+
+
+def _hour(ts: str) -> str:
+    return ts[:13]          # 'YYYY-MM-DD HH'
+
+
+def _day(ts: str) -> str:
+    return ts[:10]          # 'YYYY-MM-DD'
+
+
+def record_game(c, ended_at: str, group_id: int, user_ids, new_users: int = 0, new_players: int = 0):
+    """
+    Fold one finished game into the hourly/daily rollups, globally and for
+    `group_id`. `ended_at` is the UTC 'YYYY-MM-DD HH:MM:SS' of the games row;
+    `new_players` counts users playing their first game in this group.
+    Runs on the caller's cursor so it commits with the game.
+    """
+    hour, day = _hour(ended_at), _day(ended_at)
+    c.executemany("""
+        INSERT INTO activity_hourly (group_id, bucket, games) VALUES (?, ?, 1)
+        ON CONFLICT(group_id, bucket) DO UPDATE SET games = activity_hourly.games + 1
+    """, [(GLOBAL, hour), (group_id, hour)])
+
+    for gid, new in ((GLOBAL, new_users), (group_id, new_players)):
+        c.executemany("INSERT OR IGNORE INTO activity_daily_players (group_id, day, user_id) VALUES (?, ?, ?)",
+                      [(gid, day, uid) for uid in user_ids])
+        first_today = max(c.rowcount, 0)
+        c.execute("""
+            INSERT INTO activity_daily (group_id, day, games, new_users, active_players) VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(group_id, day) DO UPDATE SET
+                games          = activity_daily.games + 1,
+                new_users      = activity_daily.new_users + excluded.new_users,
+                active_players = activity_daily.active_players + excluded.active_players
+        """, (gid, day, new, first_today))
+
+
+def record_new_users(c, at: str, count: int):
+    """Count users created outside a game (e.g. /start) in today's global bucket."""
+    if count <= 0:
+        return
+    c.execute("""
+        INSERT INTO activity_daily (group_id, day, new_users) VALUES (?, ?, ?)
+        ON CONFLICT(group_id, day) DO UPDATE SET new_users = activity_daily.new_users + excluded.new_users
+    """, (GLOBAL, _day(at), count))
+
+
+def window(conn, group_id: int = GLOBAL, days: int = 7, end: datetime | None = None) -> dict:
+    """
+    Games, new users and distinct active players over the `days` UTC days
+    ending today (or on `end`), read from the daily rollups.
+    """
+    end = end or datetime.utcnow()
+    last = end.strftime("%Y-%m-%d")
+    first = (end - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    games, new_users = conn.execute("""
+        SELECT COALESCE(SUM(games), 0), COALESCE(SUM(new_users), 0)
+        FROM activity_daily WHERE group_id = ? AND day BETWEEN ? AND ?
+    """, (group_id, first, last)).fetchone()
+    players = conn.execute("""
+        SELECT COUNT(DISTINCT user_id)
+        FROM activity_daily_players WHERE group_id = ? AND day BETWEEN ? AND ?
+    """, (group_id, first, last)).fetchone()[0]
+    return {"days": days, "games": games, "new_users": new_users, "active_players": players}
+
+
+def games_last_hours(conn, group_id: int = GLOBAL, hours: int = 24, now: datetime | None = None) -> int:
+    """Games ended in the last `hours` hourly buckets (the current hour included)."""
+    now = now or datetime.utcnow()
+    first = _hour((now - timedelta(hours=hours - 1)).strftime(_TS))
+    return conn.execute(
+        "SELECT COALESCE(SUM(games), 0) FROM activity_hourly WHERE group_id = ? AND bucket >= ?",
+        (group_id, first),
+    ).fetchone()[0]
+
+
+def trend(conn, group_id: int = GLOBAL, days: int = 30) -> dict:
+    """`window()` for the last `days` plus the same figures for the period before."""
+    now = datetime.utcnow()
+    current = window(conn, group_id, days, now)
+    previous = window(conn, group_id, days, now - timedelta(days=days))
+    return {"current": current, "previous": previous}
+
+
+def prune_rollups(now: datetime | None = None) -> int:
+    """Drop hourly buckets and per-day player rows that no window reads any more."""
+    now = now or datetime.utcnow()
+    hour_cutoff = _hour((now - timedelta(days=HOURLY_KEEP_DAYS)).strftime(_TS))
+    day_cutoff = (now - timedelta(days=DAILY_PLAYERS_KEEP_DAYS)).strftime("%Y-%m-%d")
+    with db_write() as conn:
+        removed = conn.execute("DELETE FROM activity_hourly WHERE bucket < ?", (hour_cutoff,)).rowcount
+        removed += conn.execute("DELETE FROM activity_daily_players WHERE day < ?", (day_cutoff,)).rowcount
+    return removed
+
+
+async def prune_rollups_job(context):
+    try:
+        removed = await run_write(prune_rollups)
+        logger.info("Pruned %d expired rollup rows", removed)
+    except Exception:
+        logger.exception("Failed to prune activity rollups")
@@ -0,0 +1,65 @@
+# plugins/connections/worker.py
+import asyncio
+import functools
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import DB_READ_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# One writer thread (SQLite allows a single writer anyway) and a reader pool
+# sized like the connection pool, so handlers never run sqlite3 on the event loop.
+_writer: ThreadPoolExecutor | None = None
+_readers: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_closed = False
+
+
+def _executors() -> tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    global _writer, _readers
+    if _writer is None or _readers is None:
+        with _lock:
+            if _closed:
+                raise RuntimeError("DB workers are shut down")
+            if _writer is None:
+                _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+            if _readers is None:
+                _readers = ThreadPoolExecutor(max_workers=max(1, DB_READ_POOL_SIZE), thread_name_prefix="db-reader")
+    return _writer, _readers
+
+
+async def run_write(fn, *args, **kwargs):
+    """Run a blocking DB write helper on the writer thread and await its result."""
+    writer, _ = _executors()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(writer, functools.partial(fn, *args, **kwargs))
+
+
+def submit_write(fn, *args, **kwargs) -> Future:
+    """
+    Queue a DB write on the writer thread without waiting. Safe from any
+    thread. Raises RuntimeError once `shutdown_workers` has run.
+    """
+    writer, _ = _executors()
+    return writer.submit(fn, *args, **kwargs)
+
+
+async def run_read(fn, *args, **kwargs):
+    """Run a blocking DB read helper on the reader pool and await its result."""
+    _, readers = _executors()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(readers, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_workers(wait: bool = True):
+    """Drain queued DB work (writes first) and stop the worker threads for good."""
+    global _writer, _readers, _closed
+    with _lock:
+        writer, readers = _writer, _readers
+        _writer = _readers = None
+        _closed = True
+    if writer is not None:
+        writer.shutdown(wait=wait)
+    if readers is not None:
+        readers.shutdown(wait=wait)
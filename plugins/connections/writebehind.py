@@ -0,0 +1,115 @@
+# plugins/connections/writebehind.py
+import threading
+from datetime import datetime
+import logging
+from plugins.connections.pool import db_write
+from plugins.connections.ranking import add_ranked_users
+from plugins.connections.counters import bump
+from plugins.connections.rollups import record_new_users
+from plugins.connections.worker import submit_write, run_write
+from config import WRITE_BEHIND_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileBuffer:
+    """
+    Coalesces low-value user profile touches (/start, /join) in memory and
+    writes them as one UPSERT batch. Only the latest name per user_id is kept.
+    """
+
+    def __init__(self, max_pending: int = WRITE_BEHIND_MAX_PENDING):
+        self.max_pending = max(1, max_pending)
+        self._pending: dict[int, tuple[str, str | None]] = {}
+        self._inflight: dict[int, tuple[str, str | None]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_queued = False
+
+    def touch(self, user_id: int, first_name: str | None, username: str | None):
+        with self._lock:
+            self._pending[user_id] = (first_name or "", username)
+            if len(self._pending) < self.max_pending or self._flush_queued:
+                return
+            self._flush_queued = True
+        try:
+            submit_write(self.flush)
+        except RuntimeError:
+            # workers already shut down; the shutdown flush picks it up
+            with self._lock:
+                self._flush_queued = False
+
+    def is_pending(self, user_id: int) -> bool:
+        with self._lock:
+            return user_id in self._pending or user_id in self._inflight
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write every pending touch in one transaction. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                self._flush_queued = False
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            try:
+                with db_write() as conn:
+                    ids = list(batch)
+                    existing = 0
+                    for i in range(0, len(ids), 500):
+                        chunk = ids[i:i + 500]
+                        existing += conn.execute(
+                            f"SELECT COUNT(*) FROM users WHERE user_id IN ({','.join('?' * len(chunk))})", chunk
+                        ).fetchone()[0]
+                    conn.executemany(
+                        """
+                        INSERT INTO users (user_id, first_name, username) VALUES (?, ?, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET
+                            first_name = excluded.first_name,
+                            username   = excluded.username,
+                            updated_at = CURRENT_TIMESTAMP
+                        """,
+                        [(uid, fn, un) for uid, (fn, un) in batch.items()],
+                    )
+                    created = len(ids) - existing
+                    bump(conn, users=created, inactive_users=created)
+                    record_new_users(conn, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"), created)
+            except Exception:
+                # put the batch back unless a newer touch replaced it meanwhile
+                with self._lock:
+                    for uid, row in batch.items():
+                        self._pending.setdefault(uid, row)
+                logger.exception("Failed to flush %d buffered user profiles", len(batch))
+                return 0
+            finally:
+                with self._lock:
+                    self._inflight = {}
+        add_ranked_users(batch.keys())
+        return len(batch)
+
+
+_buffer = ProfileBuffer()
+
+
+def touch_user(user):
+    """Record that `user` (telegram.User-like) was seen. Never touches the DB directly."""
+    _buffer.touch(user.id, getattr(user, "first_name", ""), getattr(user, "username", None))
+
+
+def is_user_pending(user_id: int) -> bool:
+    return _buffer.is_pending(user_id)
+
+
+def flush_users() -> int:
+    """Blocking flush; run it on the writer thread or at shutdown."""
+    return _buffer.flush()
+
+
+async def flush_users_job(context):
+    """JobQueue callback: periodic flush on the writer thread."""
+    if len(_buffer):
+        await run_write(flush_users)
@@ -1,18 +1,33 @@
-import asyncio, datetime, sqlite3
+import asyncio
+from functools import partial
 from typing import Dict, Optional
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
-from config import PICK_TIME_SEC , VIDEO_ELIMINATION, VIDEO_ROUND_ANNOUNCE, VIDEO_WINNER, DB_PATH
-from plugins.game.db import ensure_user_exists, update_user_after_game, record_group_game_end
+from config import PICK_TIME_SEC, ROUND_DM_CONCURRENCY, VIDEO_ELIMINATION, VIDEO_ROUND_ANNOUNCE, VIDEO_WINNER
+from plugins.game.db import commit_game_result
+from plugins.game.history import snapshot_round
+from plugins.game.scoring import score_round
+from plugins.game.snapshots import SnapshotWriter
+from plugins.game.timers import DeadlineScheduler
+from plugins.game.reminders import RoundReminder
+from plugins.connections.worker import run_write
+from plugins.utils.chatmeta import bot_username, chat_title, group_link as cached_group_link
+from plugins.utils.outbound import post, post_reply, send
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# DeadlineScheduler key for round-wide (not per-player) timers
+ROUND_TIMER = 0
+
 # Active game registries (module-level)
 active_games: Dict[int, "MindScaleGame"] = {}   # group_id -> game instance
 user_active_game: Dict[int, int] = {}           # user_id -> group_id
 
+# crash-safe checkpoints of active_games (see plugins/game/snapshots.py)
+checkpoints = SnapshotWriter(active_games)
+
 class Player:
     def __init__(self, user_id: int, name: str, username: Optional[str] = None):
         self.user_id: int = user_id
@@ -37,16 +52,14 @@ class MindScaleGame:
         self.join_phase_active: bool = True
         self.round_number: int = 0
         self.current_round_active: bool = False
-        self.pick_tasks: Dict[int, asyncio.Task] = {}
-        self.pick_60_alerts: Dict[int, asyncio.Task] = {}
-        self.pick_30_alerts: Dict[int, asyncio.Task] = {}
-        self.pick_10_alerts: Dict[int, asyncio.Task] = {}
-        self.score_history: list = []
+        self.timers = DeadlineScheduler()   # round reminders and per-player timeouts
+        self.reminder: Optional[RoundReminder] = None
+        self.score_history: list = []       # RoundRecord per scored round, written at end_game
+        self.round_start_scores: Dict[int, int] = {}
         self.join_timer_task: Optional[asyncio.Task] = None
         self.round_results_sent: bool = False
         self.ended: bool = False
         self.duplicate_rule_sticky: bool = False
-        self._next_round_sticky: bool = False 
 
     @property
     def active_players(self):
@@ -67,33 +80,25 @@ class MindScaleGame:
         for p in self.players.values():
             p.current_number = None
 
+def build_game_results(game: "MindScaleGame", winner_id: Optional[int] = None) -> list[dict]:
+    """Per-player payload for `commit_game_result`."""
+    return [
+        {
+            "user_id": p.user_id,
+            "first_name": p.name,
+            "username": p.username,
+            "score": int(p.score),
+            "won": p.user_id == winner_id,
+            "eliminated": p.eliminated,
+            "rounds_played": p.rounds_played,
+            "penalties": p.total_penalties,
+        }
+        for p in game.players.values()
+    ]
+
 def mention_html(p: Player):
     return f"<a href='tg://user?id={p.user_id}'>{p.name}</a>"
 
-def eval_duplicate_rule(game, picks):
-
-    counts = {}
-    for uid, num in picks:
-        counts[num] = counts.get(num, 0) + 1
-
-    num_alive = len([p for p in game.players.values() if not p.eliminated])
-    num_eliminated = len([p for p in game.players.values() if p.eliminated])
-
-    if num_alive <= 2 and getattr(game, "duplicate_rule_sticky", False):
-        game.duplicate_rule_sticky = False
-
-    triggered_sticky = False
-    if num_eliminated == 0 and any(c >= 4 for c in counts.values()):
-        triggered_sticky = True
-
-    base_active_now = (num_alive > 2 and num_eliminated >= 1)
-    sticky_active_now = getattr(game, "duplicate_rule_sticky", False)
-
-    apply_now = base_active_now or sticky_active_now
-    duplicate_nums = {n for n, c in counts.items() if c > 1} if apply_now else set()
-
-    return apply_now, duplicate_nums, triggered_sticky, counts
-
 async def start_round(context: ContextTypes.DEFAULT_TYPE, group_id: int):
     if group_id not in active_games:
         return
@@ -103,147 +108,101 @@ async def start_round(context: ContextTypes.DEFAULT_TYPE, group_id: int):
 
     game.current_round_active = True
     game.round_number += 1
+    game.round_start_scores = {p.user_id: p.score for p in game.active_players}
     game.reset_round_picks()
     game.round_results_sent = False
 
-    # Cancel old tasks
-    for t in list(game.pick_tasks.values()) + list(game.pick_30_alerts.values()) + list(game.pick_60_alerts.values()) + list(game.pick_10_alerts.values()):  # (MODIFIED)
-        try:
-            t.cancel()
-        except:
-            pass
-    game.pick_tasks.clear()
-    game.pick_30_alerts.clear()
-    game.pick_60_alerts.clear()   
-    game.pick_10_alerts.clear()  
+    # Drop any timers left from the previous round
+    game.timers.cancel_all()
+    # one group reminder per round, edited at each threshold and as players pick
+    game.reminder = RoundReminder(group_id, mention_html)
 
     # -------------------- Round start announcement --------------------
-    bot_username = (await context.bot.get_me()).username or ""
-    dm_url = f"https://t.me/{bot_username}"
+    dm_url = f"https://t.me/{await bot_username(context.bot)}"
     buttons = InlineKeyboardMarkup([[InlineKeyboardButton("Send number in DM", url=dm_url)]])
 
-    try:
-        if VIDEO_ROUND_ANNOUNCE:
-            await context.bot.send_video(
-                chat_id=group_id,
-                video=VIDEO_ROUND_ANNOUNCE,
-                caption=f"𝗥𝗼𝘂𝗻𝗱 {game.round_number} \n🎲 Starting now! Send your number in DM!",
-                reply_markup=buttons
-            )
-        else:
-            await context.bot.send_message(chat_id=group_id, text=f"𝗥𝗼𝘂𝗻𝗱 {game.round_number} \n🎲 Starting now! Send your number in DM!", reply_markup=buttons)
-    except:
-        try:
-            await context.bot.send_message(chat_id=group_id, text=f"𝗥𝗼𝘂𝗻𝗱 {game.round_number} \n🎲 Starting now! Send your number in DM!", reply_markup=buttons)
-        except:
-            pass
+    announce = f"𝗥𝗼𝘂𝗻𝗱 {game.round_number} \n🎲 Starting now! Send your number in DM!"
+    if VIDEO_ROUND_ANNOUNCE:
+        post(context.bot.send_video, chat_id=group_id, video=VIDEO_ROUND_ANNOUNCE, caption=announce, reply_markup=buttons,
+             fallback=partial(context.bot.send_message, chat_id=group_id, text=announce, reply_markup=buttons))
+    else:
+        post(context.bot.send_message, chat_id=group_id, text=announce, reply_markup=buttons)
 
     # -------------------- Check active players --------------------
     players = game.active_players
     if not players:
-        try:
-            await context.bot.send_message(chat_id=group_id, text="❌ No active players. Ending game.")
-        except:
-            pass
+        post(context.bot.send_message, chat_id=group_id, text="❌ No active players. Ending game.")
         await end_game(context, group_id)
         return
 
-    # -------------------- helpers (NEW) --------------------
-    async def send_alert(user_id: int, secs_left: int):
-        if group_id not in active_games or user_id not in game.players:
-            return
-        p = game.players.get(user_id)
-        if not p or p.eliminated or p.current_number is not None:
-            return
-        try:
-            await context.bot.send_message(
-                chat_id=group_id,
-                text=f"⏳ {mention_html(p)} — {secs_left} seconds left to send your number in DM!",
-                parse_mode="HTML"
-            )
-        except:
-            pass
-
     # -------------------- Per-player DM and timers --------------------
-    async def handle_miss(user_id: int):
-        if group_id not in active_games or user_id not in game.players:
-            return
-        p = game.players.get(user_id)
-        if not p or p.eliminated or p.current_number is not None:
-            return
-
-        # ---------------- Inactivity Penalty Logic ----------------
-        if getattr(p, "timeout_count", 0) == 0:
-            p.score -= 2
-            p.total_penalties += 1
-            p.timeout_count = 1
-            p.current_number = "Skipped"
-            try:
-                await context.bot.send_message(chat_id=group_id, text=f"⚠️ {mention_html(p)} did not respond in time! -2 penalty.", parse_mode="HTML")
-            except:
-                pass
-        else:
-            p.eliminated = True
-            try:
-                await context.bot.send_message(chat_id=group_id, text=f"☠️ {mention_html(p)} failed again and is eliminated!", parse_mode="HTML")
-            except:
-                pass
-
-        game.pick_tasks.pop(user_id, None)
-        game.pick_30_alerts.pop(user_id, None)
-        game.pick_60_alerts.pop(user_id, None)  
-        game.pick_10_alerts.pop(user_id, None)   
-
-        if group_id in active_games and all(pl.current_number is not None or pl.eliminated for pl in game.active_players):
-            game.current_round_active = False
-            await process_round_results(context, group_id)
-
-    async def send_30_alert(user_id: int):  # kept for minimal disruption; now uses helper
-        await send_alert(user_id, 30)
-
-    for p in players:
-        if p.eliminated:
-            continue
-        # DM instruction
-        try:
-            await context.bot.send_message(chat_id=p.user_id, text=f"🎯 𝗥𝗼𝘂𝗻𝗱 {game.round_number} \nSend a number between 0–100 .")
-        except:
+    # DM instructions go out concurrently (bounded); each player's pick timer
+    # starts when their own DM is delivered, not when the round started
+    dm_slots = asyncio.Semaphore(ROUND_DM_CONCURRENCY)
+    round_no = game.round_number
+    undelivered = []
+
+    async def prompt(p: Player):
+        async with dm_slots:
             try:
-                await context.bot.send_message(chat_id=group_id, text=f"⚠️ Could not DM {mention_html(p)}. Please open your DM with the bot.", parse_mode="HTML")
-            except:
-                pass
-
-        # schedule alerts & timeout
-        # 60s alert (only if PICK_TIME_SEC > 60)
-        if PICK_TIME_SEC > 60:
-            async def _alert60(uid=p.user_id):
-                await asyncio.sleep(PICK_TIME_SEC - 60)
-                await send_alert(uid, 60)
-            t60 = asyncio.create_task(_alert60())
-            game.pick_60_alerts[p.user_id] = t60
-
-        # 30s alert (existing behavior, kept)
-        if PICK_TIME_SEC > 30:
-            async def _alert30(uid=p.user_id):
-                await asyncio.sleep(PICK_TIME_SEC - 30)
-                await send_30_alert(uid)
-            t30 = asyncio.create_task(_alert30())
-            game.pick_30_alerts[p.user_id] = t30
-
-        # 10s alert
-        if PICK_TIME_SEC > 10:
-            async def _alert10(uid=p.user_id):
-                await asyncio.sleep(PICK_TIME_SEC - 10)
-                await send_alert(uid, 10)
-            t10 = asyncio.create_task(_alert10())
-            game.pick_10_alerts[p.user_id] = t10
-
-        # timeout as before
-        async def _timeout(uid=p.user_id):
-            await asyncio.sleep(PICK_TIME_SEC)
-            await handle_miss(uid)
-        t_timeout = asyncio.create_task(_timeout())
-        game.pick_tasks[p.user_id] = t_timeout
+                await send(context.bot.send_message, chat_id=p.user_id, text=f"🎯 𝗥𝗼𝘂𝗻𝗱 {game.round_number} \nSend a number between 0–100 .")
+            except Exception:
+                undelivered.append(p)
+        if same_round():
+            game.timers.schedule(p.user_id, "timeout", PICK_TIME_SEC, lambda uid=p.user_id: handle_miss(context, group_id, uid))
+
+    def same_round() -> bool:
+        return active_games.get(group_id) is game and game.round_number == round_no and game.current_round_active
+
+    await asyncio.gather(*(prompt(p) for p in players if not p.eliminated))
+    if not same_round():
+        return
+    if undelivered:
+        names = ", ".join(mention_html(p) for p in undelivered)
+        post(context.bot.send_message, chat_id=group_id, text=f"⚠️ Could not DM {names}. Please open your DM with the bot.", parse_mode="HTML")
+
+    # round-wide reminders count down from the last delivered DM
+    arm_reminders(context, game, PICK_TIME_SEC)
+    checkpoints.mark(group_id)
+
+
+def arm_reminders(context: ContextTypes.DEFAULT_TYPE, game: "MindScaleGame", time_left: float):
+    """Schedule the round reminder thresholds that still lie within `time_left` seconds."""
+    reminder = game.reminder
+    for secs_left in (60, 30, 10):
+        if time_left > secs_left:
+            game.timers.schedule(ROUND_TIMER, secs_left, time_left - secs_left,
+                                 lambda s=secs_left: reminder.post(context.bot, game, s))
+
+
+async def handle_miss(context: ContextTypes.DEFAULT_TYPE, group_id: int, user_id: int):
+    """A player's pick timer ran out: -2 the first time, eliminated the second."""
+    game = active_games.get(group_id)
+    if game is None or user_id not in game.players:
+        return
+    p = game.players.get(user_id)
+    if not p or p.eliminated or p.current_number is not None:
+        return
+
+    # ---------------- Inactivity Penalty Logic ----------------
+    if getattr(p, "timeout_count", 0) == 0:
+        p.score -= 2
+        p.total_penalties += 1
+        p.timeout_count = 1
+        p.current_number = "Skipped"
+        post(context.bot.send_message, chat_id=group_id, text=f"⚠️ {mention_html(p)} did not respond in time! -2 penalty.", parse_mode="HTML")
+    else:
+        p.eliminated = True
+        post(context.bot.send_message, chat_id=group_id, text=f"☠️ {mention_html(p)} failed again and is eliminated!", parse_mode="HTML")
+    checkpoints.mark(group_id)
+
+    game.timers.cancel(user_id)
+    if game.reminder is not None:
+        game.reminder.refresh(context.bot, game)
+
+    if group_id in active_games and all(pl.current_number is not None or pl.eliminated for pl in game.active_players):
+        game.current_round_active = False
+        await process_round_results(context, group_id)
 
 async def process_round_results(context: ContextTypes.DEFAULT_TYPE, group_id: int):
     if group_id not in active_games:
@@ -253,20 +212,19 @@ async def process_round_results(context: ContextTypes.DEFAULT_TYPE, group_id: in
         return
     game.round_results_sent = True
 
-    picks = [(p.user_id, p.current_number) for p in game.active_players if isinstance(p.current_number, (int, float))]
-    if not picks:
-        try:
-            await context.bot.send_message(chat_id=group_id, text="❌ No valid picks received this round.")
-        except:
-            pass
+    players = list(game.players.values())
+    outcome = score_round(
+        [p.current_number for p in players],
+        [p.score for p in players],
+        [p.eliminated for p in players],
+        game.duplicate_rule_sticky,
+        [p.timeout_penalty_applied for p in players],
+    )
+    if outcome.target is None:
+        post(context.bot.send_message, chat_id=group_id, text="❌ No valid picks received this round.")
         await end_game(context, group_id)
         return
-
-    nums = [n for _, n in picks]
-    average = sum(nums) / len(nums)
-    target = average * 0.8
-
-    alive_players = [p for p in game.players.values() if not p.eliminated]
+    target = outcome.target
 
     # Reveal picks
     reveal_text = "𝗥𝗼𝘂𝗻𝗱 𝗣𝗶𝗰𝗸𝘀 \n\n"
@@ -274,106 +232,41 @@ async def process_round_results(context: ContextTypes.DEFAULT_TYPE, group_id: in
         pick_val = p.current_number if p.current_number is not None else "⏳ Skipped"
         reveal_text += f"♦️ {mention_html(p)} → {pick_val}\n"
     reveal_text += "▭▭▭▭▭▭▭▭▭▭▭▭▭▭"
-    try:
-        await context.bot.send_message(chat_id=group_id, text=reveal_text, parse_mode="HTML")
-    except:
-        pass
-
-    # Duplicate detection & next-round scheduling
-    apply_dup_now, duplicate_nums, sticky_next, counts = eval_duplicate_rule(game, picks)
-
-    duplicate_players = set()
-    duplicates_exist = False
-
-    # If sticky should start next round, remember it
-    if sticky_next:
-        game._next_round_sticky = True
-        try:
-            await context.bot.send_message(
-                chat_id=group_id,
-                text=(
-                    f"⚠️ <u>𝐃𝐮𝐩𝐥𝐢𝐜𝐚𝐭𝐞 𝐓𝐫𝐢𝐠𝐠𝐞𝐫</u> ⚠️\n"
-                    f"➡️ 4 or more players chose the same number.\n"
-                    f"🔒 From the <b>next round</b>, duplicate penalty will be <b>ACTIVE</b> for "
-                    f"<b>any</b> duplicate numbers."
-                ),
-                parse_mode="HTML"
-            )
-        except:
-            pass
-
-    if apply_dup_now and duplicate_nums:
-        duplicates_exist = True
-        for p in game.active_players:
-            if isinstance(p.current_number, (int, float)) and p.current_number in duplicate_nums:
-                p.score -= 1
-                p.total_penalties += 1
-                duplicate_players.add(p)
-                try:
-                    await context.bot.send_message(
-                        chat_id=group_id,
-                        text=f"⚠️ {mention_html(p)} picked a duplicate number ({p.current_number})! −1 penalty.",
-                        parse_mode="HTML"
-                    )
-                except:
-                    pass
-
-    # Closest number logic
-    winner_players = []
-    diffs = [(p, abs(p.current_number - target)) for p in alive_players if isinstance(p.current_number, (int, float))]
-    if diffs:
-        min_diff = min(d for _, d in diffs)
-        winner_players = [p for p, d in diffs if d == min_diff and not p.eliminated]
-
-    # 0 vs 100 special
-    alive_now = [p for p in game.players.values() if not p.eliminated]
-    zero_vs_hundred_case = False
-    if len(alive_now) == 2:
-        vals = [p.current_number for p in alive_now if isinstance(p.current_number, (int, float))]
-        if 0 in vals and 100 in vals:
-            p100 = next(p for p in alive_now if p.current_number == 100)
-            winner_players = [p100]
-            zero_vs_hundred_case = True
-            for p in alive_now:
-                if p != p100 and p not in duplicate_players:
-                    p.score -= 1
-                    p.total_penalties += 1
-
-    # second elimination special
-    special_penalty_applied = False
-    num_eliminated = len([p for p in game.players.values() if p.eliminated])
-    if num_eliminated >= 2 and not zero_vs_hundred_case and not duplicates_exist:
-        exact_target_players = [p for p in alive_players if p.current_number == round(target)]
-        if exact_target_players:
-            winner_players = exact_target_players
-            special_penalty_applied = True
-            for p in alive_players:
-                if p not in winner_players and p not in duplicate_players:
-                    p.score -= 2
-                    p.total_penalties += 2
-
-    # non-winner penalties
-    if not zero_vs_hundred_case:
-        for p in alive_players:
-            if p in duplicate_players:
-                continue
-            if p not in winner_players:
-                if getattr(p, "timeout_penalty_applied", False):
-                    continue
-                if duplicates_exist:
-                    continue
-                if special_penalty_applied:
-                    continue
-                else:
-                    p.score -= 1
-                    p.total_penalties += 1
-
-    # elimination check
-    eliminated_now = []
-    for p in list(game.players.values()):
-        if not p.eliminated and p.score <= -10:
-            p.eliminated = True
-            eliminated_now.append(p)
+    post(context.bot.send_message, chat_id=group_id, text=reveal_text, parse_mode="HTML")
+
+    if outcome.sticky_triggered:
+        post(
+            context.bot.send_message,
+            chat_id=group_id,
+            text=(
+                f"⚠️ <u>𝐃𝐮𝐩𝐥𝐢𝐜𝐚𝐭𝐞 𝐓𝐫𝐢𝐠𝐠𝐞𝐫</u> ⚠️\n"
+                f"➡️ 4 or more players chose the same number.\n"
+                f"🔒 From the <b>next round</b>, duplicate penalty will be <b>ACTIVE</b> for "
+                f"<b>any</b> duplicate numbers."
+            ),
+            parse_mode="HTML"
+        )
+
+    for i in outcome.duplicates:
+        p = players[i]
+        post(
+            context.bot.send_message,
+            chat_id=group_id,
+            text=f"⚠️ {mention_html(p)} picked a duplicate number ({p.current_number})! −1 penalty.",
+            parse_mode="HTML"
+        )
+
+    # apply the engine's verdict
+    for p, delta in zip(players, outcome.deltas):
+        p.score += delta
+        p.total_penalties -= delta
+    eliminated_now = [players[i] for i in outcome.eliminated]
+    for p in eliminated_now:
+        p.eliminated = True
+    winner_players = [players[i] for i in outcome.winners]
+    duplicate_players = [players[i] for i in outcome.duplicates]
+
+    game.score_history.append(snapshot_round(game, target, winner_players, duplicate_players, eliminated_now))
 
     # Round results message
     res = f"𝗥𝗼𝘂𝗻𝗱 {game.round_number} 𝗥𝗲𝘀𝘂𝗹𝘁𝘀 \n\n"
@@ -389,22 +282,15 @@ async def process_round_results(context: ContextTypes.DEFAULT_TYPE, group_id: in
         else:
             res += f"♦️ {mention_html(p)} — {p.score}\n"
     res += " Keep pushing, the next round awaits! 🚀"
-    try:
-        await context.bot.send_message(chat_id=group_id, text=res, parse_mode="HTML")
-    except:
-        pass
+    post(context.bot.send_message, chat_id=group_id, text=res, parse_mode="HTML")
 
     # play elimination video(s)
     for p in eliminated_now:
-        try:
-            if VIDEO_ELIMINATION:
-                await context.bot.send_video(chat_id=group_id, video=VIDEO_ELIMINATION, caption=f"☠️ {mention_html(p)} you are Eliminated!", parse_mode="HTML")
-        except:
-            pass
+        if VIDEO_ELIMINATION:
+            post(context.bot.send_video, chat_id=group_id, video=VIDEO_ELIMINATION, caption=f"☠️ {mention_html(p)} you are Eliminated!", parse_mode="HTML")
 
     # if game ended
-    alive_now = [p for p in game.players.values() if not p.eliminated]
-    if len(alive_now) <= 1:
+    if outcome.alive_after <= 1:
         await end_game(context, group_id)
         return
 
@@ -412,16 +298,9 @@ async def process_round_results(context: ContextTypes.DEFAULT_TYPE, group_id: in
     game.current_round_active = False
     game.round_results_sent = False
     game.reset_round_picks()
-    if getattr(game, "_next_round_sticky", False):
-        game.duplicate_rule_sticky = True
-    game._next_round_sticky = False
-    for task in list(game.pick_tasks.values()) + list(game.pick_30_alerts.values()):
-        try:
-            task.cancel()
-        except:
-            pass
-    game.pick_tasks.clear()
-    game.pick_30_alerts.clear()
+    game.duplicate_rule_sticky = outcome.sticky
+    game.timers.cancel_all()
+    checkpoints.mark(group_id)
 
     asyncio.create_task(start_round(context, group_id))
 
@@ -431,79 +310,59 @@ async def dm_pick_handler(update, context):
         return
 
     if user.id not in user_active_game:
-        await update.message.reply_text("♦ You are not currently participating in any active game.")
+        post_reply(update.message, "♦ You are not currently participating in any active game.")
         return
 
     group_id = user_active_game[user.id]
     if group_id not in active_games:
-        await update.message.reply_text("⚠️ The game you were in no longer exists.")
+        post_reply(update.message, "⚠️ The game you were in no longer exists.")
         user_active_game.pop(user.id, None)
         return
 
     game = active_games[group_id]
     if not getattr(game, "current_round_active", False):
-        await update.message.reply_text("⏳ There is no active round at the moment. Please wait for the next round to start.")
+        post_reply(update.message, "⏳ There is no active round at the moment. Please wait for the next round to start.")
         return
 
     text = (update.message.text or "").strip()
     if not text.isdigit():
-        await update.message.reply_text("♦ Invalid input. Please send a **plain number between 0 and 100** ")
+        post_reply(update.message, "♦ Invalid input. Please send a **plain number between 0 and 100** ")
         return
     num = int(text)
     if not 0 <= num <= 100:
-        await update.message.reply_text("⚠️ Your number must be between 0 and 100. Please try again.")
+        post_reply(update.message, "⚠️ Your number must be between 0 and 100. Please try again.")
         return
 
     if user.id not in game.players:
-        await update.message.reply_text("♦ You are not listed as a player in this game.")
+        post_reply(update.message, "♦ You are not listed as a player in this game.")
         return
 
     player = game.players[user.id]
     if getattr(player, "eliminated", False):
-        await update.message.reply_text("☠️ You have been eliminated and cannot participate in this round.")
+        post_reply(update.message, "☠️ You have been eliminated and cannot participate in this round.")
         return
 
     if getattr(player, "current_number", None) is not None:
-        await update.message.reply_text("♦ You have already submitted a number for this round.")
+        post_reply(update.message, "♦ You have already submitted a number for this round.")
         return
 
     player.current_number = num
+    checkpoints.mark(group_id)
 
-    # try to create group link
-    group_link = None
-    try:
-        chat = await context.bot.get_chat(group_id)
-        if getattr(chat, "username", None):
-            group_link = f"https://t.me/{chat.username}"
-        else:
-            chat_id_str = str(group_id)
-            if chat_id_str.startswith("-100"):
-                group_link = f"https://t.me/c/{chat_id_str[4:]}"
-    except:
-        pass
+    group_link = cached_group_link(group_id)
 
     if group_link:
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back to Game", url=group_link)]])
-        await update.message.reply_text(f"♦ Number received: <b>{num}</b>\n🎯 Get ready for the next round!", parse_mode="HTML", reply_markup=keyboard)
+        post_reply(update.message, f"♦ Number received: <b>{num}</b>\n🎯 Get ready for the next round!", parse_mode="HTML", reply_markup=keyboard)
     else:
-        await update.message.reply_text(f"♦ Number received: <b>{num}</b>\n🎯 Get ready for the next round!", parse_mode="HTML")
+        post_reply(update.message, f"♦ Number received: <b>{num}</b>\n🎯 Get ready for the next round!", parse_mode="HTML")
 
-    task = game.pick_tasks.pop(user.id, None)
-    if task and not task.done():
-        task.cancel()
-    task30 = game.pick_30_alerts.pop(user.id, None)
-    if task30 and not task30.done():
-        task30.cancel()
+    game.timers.cancel(user.id)
+    if game.reminder is not None:
+        game.reminder.refresh(context.bot, game)
 
     if all((pl.current_number is not None or getattr(pl, "eliminated", False)) for pl in game.players.values()):
-        for t in list(game.pick_tasks.values()):
-            if t and not t.done():
-                t.cancel()
-        for t in list(game.pick_30_alerts.values()):
-            if t and not t.done():
-                t.cancel()
-        game.pick_tasks.clear()
-        game.pick_30_alerts.clear()
+        game.timers.cancel_all()
         await process_round_results(context, group_id)
 
 async def end_game(context: ContextTypes.DEFAULT_TYPE, group_id: int):
@@ -539,138 +398,35 @@ async def end_game(context: ContextTypes.DEFAULT_TYPE, group_id: int):
         winner_id = getattr(winner, "user_id", None)
         text += f"🎉 Champion: <a href='tg://user?id={winner_id}'>{winner_name}</a> 🏆\n"
 
-    # --- Per-game rollup for group stats ---
-    try:
-        try:
-            chat_obj = await context.bot.get_chat(group_id)
-            group_title = getattr(chat_obj, "title", None) or "Unknown Group"
-        except Exception:
-            group_title = "Unknown Group"
-
-        # Build payloads from current game state
-        all_player_ids = list(game.players.keys())
-        winner_ids = [winner.user_id] if winner else []
-
-        # Use per-game totals as deltas for this finished game
-        scores_delta_dict = {p.user_id: int(getattr(p, "score", 0)) for p in game.players.values()}
-        elim_delta_dict = {p.user_id: (1 if getattr(p, "eliminated", False) else 0) for p in game.players.values()}
-        penalty_delta_dict = {p.user_id: int(getattr(p, "total_penalties", 0)) for p in game.players.values()}
-
-        user_names = {
-            p.user_id: (getattr(p, "name", None), getattr(p, "username", None))
-            for p in game.players.values()
-        }
-
-        record_group_game_end(
-            group_id=group_id,
-            group_title=group_title,
-            players=all_player_ids,
-            winners=winner_ids,
-            scores=scores_delta_dict,
-            elim_counts=elim_delta_dict,
-            penalty_counts=penalty_delta_dict,
-            user_names=user_names,
-        )
-    except Exception:
-        logger.exception("Failed to record per-group game summary")
-
+    # --- Persist users, group stats and the games row in one transaction ---
     try:
-        now_utc = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-        conn = sqlite3.connect(DB_PATH, timeout=10)
-        c = conn.cursor()
-        c.execute("INSERT INTO games (group_id, ended_at) VALUES (?, ?)", (group_id, now_utc))
-        conn.commit()
-        conn.close()
+        group_title = await chat_title(context.bot, group_id)
+        winner_uid = getattr(winner, "user_id", None) if winner else None
+        await run_write(commit_game_result, group_id, group_title, build_game_results(game, winner_uid),
+                        rounds=game.score_history)
     except Exception:
-        logger.exception("Failed to insert row into games")
-
-    async def send_scorecard():
-        try:
-            await context.bot.send_message(chat_id=group_id, text=text, parse_mode="HTML")
-        except Exception:
-            logger.exception("Failed to send scorecard")
+        logger.exception("Failed to persist game result for group %s", group_id)
 
-    async def send_winner_announcement():
-        if winner and VIDEO_WINNER:
-            try:
-                await context.bot.send_video(chat_id=group_id, video=VIDEO_WINNER, caption=f"🎉 Champion: <a href='tg://user?id={winner_id}'>{winner_name}</a> 🏆", parse_mode="HTML")
-            except:
-                try:
-                    await context.bot.send_message(chat_id=group_id, text=f"🎉 Champion: <a href='tg://user?id={winner_id}'>{winner_name}</a> 🏆", parse_mode="HTML")
-                except:
-                    pass
-        elif winner:
-            try:
-                await context.bot.send_message(chat_id=group_id, text=f"🎉 Champion: <a href='tg://user?id={winner_id}'>{winner_name}</a> 🏆", parse_mode="HTML")
-            except:
-                pass
-
-    async def send_new_game_notification():
-        try:
-            await context.bot.send_message(chat_id=group_id, text="The game has ended. You can start a new game anytime with /startgame.", parse_mode="HTML")
-        except:
-            pass
-
-    loop = asyncio.get_event_loop()
-    loop.call_later(0, lambda: asyncio.create_task(send_scorecard()))
-    loop.call_later(1, lambda: asyncio.create_task(send_winner_announcement()))
-    loop.call_later(2, lambda: asyncio.create_task(send_new_game_notification()))
-
-    # Save user stats (global)
-    for p in players_sorted:
-        try:
-            user_obj = type("U", (), {
-                "id": getattr(p, "user_id", None),
-                "first_name": getattr(p, "name", "Unknown"),
-                "username": getattr(p, "username", None)
-            })
-            ensure_user_exists(user_obj)
-            update_user_after_game(
-                user_id=getattr(p, "user_id", None),
-                score_delta=getattr(p, "score", 0),
-                won=(winner is not None and getattr(p, "user_id", None) == getattr(winner, "user_id", None)),
-                eliminated=getattr(p, "eliminated", False),
-                rounds_played=getattr(p, "rounds_played", 0),
-                penalties=getattr(p, "total_penalties", 0)
-            )
-        except Exception:
-            logger.exception("Failed to update stats for user %s", getattr(p, "user_id", None))
+    # queued in order on the group's outbound queue, so they arrive in this order
+    post(context.bot.send_message, chat_id=group_id, text=text, parse_mode="HTML")
+    if winner:
+        champion = f"🎉 Champion: <a href='tg://user?id={winner_id}'>{winner_name}</a> 🏆"
+        if VIDEO_WINNER:
+            post(context.bot.send_video, chat_id=group_id, video=VIDEO_WINNER, caption=champion, parse_mode="HTML",
+                 fallback=partial(context.bot.send_message, chat_id=group_id, text=champion, parse_mode="HTML"))
+        else:
+            post(context.bot.send_message, chat_id=group_id, text=champion, parse_mode="HTML")
+    post(context.bot.send_message, chat_id=group_id,
+         text="The game has ended. You can start a new game anytime with /startgame.", parse_mode="HTML")
 
     # Clear user→game mapping
     for p in players_sorted:
         user_active_game.pop(getattr(p, "user_id", None), None)
 
-    # cancel tasks (include 60s and 10s alerts too)
-    for t in list(getattr(game, "pick_tasks", {}).values()):
-        try:
-            if t and not t.done():
-                t.cancel()
-        except:
-            pass
-    for t in list(getattr(game, "pick_30_alerts", {}).values()):
-        try:
-            if t and not t.done():
-                t.cancel()
-        except:
-            pass
-    for t in list(getattr(game, "pick_60_alerts", {}).values()):
-        try:
-            if t and not t.done():
-                t.cancel()
-        except:
-            pass
-    for t in list(getattr(game, "pick_10_alerts", {}).values()):
-        try:
-            if t and not t.done():
-                t.cancel()
-        except:
-            pass
-
-    getattr(game, "pick_tasks", {}).clear()
-    getattr(game, "pick_30_alerts", {}).clear()
-    getattr(game, "pick_60_alerts", {}).clear()
-    getattr(game, "pick_10_alerts", {}).clear()
+    # cancel every pending reminder and timeout
+    game.timers.cancel_all()
 
     active_games.pop(group_id, None)
+    checkpoints.mark(group_id)
     logger.debug("Game ended and cleaned up for group %s", group_id)
 
@@ -0,0 +1,185 @@
+# plugins/game/history.py
+import struct
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, NamedTuple, Optional
+from plugins.connections.pool import db_read
+from plugins.connections.archive import ALIAS, archive_files, attached
+
+# Per-player flags inside a packed round
+FLAG_WINNER = 1
+FLAG_DUPLICATE = 2
+FLAG_TIMEOUT = 4
+FLAG_ELIMINATED = 8
+
+NO_PICK = 255
+
+# user_id, pick (0-100, NO_PICK), score delta this round, score after the round, flags
+_ENTRY = struct.Struct("<qBhhB")
+
+
+class RoundRecord(NamedTuple):
+    round_no: int
+    played_at: str          # UTC 'YYYY-MM-DD HH:MM:SS'
+    target: float
+    data: bytes             # packed player entries
+
+
+def pack_entries(entries) -> bytes:
+    """`entries` are (user_id, pick or None, delta, score, flags) tuples."""
+    out = bytearray()
+    for uid, pick, delta, score, flags in entries:
+        out += _ENTRY.pack(uid, NO_PICK if pick is None else int(pick), delta, score, flags)
+    return bytes(out)
+
+
+def unpack_entries(data: bytes) -> list[dict]:
+    return [
+        {"user_id": uid, "pick": None if pick == NO_PICK else pick, "delta": delta, "score": score, "flags": flags}
+        for uid, pick, delta, score, flags in _ENTRY.iter_unpack(data)
+    ]
+
+
+def snapshot_round(game, target: float, winners, duplicates, eliminated_now) -> RoundRecord:
+    """
+    Capture the round that `process_round_results` just scored. Only players
+    alive when the round started (`game.round_start_scores`) are recorded.
+    """
+    winners = {p.user_id for p in winners}
+    duplicates = {p.user_id for p in duplicates}
+    eliminated_now = {p.user_id for p in eliminated_now}
+    entries = []
+    for uid, start_score in game.round_start_scores.items():
+        p = game.players.get(uid)
+        if p is None:
+            continue
+        pick = p.current_number if isinstance(p.current_number, (int, float)) else None
+        flags = 0
+        if uid in winners:
+            flags |= FLAG_WINNER
+        if uid in duplicates:
+            flags |= FLAG_DUPLICATE
+        if p.current_number == "Skipped" or (pick is None and p.eliminated):
+            flags |= FLAG_TIMEOUT
+        if uid in eliminated_now or p.eliminated:
+            flags |= FLAG_ELIMINATED
+        entries.append((uid, pick, int(p.score - start_score), int(p.score), flags))
+    return RoundRecord(
+        game.round_number,
+        datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        float(target),
+        pack_entries(entries),
+    )
+
+
+def write_rounds(c, game_id: int, group_id: int, rounds: list[RoundRecord], user_ids):
+    """Append a finished game's rounds. Runs inside the game-end transaction."""
+    if not rounds:
+        return
+    c.executemany(
+        "INSERT INTO game_rounds (game_id, round_no, group_id, played_at, target, data) VALUES (?, ?, ?, ?, ?, ?)",
+        [(game_id, r.round_no, group_id, r.played_at, r.target, r.data) for r in rounds],
+    )
+    c.executemany("INSERT OR IGNORE INTO game_players (user_id, game_id) VALUES (?, ?)",
+                  [(uid, game_id) for uid in user_ids])
+
+
+def _row_to_round(row) -> dict:
+    game_id, round_no, group_id, played_at, target, data = row
+    return {
+        "game_id": game_id,
+        "round_no": round_no,
+        "group_id": group_id,
+        "played_at": played_at,
+        "target": target,
+        "players": unpack_entries(data),
+    }
+
+
+@contextmanager
+def _source(path: Optional[str]):
+    """A pooled read connection and table prefix for the live DB (None) or an archive."""
+    with db_read() as conn:
+        if path is None:
+            yield conn, ""
+        else:
+            with attached(conn, path):
+                yield conn, f"{ALIAS}."
+
+
+def iter_rounds(group_id: Optional[int] = None, user_id: Optional[int] = None,
+                since: Optional[str] = None, until: Optional[str] = None,
+                batch_size: int = 1000) -> Iterator[dict]:
+    """
+    Stream rounds, optionally filtered by group, by a player who took part,
+    and by a [since, until) UTC time range. Monthly archives overlapping the
+    range are read first, then the live table; within each, rounds come in
+    time order (a `user_id` stream goes game by game instead).
+
+    Each batch is a short keyset read on its own pooled connection, so a long
+    analytics scan never holds a read transaction open between batches.
+    """
+    time_sql, time_params = "", []
+    if since:
+        time_sql += " AND played_at >= ?"
+        time_params.append(since)
+    if until:
+        time_sql += " AND played_at < ?"
+        time_params.append(until)
+
+    for path in [p for _, p in archive_files(since, until)] + [None]:
+        if user_id is not None:
+            yield from _iter_user_rounds(path, user_id, group_id, time_sql, time_params, batch_size)
+        else:
+            yield from _iter_time_rounds(path, group_id, since, time_sql, time_params, batch_size)
+
+
+def _iter_time_rounds(path, group_id, since, time_sql, time_params, batch_size):
+    scope_sql, scope_params = "", []
+    if group_id is not None:
+        scope_sql, scope_params = " AND group_id = ?", [group_id]
+
+    # `since` seeds the keyset cursor so the scan starts on the index
+    cursor = (since or "", 0, 0)
+    while True:
+        with _source(path) as (conn, prefix):
+            rows = conn.execute(
+                f"""
+                SELECT game_id, round_no, group_id, played_at, target, data FROM {prefix}game_rounds
+                WHERE (played_at, game_id, round_no) > (?, ?, ?){scope_sql}{time_sql}
+                ORDER BY played_at, game_id, round_no
+                LIMIT ?
+                """,
+                (*cursor, *scope_params, *time_params, batch_size),
+            ).fetchall()
+        if not rows:
+            return
+        last = rows[-1]
+        cursor = (last[3], last[0], last[1])
+        for row in rows:
+            yield _row_to_round(row)
+
+
+def _iter_user_rounds(path, user_id, group_id, time_sql, time_params, batch_size):
+    after = 0
+    games_per_batch = max(1, batch_size // 10)
+    while True:
+        with _source(path) as (conn, prefix):
+            game_ids = [r[0] for r in conn.execute(
+                f"SELECT game_id FROM {prefix}game_players WHERE user_id = ? AND game_id > ? ORDER BY game_id LIMIT ?",
+                (user_id, after, games_per_batch),
+            )]
+            if not game_ids:
+                return
+            sql = f"""
+                SELECT game_id, round_no, group_id, played_at, target, data FROM {prefix}game_rounds
+                WHERE game_id IN ({",".join("?" * len(game_ids))}){time_sql}
+            """
+            params = [*game_ids, *time_params]
+            if group_id is not None:
+                sql += " AND group_id = ?"
+                params.append(group_id)
+            rows = conn.execute(sql + " ORDER BY game_id, round_no", params).fetchall()
+        after = game_ids[-1]
+        for row in rows:
+            yield _row_to_round(row)
@@ -1,23 +1,26 @@
 import asyncio
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, filters
-from plugins.game.core import MindScaleGame, active_games, user_active_game, start_round, mention_html
-from plugins.game.db import ensure_user_exists, ensure_group_exists, ensure_columns_exist, update_user_after_game
+from plugins.game.core import MindScaleGame, active_games, user_active_game, start_round, mention_html, build_game_results, checkpoints
+from plugins.game.db import ensure_group_exists, commit_game_result
+from plugins.connections.worker import run_write
+from plugins.connections.writebehind import touch_user
 from config import JOIN_TIME_SEC, MIN_PLAYERS, MAX_PLAYERS
 from plugins.helpers.leaderboard import get_user_rank
 from plugins.utils.decorators import admin_only, mod_or_owner
 from plugins.helpers.notify import notify_on_new_game
+from plugins.utils.outbound import post, reply
 import logging, time
 
 logger = logging.getLogger(__name__)
 
 async def startgame(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.type == 'private':
-        await update.message.reply_text("❌ /startgame can only be used in groups!")
+        await reply(update.message, "❌ /startgame can only be used in groups!")
         return
     group_id = update.effective_chat.id
     if group_id in active_games:
-        await update.message.reply_text("❌ A game is already running in this group.")
+        await reply(update.message, "❌ A game is already running in this group.")
         return
 
     buttons = InlineKeyboardMarkup([
@@ -30,12 +33,10 @@ async def startgame(update: Update, context: ContextTypes.DEFAULT_TYPE):
         reply_markup=buttons
     )
 
-    invite_link = (await context.bot.export_chat_invite_link(group_id))  # if group is private
     await notify_on_new_game(
         context,
         group_id=update.effective_chat.id,
         group_title=update.effective_chat.title,
-        group_invite_link=invite_link
     )
 
 async def mode_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -52,7 +53,7 @@ async def mode_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         game = MindScaleGame(group_id)
         active_games[group_id] = game
-        ensure_group_exists(group_id, getattr(update.effective_chat, "title", "Unknown Group"))
+        await run_write(ensure_group_exists, group_id, getattr(update.effective_chat, "title", "Unknown Group"))
         welcome_text = f"""🎲 Mind Scale Game Starting (Solo Mode) 🎲
 
 Use /join to join the current game
@@ -81,10 +82,8 @@ async def join_phase_scheduler(context: ContextTypes.DEFAULT_TYPE, group_id: int
         if (group_id in active_games and
             active_games[group_id].join_phase_active and
             getattr(active_games[group_id], "join_deadline", 0) == game.join_deadline):
-            await context.bot.send_message(
-                chat_id=group_id,
-                text=f"⏱ Hurry up! Only {seconds_left} seconds left to /join the game!"
-            )
+            post(context.bot.send_message, chat_id=group_id,
+                 text=f"⏱ Hurry up! Only {seconds_left} seconds left to /join the game!")
 
     tasks = []
     for sec in [120, 60, 30, 10]:
@@ -118,10 +117,11 @@ async def end_join_phase(context: ContextTypes.DEFAULT_TYPE, group_id: int):
     num_joined = len(game.players)
 
     if num_joined < MIN_PLAYERS:
-        await context.bot.send_message(chat_id=group_id, text=f"❌  𝗝𝗼𝗶𝗻 𝗣𝗵𝗮𝘀𝗲 𝗘𝗻𝗱𝗲𝗱』\n\n🚫 Not enough players joined ({num_joined}/{MIN_PLAYERS}).\nThe game has been canceled.", parse_mode="HTML")
+        post(context.bot.send_message, chat_id=group_id, text=f"❌  𝗝𝗼𝗶𝗻 𝗣𝗵𝗮𝘀𝗲 𝗘𝗻𝗱𝗲𝗱』\n\n🚫 Not enough players joined ({num_joined}/{MIN_PLAYERS}).\nThe game has been canceled.", parse_mode="HTML")
         for p in game.players.values():
             user_active_game.pop(p.user_id, None)
         del active_games[group_id]
+        checkpoints.mark(group_id)
         return
 
     if num_joined > MAX_PLAYERS:
@@ -129,27 +129,24 @@ async def end_join_phase(context: ContextTypes.DEFAULT_TYPE, group_id: int):
         removed_players = list(game.players.values())[MAX_PLAYERS:]
         game.players = {p.user_id: p for p in joined_players}
         for p in removed_players:
-            try:
-                await context.bot.send_message(chat_id=p.user_id, text=f"⚠️ Sorry! The match can only have {MAX_PLAYERS} players. You won't be playing this round.")
-            except:
-                pass
+            post(context.bot.send_message, chat_id=p.user_id, text=f"⚠️ Sorry! The match can only have {MAX_PLAYERS} players. You won't be playing this round.")
 
     players_list = "\n".join([f"♦️ <a href='tg://user?id={p.user_id}'>{p.name}</a>" for p in game.players.values()])
 
-    await context.bot.send_message(chat_id=group_id, text=(f"『 𝗠𝗮𝘁𝗰𝗵 𝗦𝗲𝘁𝘁𝗹𝗲𝗱 』\n\n🎲 Players Joined ({len(game.players)}):\n{players_list}\n\n⊱⋅ ─────────── ⋅⊰\n\n✧ Brace yourselves! The game is about to begin! 🚀"), parse_mode="HTML")
+    post(context.bot.send_message, chat_id=group_id, text=(f"『 𝗠𝗮𝘁𝗰𝗵 𝗦𝗲𝘁𝘁𝗹𝗲𝗱 』\n\n🎲 Players Joined ({len(game.players)}):\n{players_list}\n\n⊱⋅ ─────────── ⋅⊰\n\n✧ Brace yourselves! The game is about to begin! 🚀"), parse_mode="HTML")
     await start_round(context, group_id)
 
 async def extend(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if update.effective_chat.type not in (filters.ChatType.GROUP, filters.ChatType.SUPERGROUP, 'group', 'supergroup'):
-        await update.message.reply_text("❌ /extend can only be used in groups!")
+        await reply(update.message, "❌ /extend can only be used in groups!")
         return
 
     group_id = update.effective_chat.id
 
     game = active_games.get(group_id)
     if not game or not getattr(game, "join_phase_active", False):
-        await update.message.reply_text("⚠️ No join phase is active right now.")
+        await reply(update.message, "⚠️ No join phase is active right now.")
         return
 
     try:
@@ -158,10 +155,10 @@ async def extend(update: Update, context: ContextTypes.DEFAULT_TYPE):
         extra = 30
 
     if extra <= 0:
-        await update.message.reply_text("⚠️ Please provide a positive number of seconds.")
+        await reply(update.message, "⚠️ Please provide a positive number of seconds.")
         return
     if extra > 240:
-        await update.message.reply_text("⚠️ Maximum extension is 4 minutes.")
+        await reply(update.message, "⚠️ Maximum extension is 4 minutes.")
         return
 
     now = time.monotonic()
@@ -185,10 +182,8 @@ async def extend(update: Update, context: ContextTypes.DEFAULT_TYPE):
     async def schedule_alert(delay, seconds_left):
         await asyncio.sleep(delay)
         if group_id in active_games and active_games[group_id].join_phase_active and active_games[group_id].join_deadline == new_deadline:
-            await context.bot.send_message(
-                chat_id=group_id,
-                text=f"⏱ Hurry up! Only {seconds_left} seconds left to /join the game!"
-            )
+            post(context.bot.send_message, chat_id=group_id,
+                 text=f"⏱ Hurry up! Only {seconds_left} seconds left to /join the game!")
 
     for sec in [120, 60, 30, 10]:
         delay = max(0, new_total - sec)
@@ -206,14 +201,14 @@ async def extend(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return f"{m}m"
         return f"{s}s"
 
-    await update.message.reply_text(
+    await reply(update.message,
         f"✅ Join phase extended by {fmt(extra)}.\n"
         f"🕒 Time remaining: {fmt(new_total)}."
     )
 
 async def join(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.type == "private":
-        await update.message.reply_text("⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ Use /join in the group where the game is running.")
+        await reply(update.message, "⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ Use /join in the group where the game is running.")
         return
 
     group_id = update.effective_chat.id
@@ -221,25 +216,26 @@ async def join(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if user.id in user_active_game:
         gid = user_active_game[user.id]
-        await update.message.reply_text(f" ⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ You are already playing in another group (`{gid}`). Finish it first!", parse_mode="Markdown")
+        await reply(update.message, f" ⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ You are already playing in another group (`{gid}`). Finish it first!", parse_mode="Markdown")
         return
 
     if group_id not in active_games:
-        await update.message.reply_text(" ⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ No active game. Start one with /startgame")
+        await reply(update.message, " ⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ No active game. Start one with /startgame")
         return
 
     game = active_games[group_id]
     if not getattr(game, "join_phase_active", False):
-        await update.message.reply_text(" ⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ Join phase is already closed!")
+        await reply(update.message, " ⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ Join phase is already closed!")
         return
 
     if len(getattr(game, "players", [])) >= MAX_PLAYERS:
-        await update.message.reply_text(f"⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ The game already has {MAX_PLAYERS} players. Cannot join.")
+        await reply(update.message, f"⚠️ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n❌ The game already has {MAX_PLAYERS} players. Cannot join.")
         return
 
-    ensure_user_exists(user)
+    touch_user(user)
     game.add_player(user)
-    await update.message.reply_text(f" ✅ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n✨ <b>{user.full_name}</b> joined the match!", parse_mode="HTML")
+    checkpoints.mark(group_id)
+    await reply(update.message, f" ✅ 𝗝𝗼𝗶𝗻 𝗚𝗮𝗺𝗲 \n\n✨ <b>{user.full_name}</b> joined the match!", parse_mode="HTML")
 
     if len(game.players) == MAX_PLAYERS:
         join_timer = getattr(game, "join_timer_task", None)
@@ -248,41 +244,42 @@ async def join(update: Update, context: ContextTypes.DEFAULT_TYPE):
             game.join_timer_task = None
         game.join_phase_active = False
         game.game_started = True
-        await context.bot.send_message(chat_id=group_id, text=f" 🚀 𝗠𝗮𝘁𝗰𝗵 𝗦𝘁𝗮𝗿𝘁 \n\n✅ {MAX_PLAYERS} players joined! Starting immediately...")
+        post(context.bot.send_message, chat_id=group_id, text=f" 🚀 𝗠𝗮𝘁𝗰𝗵 𝗦𝘁𝗮𝗿𝘁 \n\n✅ {MAX_PLAYERS} players joined! Starting immediately...")
         await start_round(context, group_id)
 
 async def leave(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.type == "private":
-        await update.message.reply_text(" ⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲\n\n❌ Use /leave in the group.")
+        await reply(update.message, " ⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲\n\n❌ Use /leave in the group.")
         return
 
     group_id = update.effective_chat.id
     user_id = update.effective_user.id
 
     if group_id not in active_games:
-        await update.message.reply_text("⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲 \n\n❌ No active game.")
+        await reply(update.message, "⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲 \n\n❌ No active game.")
         return
 
     game = active_games[group_id]
     if not game.join_phase_active:
-        await update.message.reply_text("⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲 \n\n❌ You cannot leave after the match has started.")
+        await reply(update.message, "⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲 \n\n❌ You cannot leave after the match has started.")
         return
 
     if user_id not in game.players:
-        await update.message.reply_text(" ⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲\n\n❌ You are not part of this game.")
+        await reply(update.message, " ⚠️ 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲\n\n❌ You are not part of this game.")
         return
 
     game.remove_player(user_id)
-    await update.message.reply_text(f" 👋 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲 \n\n🚪 <b>{update.effective_user.full_name}</b> has left the match.", parse_mode="HTML")
+    checkpoints.mark(group_id)
+    await reply(update.message, f" 👋 𝗟𝗲𝗮𝘃𝗲 𝗚𝗮𝗺𝗲 \n\n🚪 <b>{update.effective_user.full_name}</b> has left the match.", parse_mode="HTML")
 
 async def players(update: Update, context: ContextTypes.DEFAULT_TYPE):
     group_id = update.effective_chat.id
     if group_id not in active_games:
-        await update.message.reply_text("『 ⚠️ 𝗣𝗹𝗮𝘆𝗲𝗿𝘀 𝗟𝗶𝘀𝘁 』\n\n❌ No active game found.")
+        await reply(update.message, "『 ⚠️ 𝗣𝗹𝗮𝘆𝗲𝗿𝘀 𝗟𝗶𝘀𝘁 』\n\n❌ No active game found.")
         return
     game = active_games[group_id]
     if not game.players:
-        await update.message.reply_text("『 ⚠️ 𝗣𝗹𝗮𝘆𝗲𝗿𝘀 𝗟𝗶𝘀𝘁 』\n\n❌ No players joined yet.")
+        await reply(update.message, "『 ⚠️ 𝗣𝗹𝗮𝘆𝗲𝗿𝘀 𝗟𝗶𝘀𝘁 』\n\n❌ No players joined yet.")
         return
 
     text = " 🎲 𝗖𝘂𝗿𝗿𝗲𝗻𝘁 𝗣𝗹𝗮𝘆𝗲𝗿𝘀 🎲 \n\n"
@@ -298,7 +295,7 @@ async def endmatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat = update.effective_chat
 
     buttons = InlineKeyboardMarkup([[InlineKeyboardButton("✅ Confirm End Match", callback_data=f"confirm_endmatch:{chat.id}")]])
-    await update.message.reply_text(" ⚠️ 𝗘𝗻𝗱 𝗠𝗮𝘁𝗰𝗵 \n\n⚠️ Are you sure you want to end the current game?", reply_markup=buttons)
+    await reply(update.message, " ⚠️ 𝗘𝗻𝗱 𝗠𝗮𝘁𝗰𝗵 \n\n⚠️ Are you sure you want to end the current game?", reply_markup=buttons)
 
 async def confirm_endmatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -319,34 +316,21 @@ async def confirm_endmatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if group_id not in active_games:
         await query.edit_message_text(" ⚠️ 𝗘𝗻𝗱 𝗠𝗮𝘁𝗰𝗵 \n\n❌ No active game to end.")
         return
-    game = active_games[group_id]
-    for task in list(game.pick_tasks.values()) + list(game.pick_30_alerts.values()):
-        if not task.done():
-            task.cancel()
-    game.pick_tasks.clear()
-    game.pick_30_alerts.clear()
-
-    for p in game.players.values():
-        class UserObj:
-            def __init__(self, user_id, name, username):
-                self.id = user_id
-                self.first_name = name
-                self.username = username
-        u = UserObj(p.user_id, p.name, p.username)
-        ensure_user_exists(u)
-        update_user_after_game(
-            user_id=p.user_id,
-            score_delta=getattr(p, "total_score", p.score),
-            rounds_played=getattr(p, "rounds_played", 0),
-            eliminated=getattr(p, "eliminated", False),
-            penalties=getattr(p, "total_penalties", 0),
-            won=False
-        )
-
+    game = active_games.pop(group_id)
+    # take the game out before awaiting, so a pick or timeout handled
+    # meanwhile can't run end_game and record it a second time
+    game.ended = True
+    game.timers.cancel_all()
     for p in game.players.values():
         user_active_game.pop(p.user_id, None)
+    checkpoints.mark(group_id)
+
+    # Admin-ended games only count towards the players' global stats
+    try:
+        await run_write(commit_game_result, group_id, None, build_game_results(game), record_group=False)
+    except Exception:
+        logger.exception("Failed to persist stats for ended game in group %s", group_id)
 
-    del active_games[group_id]
     await query.edit_message_text(f" ✅ 𝗚𝗮𝗺𝗲 𝗘𝗻𝗱𝗲𝗱 \n\n☑️ Game ended by admin {user.first_name}.\n⏳ All timers cleared.")
 
 @admin_only
@@ -358,7 +342,7 @@ async def forcestart(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Check if a game exists
     if group_id not in active_games:
-        await update.message.reply_text(
+        await reply(update.message,
             "⚠️ 𝗙𝗼𝗿𝗰𝗲 𝗦𝘁𝗮𝗿𝘁\n\n❌ No active game to start."
         )
         return
@@ -367,14 +351,14 @@ async def forcestart(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Check if join phase is active
     if not game.join_phase_active:
-        await update.message.reply_text(
+        await reply(update.message,
             "⚠️ 𝗙𝗼𝗿𝗰𝗲 𝗦𝘁𝗮𝗿𝘁\n\n❌ Join phase is already closed!"
         )
         return
 
     # Check minimum players
     if len(game.players) < MIN_PLAYERS:
-        await update.message.reply_text(
+        await reply(update.message,
             f"⚠️ 𝗙𝗼𝗿𝗰𝗲 𝗦𝘁𝗮𝗿𝘁\n\n❌ Not enough players joined ({len(game.players)}/{MIN_PLAYERS})."
         )
         return
@@ -386,9 +370,7 @@ async def forcestart(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # End join phase and start game
     game.join_phase_active = False
-    await context.bot.send_message(
-        chat_id=group_id,
-        text=f"🚀 𝗙𝗼𝗿𝗰𝗲 𝗦𝘁𝗮𝗿𝘁\n\n✅ Admin - {user.first_name} has started the game early!"
-    )
+    post(context.bot.send_message, chat_id=group_id,
+         text=f"🚀 𝗙𝗼𝗿𝗰𝗲 𝗦𝘁𝗮𝗿𝘁\n\n✅ Admin - {user.first_name} has started the game early!")
     await end_join_phase(context, group_id)
 
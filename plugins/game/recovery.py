@@ -0,0 +1,134 @@
+# plugins/game/recovery.py
+import asyncio
+import logging
+import time
+from telegram.ext import ContextTypes
+from config import PICK_TIME_SEC, SNAPSHOT_MAX_AGE_SEC, SNAPSHOT_RESUME_GRACE_SEC
+from plugins.connections.worker import run_read, run_write
+from plugins.game.core import (
+    MindScaleGame, Player, active_games, user_active_game, checkpoints, arm_reminders,
+    handle_miss, mention_html, process_round_results, start_round,
+)
+from plugins.game.lobby import join_phase_scheduler
+from plugins.game.reminders import RoundReminder
+from plugins.game.snapshots import (
+    SNAP_ROUND_ACTIVE, SNAP_JOIN_PHASE, SNAP_STICKY, Snapshot, load_snapshots, write_snapshots,
+)
+from plugins.utils.outbound import post
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_game(snap: Snapshot) -> MindScaleGame:
+    """A MindScaleGame in the state the snapshot recorded, with no timers armed."""
+    game = MindScaleGame(snap.group_id)
+    game.round_number = snap.round_no
+    game.join_phase_active = bool(snap.state & SNAP_JOIN_PHASE)
+    game.duplicate_rule_sticky = bool(snap.state & SNAP_STICKY)
+    game.score_history = list(snap.rounds)
+    for s in snap.players:
+        p = Player(s.user_id, s.name, s.username)
+        p.score = s.score
+        p.total_penalties = s.total_penalties
+        p.rounds_played = s.rounds_played
+        p.current_number = s.pick
+        p.eliminated = s.eliminated
+        p.timeout_penalty_applied = s.timeout_penalty_applied
+        p.timeout_count = s.timeout_count
+        p.miss_offenses = s.miss_offenses
+        game.players[p.user_id] = p
+        if s.start_score is not None:
+            game.round_start_scores[p.user_id] = s.start_score
+    return game
+
+
+async def _resume_round(context: ContextTypes.DEFAULT_TYPE, game: MindScaleGame, snap: Snapshot, now: float):
+    """Re-arm each pending player's pick timer with the time they had left."""
+    group_id = game.group_id
+    game.current_round_active = True
+    game.reminder = RoundReminder(group_id, mention_html)
+    deadlines = {s.user_id: s.deadline for s in snap.players}
+    pending = [p for p in game.active_players if p.current_number is None]
+    if not pending:
+        await process_round_results(context, group_id)
+        return
+
+    longest = 0.0
+    for p in pending:
+        deadline = deadlines.get(p.user_id)
+        # no deadline: their round DM was still in flight when the bot went down
+        left = PICK_TIME_SEC if deadline is None else max(deadline - now, SNAPSHOT_RESUME_GRACE_SEC)
+        game.timers.schedule(p.user_id, "timeout", left, lambda uid=p.user_id: handle_miss(context, group_id, uid))
+        longest = max(longest, left)
+    arm_reminders(context, game, longest)
+
+    names = ", ".join(mention_html(p) for p in pending)
+    post(context.bot.send_message, chat_id=group_id, parse_mode="HTML",
+         text=f"♻️ The bot restarted. 𝗥𝗼𝘂𝗻𝗱 {game.round_number} resumes!\n\n"
+              f"⏳ Waiting for: {names}\nYou have {int(longest)} seconds to send your number in DM.")
+
+
+async def resume_games(app) -> int:
+    """
+    Boot: rebuild every checkpointed game, re-arm its timers with the time
+    that was left and announce the resume in the group. Checkpoints older
+    than SNAPSHOT_MAX_AGE_SEC are dropped. Returns the number of games resumed.
+    """
+    try:
+        snaps = await run_read(load_snapshots)
+    except Exception:
+        logger.exception("Failed to load game checkpoints")
+        return 0
+
+    context = app.context_types.context(app)
+    now = time.time()
+    dropped, resumed = [], []
+    for snap in snaps:
+        game = rebuild_game(snap)
+        too_old = now - snap.saved_at > SNAPSHOT_MAX_AGE_SEC
+        finished = not game.join_phase_active and len(game.active_players) <= 1
+        taken = snap.group_id in active_games or any(uid in user_active_game for uid in game.players)
+        if too_old or finished or taken:
+            dropped.append(snap.group_id)
+            continue
+
+        active_games[snap.group_id] = game
+        for uid in game.players:
+            user_active_game[uid] = snap.group_id
+        resumed.append(snap.group_id)
+        try:
+            if game.join_phase_active:
+                post(context.bot.send_message, chat_id=snap.group_id,
+                     text=f"♻️ The bot restarted. The lobby is back with {len(game.players)} player(s) "
+                          f"and the join timer starts over. Use /join to play!")
+                asyncio.create_task(join_phase_scheduler(context, snap.group_id))
+            elif snap.state & SNAP_ROUND_ACTIVE:
+                await _resume_round(context, game, snap, now)
+            else:
+                post(context.bot.send_message, chat_id=snap.group_id,
+                     text=f"♻️ The bot restarted. The game continues with round {game.round_number + 1}!")
+                asyncio.create_task(start_round(context, snap.group_id))
+        except Exception:
+            logger.exception("Failed to resume game in group %s", snap.group_id)
+
+    checkpoints.saved(resumed)
+    for gid in resumed:
+        checkpoints.mark(gid)
+    if dropped:
+        try:
+            await run_write(write_snapshots, [], dropped)
+        except Exception:
+            logger.exception("Failed to drop %d stale checkpoint(s)", len(dropped))
+    if snaps:
+        logger.info("Resumed %d game(s) from checkpoints, dropped %d", len(resumed), len(dropped))
+    return len(resumed)
+
+
+async def checkpoint_job(context: ContextTypes.DEFAULT_TYPE):
+    """Periodic sweep: rewrite every running game and drop the rows of ended ones."""
+    await checkpoints.flush(everything=True)
+
+
+async def flush_checkpoints():
+    """Shutdown: write the latest state of every running game."""
+    await checkpoints.flush(everything=True)
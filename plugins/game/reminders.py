@@ -0,0 +1,87 @@
+# plugins/game/reminders.py
+import asyncio
+import logging
+from typing import Callable, Optional
+from telegram.error import BadRequest
+from plugins.utils.outbound import send
+
+logger = logging.getLogger(__name__)
+
+
+class RoundReminder:
+    """
+    The single "seconds left" message of a round. The first threshold posts
+    it, later thresholds and every pick/timeout edit it in place, so a round
+    costs at most 1 send + (thresholds - 1 + players) edits instead of one
+    message per player and threshold.
+    """
+
+    def __init__(self, group_id: int, mention: Callable):
+        self.group_id = group_id
+        self.mention = mention
+        self.message_id: Optional[int] = None
+        self.secs_left: Optional[int] = None
+        self._shown: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._stale = None                          # (bot, game) awaiting a refresh
+        self._refresher: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def pending(game) -> list:
+        return [p for p in game.active_players if p.current_number is None]
+
+    def _text(self, pending) -> str:
+        if not pending:
+            return "✅ All numbers are in!"
+        names = ", ".join(self.mention(p) for p in pending)
+        return f"⏳ {self.secs_left} seconds left to send your number in DM!\n\nWaiting for: {names}"
+
+    async def post(self, bot, game, secs_left: int):
+        """Threshold reached: post the reminder, or edit the existing one."""
+        async with self._lock:
+            pending = self.pending(game)
+            if self.message_id is None and not pending:
+                return
+            self.secs_left = secs_left
+            await self._show(bot, pending)
+
+    def refresh(self, bot, game):
+        """
+        A player picked or timed out: drop them from the posted reminder.
+        Not awaited, so a throttled group never holds up the pick handler;
+        refreshes that arrive while an edit is in flight collapse into one
+        edit showing the latest pending set.
+        """
+        if self.message_id is None:
+            return
+        self._stale = (bot, game)
+        if self._refresher is None:
+            self._refresher = asyncio.get_running_loop().create_task(self._catch_up())
+
+    async def _catch_up(self):
+        try:
+            while self._stale is not None:
+                bot, game = self._stale
+                self._stale = None
+                async with self._lock:
+                    await self._show(bot, self.pending(game))
+        finally:
+            self._refresher = None
+
+    async def _show(self, bot, pending):
+        text = self._text(pending)
+        if text == self._shown:
+            return
+        try:
+            if self.message_id is None:
+                msg = await send(bot.send_message, chat_id=self.group_id, text=text, parse_mode="HTML")
+                self.message_id = msg.message_id
+            else:
+                await send(bot.edit_message_text, chat_id=self.group_id, message_id=self.message_id,
+                           text=text, parse_mode="HTML")
+            self._shown = text
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                logger.warning("Reminder update failed in %s: %s", self.group_id, e)
+        except Exception as e:
+            logger.warning("Reminder update failed in %s: %s", self.group_id, e)
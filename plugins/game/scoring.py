@@ -0,0 +1,141 @@
+# plugins/game/scoring.py
+from typing import NamedTuple, Optional, Sequence, Tuple
+from config import TARGET_PERCENTAGE, ELIMINATION_POINT
+
+# Which special rule decided the round (RoundOutcome.rule)
+RULE_CLOSEST = 0
+RULE_ZERO_VS_HUNDRED = 1
+RULE_EXACT_TARGET = 2
+
+
+class RoundOutcome(NamedTuple):
+    """
+    Result of one scored round. Player positions index the sequences passed
+    to `score_round` (the order of `game.players`). Every delta is a penalty,
+    so a player's penalty count grows by `-deltas[i]`.
+    """
+    target: Optional[float]            # None: nobody alive sent a number
+    deltas: Tuple[int, ...]
+    winners: Tuple[int, ...]
+    duplicates: Tuple[int, ...]        # players penalised for a duplicate pick
+    eliminated: Tuple[int, ...]        # reached the elimination score this round
+    rule: int
+    duplicates_active: bool            # duplicate penalty applied this round
+    sticky_triggered: bool             # 4+ equal picks: penalty sticks from next round
+    sticky: bool                       # duplicate_rule_sticky for the next round
+    alive_after: int
+
+
+def score_round(picks: Sequence, scores: Sequence[int], eliminated: Sequence[bool],
+                sticky: bool, timeout_exempt: Optional[Sequence[bool]] = None) -> RoundOutcome:
+    """
+    Score one round without touching the game or Telegram.
+
+    `picks[i]` is the number player i sent (int/float) or anything else for
+    no pick ("Skipped", None). `sticky` is the game's duplicate_rule_sticky
+    going into the round. Rules, in order:
+
+    - target = mean of the alive players' numbers * TARGET_PERCENTAGE
+    - duplicate penalty (-1 each) when a player is already out and more than
+      two are alive, or while the sticky rule is on; 4+ equal picks with
+      nobody out turns the sticky rule on from the next round, and it drops
+      once two or fewer are alive
+    - closest to the target wins; everyone else alive loses 1, unless
+      duplicates were penalised this round
+    - two alive, one picked 0 and the other 100: 100 wins, the other loses 1
+    - with 2+ players out (and no 0-vs-100 or duplicates), hitting
+      round(target) exactly wins and every other alive player loses 2
+    - a score at or below ELIMINATION_POINT eliminates the player
+    """
+    n = len(scores)
+    alive = eliminated_before = 0
+    total = 0
+    count = 0
+    counts = {}
+    idx_100 = -1
+    has_zero = False
+    for i in range(n):
+        if eliminated[i]:
+            eliminated_before += 1
+            continue
+        alive += 1
+        v = picks[i]
+        if isinstance(v, (int, float)):
+            total += v
+            count += 1
+            counts[v] = counts.get(v, 0) + 1
+            if v == 100 and idx_100 < 0:
+                idx_100 = i
+            elif v == 0:
+                has_zero = True
+
+    if not count:
+        return RoundOutcome(None, (0,) * n, (), (), (), RULE_CLOSEST, False, False, sticky, alive)
+
+    target = total / count * TARGET_PERCENTAGE
+
+    # duplicate rule state for this round
+    if alive <= 2:
+        sticky = False
+    sticky_triggered = eliminated_before == 0 and any(c >= 4 for c in counts.values())
+    duplicates_active = (alive > 2 and eliminated_before >= 1) or sticky
+    if duplicates_active and not any(c > 1 for c in counts.values()):
+        duplicates_active = False
+
+    deltas = [0] * n
+    is_dup = [False] * n
+    duplicates = []
+    winners = []
+    best = None
+    exact = []
+    exact_value = round(target)
+    for i in range(n):
+        if eliminated[i]:
+            continue
+        v = picks[i]
+        if not isinstance(v, (int, float)):
+            continue
+        if duplicates_active and counts[v] > 1:
+            is_dup[i] = True
+            duplicates.append(i)
+            deltas[i] -= 1
+        d = abs(v - target)
+        if best is None or d < best:
+            best = d
+            winners = [i]
+        elif d == best:
+            winners.append(i)
+        if v == exact_value:
+            exact.append(i)
+
+    rule = RULE_CLOSEST
+    if alive == 2 and has_zero and idx_100 >= 0:
+        rule = RULE_ZERO_VS_HUNDRED
+        winners = [idx_100]
+        for i in range(n):
+            if not eliminated[i] and i != idx_100 and not is_dup[i]:
+                deltas[i] -= 1
+    elif eliminated_before >= 2 and not duplicates_active and exact:
+        rule = RULE_EXACT_TARGET
+        winners = exact
+        exact_set = set(exact)
+        for i in range(n):
+            if not eliminated[i] and i not in exact_set:
+                deltas[i] -= 2
+
+    if rule == RULE_CLOSEST and not duplicates_active:
+        winner_set = set(winners)
+        for i in range(n):
+            if eliminated[i] or i in winner_set or (timeout_exempt is not None and timeout_exempt[i]):
+                continue
+            deltas[i] -= 1
+
+    out = []
+    for i in range(n):
+        if not eliminated[i] and scores[i] + deltas[i] <= ELIMINATION_POINT:
+            out.append(i)
+
+    return RoundOutcome(
+        target, tuple(deltas), tuple(winners), tuple(duplicates), tuple(out), rule,
+        duplicates_active, sticky_triggered, sticky or sticky_triggered, alive - len(out),
+    )
@@ -0,0 +1,202 @@
+# plugins/game/snapshots.py
+import asyncio
+import logging
+import struct
+import time
+from typing import Dict, List, NamedTuple, Optional
+from config import SNAPSHOT_DEBOUNCE_SEC
+from plugins.connections.pool import db_read, db_write
+from plugins.connections.worker import run_write
+from plugins.game.history import NO_PICK, RoundRecord
+
+logger = logging.getLogger(__name__)
+
+# game_snapshots.state flags
+SNAP_ROUND_ACTIVE = 1
+SNAP_JOIN_PHASE = 2
+SNAP_STICKY = 4
+
+# per-player flags
+_ELIMINATED = 1
+_TIMEOUT_APPLIED = 2
+_IN_ROUND = 4           # alive when the round started (has a round_start_scores entry)
+
+SKIPPED = 254           # pick slot: timed out this round ("Skipped")
+
+# user_id, score, score at round start, total_penalties, rounds_played,
+# pick, flags, timeout_count, miss_offenses, pick deadline (unix time, 0 = none)
+_PLAYER = struct.Struct("<qhhhhBBBBd")
+# round_no, played_at, target, packed entries length (entries follow)
+_ROUND = struct.Struct("<I19sdH")
+
+
+class PlayerState(NamedTuple):
+    user_id: int
+    name: str
+    username: Optional[str]
+    score: int
+    start_score: Optional[int]
+    total_penalties: int
+    rounds_played: int
+    pick: object            # int, "Skipped" or None
+    eliminated: bool
+    timeout_penalty_applied: bool
+    timeout_count: int
+    miss_offenses: int
+    deadline: Optional[float]
+
+
+class Snapshot(NamedTuple):
+    group_id: int
+    saved_at: float
+    round_no: int
+    state: int
+    players: List[PlayerState]
+    rounds: List[RoundRecord]
+
+
+def _pick_code(pick) -> int:
+    if isinstance(pick, (int, float)):
+        return int(pick)
+    return SKIPPED if pick == "Skipped" else NO_PICK
+
+
+def pack_game(game, now: Optional[float] = None) -> tuple:
+    """One game_snapshots row for `game`; pick deadlines become absolute times."""
+    now = time.time() if now is None else now
+    players = bytearray()
+    names = []
+    for p in game.players.values():
+        flags = (_ELIMINATED if p.eliminated else 0) | (_TIMEOUT_APPLIED if p.timeout_penalty_applied else 0)
+        start = game.round_start_scores.get(p.user_id)
+        if start is not None:
+            flags |= _IN_ROUND
+        left = game.timers.remaining(p.user_id, "timeout")
+        players += _PLAYER.pack(p.user_id, p.score, start or 0, p.total_penalties, p.rounds_played,
+                                _pick_code(p.current_number), flags, min(p.timeout_count, 255),
+                                min(p.miss_offenses, 255), 0.0 if left is None else now + left)
+        names += (p.name or "", p.username or "")
+    rounds = bytearray()
+    for r in game.score_history:
+        rounds += _ROUND.pack(r.round_no, r.played_at.encode(), r.target, len(r.data)) + r.data
+    state = ((SNAP_ROUND_ACTIVE if game.current_round_active else 0)
+             | (SNAP_JOIN_PHASE if game.join_phase_active else 0)
+             | (SNAP_STICKY if game.duplicate_rule_sticky else 0))
+    return (game.group_id, now, game.round_number, state, bytes(players),
+            "\0".join(names).encode(), bytes(rounds))
+
+
+def unpack_row(row) -> Snapshot:
+    group_id, saved_at, round_no, state, players, names, rounds = row
+    names = bytes(names).decode().split("\0") if names else []
+    out = []
+    for i, (uid, score, start, penalties, played, pick, flags, timeouts, misses, deadline) in \
+            enumerate(_PLAYER.iter_unpack(players)):
+        out.append(PlayerState(
+            uid, names[2 * i], names[2 * i + 1] or None, score,
+            start if flags & _IN_ROUND else None, penalties, played,
+            None if pick == NO_PICK else "Skipped" if pick == SKIPPED else pick,
+            bool(flags & _ELIMINATED), bool(flags & _TIMEOUT_APPLIED), timeouts, misses,
+            deadline or None,
+        ))
+    history = []
+    pos, rounds = 0, bytes(rounds)
+    while pos < len(rounds):
+        number, played_at, target, size = _ROUND.unpack_from(rounds, pos)
+        pos += _ROUND.size
+        history.append(RoundRecord(number, played_at.decode(), target, rounds[pos:pos + size]))
+        pos += size
+    return Snapshot(group_id, saved_at, round_no, state, out, history)
+
+
+def write_snapshots(rows: list, gone: list):
+    """Upsert `rows` and delete the snapshots of the `gone` groups in one transaction."""
+    with db_write() as conn:
+        conn.executemany("""
+            INSERT INTO game_snapshots (group_id, saved_at, round_no, state, players, names, rounds)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(group_id) DO UPDATE SET
+                saved_at=excluded.saved_at, round_no=excluded.round_no, state=excluded.state,
+                players=excluded.players, names=excluded.names, rounds=excluded.rounds
+        """, rows)
+        conn.executemany("DELETE FROM game_snapshots WHERE group_id = ?", [(gid,) for gid in gone])
+
+
+def drop_snapshot(c, group_id: int):
+    """Inside the transaction that records the end of a game."""
+    c.execute("DELETE FROM game_snapshots WHERE group_id = ?", (group_id,))
+
+
+def load_snapshots() -> List[Snapshot]:
+    with db_read() as conn:
+        rows = conn.execute(
+            "SELECT group_id, saved_at, round_no, state, players, names, rounds FROM game_snapshots"
+        ).fetchall()
+    return [unpack_row(row) for row in rows]
+
+
+class SnapshotWriter:
+    """
+    Checkpoints the games in `games` (group_id -> MindScaleGame). Handlers only
+    `mark` a group dirty; a debounced flush serializes the dirty games on the
+    loop (tens of µs each) and writes them on the DB writer thread, so a pick
+    never waits for SQLite. `flush(everything=True)` is the periodic sweep.
+    """
+
+    def __init__(self, games: Dict[int, object], debounce: float = SNAPSHOT_DEBOUNCE_SEC):
+        self.games = games
+        self.debounce = debounce
+        self._dirty: set = set()
+        self._saved: set = set()        # groups with a row in game_snapshots
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._lock = asyncio.Lock()
+
+    def mark(self, group_id: int):
+        self._dirty.add(group_id)
+        if self._handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._handle = loop.call_later(self.debounce, self._fire)
+
+    def saved(self, group_ids):
+        """Groups that already have a row (restored on boot)."""
+        self._saved.update(group_ids)
+
+    def _fire(self):
+        self._handle = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, everything: bool = False) -> int:
+        """Write the dirty games (all of them with `everything`). Returns rows touched."""
+        async with self._lock:
+            if everything:
+                self._dirty.update(self.games.keys(), self._saved)
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return 0
+            now = time.time()
+            rows, gone = [], []
+            for gid in dirty:
+                game = self.games.get(gid)
+                if game is None or game.ended:
+                    if gid in self._saved:
+                        gone.append(gid)
+                else:
+                    rows.append(pack_game(game, now))
+            if not rows and not gone:
+                return 0
+            try:
+                await run_write(write_snapshots, rows, gone)
+            except Exception:
+                logger.exception("Failed to checkpoint %d game(s)", len(rows) + len(gone))
+                self._dirty |= dirty
+                return 0
+            self._saved.update(row[0] for row in rows)
+            self._saved.difference_update(gone)
+            return len(rows) + len(gone)
@@ -0,0 +1,117 @@
+# plugins/game/timers.py
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """
+    Per-game deadline list: reminders and timeouts live in one heap and a
+    single loop timer (`call_at`) is armed for the earliest deadline, so a
+    game costs O(1) timers however many players and thresholds it has.
+
+    Entries are keyed by (user_id, kind); scheduling a key again replaces it
+    and `cancel` removes it exactly. Due callbacks run as their own short
+    tasks, so a slow Telegram call never delays the next deadline.
+    """
+
+    def __init__(self):
+        self._heap: list = []                       # [deadline, seq, key, callback, alive]
+        self._entries: Dict[tuple, list] = {}
+        self._seq = itertools.count()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._armed_at: Optional[float] = None
+        self._running: set = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, user_id: int, kind: Hashable, delay: float,
+                 callback: Callable[[], Awaitable]):
+        """Run `callback()` in `delay` seconds unless cancelled first."""
+        loop = asyncio.get_running_loop()
+        key = (user_id, kind)
+        self._drop(key)
+        entry = [loop.time() + max(0.0, delay), next(self._seq), key, callback, True]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._arm(loop)
+
+    def cancel(self, user_id: int, kind: Hashable = None):
+        """Cancel one entry, or every entry of `user_id` when `kind` is None."""
+        if kind is not None:
+            self._drop((user_id, kind))
+        else:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                self._drop(key)
+        if self._heap and not self._heap[0][4]:
+            self._arm(asyncio.get_running_loop())
+
+    def cancel_all(self):
+        for entry in self._entries.values():
+            entry[4] = False
+        self._entries.clear()
+        self._heap.clear()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = self._armed_at = None
+
+    def remaining(self, user_id: int, kind: Hashable) -> Optional[float]:
+        """Seconds until the entry fires, or None if it is not scheduled."""
+        entry = self._entries.get((user_id, kind))
+        if entry is None:
+            return None
+        return max(0.0, entry[0] - asyncio.get_running_loop().time())
+
+    def pending(self, kind: Hashable = None) -> int:
+        if kind is None:
+            return len(self._entries)
+        return sum(1 for k in self._entries if k[1] == kind)
+
+    # ---------- internals ----------
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[4] = False
+
+    def _arm(self, loop):
+        while self._heap and not self._heap[0][4]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            if self._handle is not None:
+                self._handle.cancel()
+                self._handle = self._armed_at = None
+            return
+        due = self._heap[0][0]
+        if self._armed_at == due:
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = loop.call_at(due, self._fire, loop)
+        self._armed_at = due
+
+    def _fire(self, loop):
+        self._handle = self._armed_at = None
+        now = loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, callback, alive = heapq.heappop(self._heap)
+            if not alive:
+                continue
+            self._entries.pop(key, None)
+            task = loop.create_task(self._run(key, callback))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        self._arm(loop)
+
+    @staticmethod
+    async def _run(key, callback):
+        try:
+            await callback()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Game timer %s failed", key)
@@ -8,6 +8,11 @@ from plugins.helpers.leaderboard import leaderboard_command, leaderboard_callbac
 from plugins.helpers.moderators import register_mods_handlers
 from plugins.helpers.backup import auto_backup_job, restore_command, backup_command, bugs
 from plugins.helpers.notify import notify_handlers
+from plugins.connections.counters import repair_counters_job
+from plugins.connections.rollups import prune_rollups_job
+from plugins.connections.maintenance import maintenance_job
+from plugins.connections.archive import archive_job
+from config import MAINTENANCE_INTERVAL_MIN
 from datetime import timedelta
 import logging
 
@@ -50,6 +55,35 @@ def helpers_handlers(app):
         name="auto_backup_job",
     )
 
+    # Checkpoint / vacuum / optimize / analyze when no games are running
+    app.job_queue.run_repeating(
+        maintenance_job,
+        interval=timedelta(minutes=MAINTENANCE_INTERVAL_MIN),
+        first=timedelta(minutes=20),
+        name="maintenance_job",
+    )
+
+    # Rebuild /stats counters from scratch once a day to catch any drift
+    app.job_queue.run_repeating(
+        repair_counters_job,
+        interval=timedelta(hours=24),
+        first=timedelta(minutes=30),
+        name="repair_counters_job",
+    )
+    app.job_queue.run_repeating(
+        prune_rollups_job,
+        interval=timedelta(hours=24),
+        first=timedelta(minutes=45),
+        name="prune_rollups_job",
+    )
+    # Move games older than ARCHIVE_HORIZON_DAYS into monthly archive DBs
+    app.job_queue.run_repeating(
+        archive_job,
+        interval=timedelta(hours=24),
+        first=timedelta(minutes=50),
+        name="archive_job",
+    )
+
     app.add_handler(ChatMemberHandler(bot_added, ChatMemberHandler.MY_CHAT_MEMBER))
     logger.info("Helpers handlers loaded successfully")
 
@@ -1,13 +1,19 @@
 import os
 import shutil
+import asyncio
 import logging
-import glob, re
+import tempfile
 from datetime import datetime, timedelta
 from telegram import Update, InputFile
 from telegram.ext import ContextTypes, CommandHandler
 from plugins.utils.decorators import owner_only, mod_or_owner
+from plugins.connections.online_backup import backup_database
+from plugins.connections.restore import restore_from_file
+from plugins.connections.artifacts import (
+    MANIFEST_SUFFIX, build_artifact, write_manifest, read_manifest, reassemble, prune_artifacts,
+)
 
-from config import DB_PATH, OWNER_ID, BACKUP_FOLDER, LOG_CHAT_ID
+from config import OWNER_ID, BACKUP_FOLDER, LOG_CHAT_ID
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +38,32 @@ def _ensure_backups_dir():
 
 async def _create_backup_file(prefix: str) -> str:
     """
-    Create a copy of DB_PATH into backups/ and return the file path.
+    Take an online, integrity-checked backup of the live DB into backups/
+    and return the file path. The copy runs on a worker thread.
     """
     _ensure_backups_dir()
-    dst = _backup_path(prefix)
-    shutil.copyfile(DB_PATH, dst)
-    return dst
+    m = await asyncio.to_thread(backup_database, _backup_path(prefix))
+    return m["path"]
+
+
+def _snapshot_artifact(prefix: str) -> tuple[dict, dict]:
+    """Online backup -> compressed, chunked artifact. Blocking."""
+    _ensure_backups_dir()
+    metrics = backup_database(_backup_path(prefix))
+    try:
+        name = os.path.splitext(os.path.basename(metrics["path"]))[0]
+        manifest = build_artifact(metrics["path"], BACKUP_FOLDER, name)
+    finally:
+        os.remove(metrics["path"])
+    return metrics, manifest
+
+
+def _artifact_caption(title: str, m: dict, manifest: dict) -> str:
+    ratio = manifest["raw_bytes"] / manifest["compressed_bytes"] if manifest["compressed_bytes"] else 0.0
+    return (f"{title}\n{m['bytes'] / 2**20:.1f} MB → {manifest['compressed_bytes'] / 2**20:.1f} MB "
+            f"{manifest['codec']} (x{ratio:.1f}) in {len(manifest['chunks'])} part(s) · "
+            f"copy {m['copy_sec']:.1f}s · integrity {m['integrity']}\n"
+            "Reply /restore to this manifest to restore.")
 
 
 async def _send_backup_to_owner(context: ContextTypes.DEFAULT_TYPE, file_path: str, caption: str | None = None):
@@ -48,17 +74,33 @@ async def _send_backup_to_owner(context: ContextTypes.DEFAULT_TYPE, file_path: s
             caption=caption or ""
         )
         await m.forward(LOG_CHAT_ID)
+    return m
+
+
+async def _send_artifact_to_owner(context: ContextTypes.DEFAULT_TYPE, manifest: dict, caption: str):
+    """Upload every chunk, record their file_ids in the manifest, then upload the manifest."""
+    total = len(manifest["chunks"])
+    for i, chunk in enumerate(manifest["chunks"], start=1):
+        m = await _send_backup_to_owner(context, os.path.join(BACKUP_FOLDER, chunk["file"]),
+                                        caption=f"part {i}/{total}")
+        chunk["file_id"] = m.document.file_id
+    await asyncio.to_thread(write_manifest, manifest, manifest["manifest_path"])
+    await _send_backup_to_owner(context, manifest["manifest_path"], caption=caption)
+
+
+async def _fetch_manifest_chunks(context: ContextTypes.DEFAULT_TYPE, manifest: dict, staging: str):
+    """Make every chunk available in `staging`: local copies first, else download by file_id."""
+    for chunk in manifest["chunks"]:
+        local = os.path.join(BACKUP_FOLDER, chunk["file"])
+        dst = os.path.join(staging, chunk["file"])
+        if os.path.exists(local):
+            await asyncio.to_thread(shutil.copyfile, local, dst)
+        elif chunk.get("file_id"):
+            tg_file = await context.bot.get_file(chunk["file_id"])
+            await tg_file.download_to_drive(dst)
+        else:
+            raise ValueError(f"Backup chunk {chunk['file']} is neither local nor uploaded")
 
-def prune_auto_backups(keep: int = 1):
-    pattern = os.path.join(BACKUP_FOLDER, "auto_backup_*.db")
-    files = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
-    to_delete = files[keep:]
-    for path in to_delete:
-        try:
-            if re.search(r"auto_backup_\d{8}_\d{6}\.db$", os.path.basename(path)):
-                os.remove(path)
-        except Exception as e:
-            logger.warning(f"Failed to delete old auto backup {path}: {e}")
 
 # ---------- Commands ----------
 @mod_or_owner
@@ -66,8 +108,8 @@ async def backup_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         await update.message.reply_text("💾 Preparing database backup...")
-        path = await _create_backup_file("manual_backup")
-        await _send_backup_to_owner(context, path, caption="💾 Manual backup")
+        m, manifest = await asyncio.to_thread(_snapshot_artifact, "manual_backup")
+        await _send_artifact_to_owner(context, manifest, _artifact_caption("💾 Manual backup", m, manifest))
         await update.message.reply_text("✅ Backup sent to your DM!")
     except Exception as e:
         logger.exception("Backup failed")
@@ -78,11 +120,12 @@ async def restore_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     reply = update.message.reply_to_message
     if not reply or not reply.document:
-        await update.message.reply_text("❌ Reply to a backup `.db` file to restore.")
+        await update.message.reply_text("❌ Reply to a backup `.db` file or `.manifest.json` to restore.")
         return
 
     file = reply.document
-    if not file.file_name.endswith(".db"):
+    is_manifest = file.file_name.endswith(MANIFEST_SUFFIX)
+    if not (is_manifest or file.file_name.endswith(".db")):
         await update.message.reply_text("❌ This is not a valid database file.")
         return
 
@@ -93,15 +136,30 @@ async def restore_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         temp_restore_path = os.path.join(BACKUP_FOLDER, f"restore_{file.file_name}")
         await tg_file.download_to_drive(temp_restore_path)
 
+        if is_manifest:
+            manifest = await asyncio.to_thread(read_manifest, temp_restore_path)
+            await update.message.reply_text(f"🧩 Reassembling {len(manifest['chunks'])} part(s)...")
+            with tempfile.TemporaryDirectory(dir=BACKUP_FOLDER) as staging:
+                await _fetch_manifest_chunks(context, manifest, staging)
+                db_copy = os.path.join(BACKUP_FOLDER, f"restore_{manifest['name']}.db")
+                await asyncio.to_thread(reassemble, manifest, staging, db_copy)
+            os.remove(temp_restore_path)
+            temp_restore_path = db_copy
+
         try:
             safety_path = await _create_backup_file("pre_restore_backup")
             logger.info(f"Pre-restore safety backup: {safety_path}")
         except Exception as e:
             logger.warning(f"Could not create pre-restore backup: {e}")
 
-        shutil.copyfile(temp_restore_path, DB_PATH)
+        await update.message.reply_text("🔍 Verifying backup...")
+        info = await restore_from_file(temp_restore_path)
+        os.remove(temp_restore_path)
 
-        await update.message.reply_text("✅ Database restored successfully!")
+        await update.message.reply_text(
+            "✅ Database restored successfully!\n"
+            f"Schema v{info['from_version']} → v{info['to_version']} · writes paused {info['pause_ms']:.0f} ms"
+        )
     except Exception as e:
         logger.exception("Restore failed")
         await update.message.reply_text(f"❌ Failed to restore database: {e}")
@@ -110,18 +168,25 @@ async def restore_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ---------- Jobs ----------
 async def auto_backup_job(context: ContextTypes.DEFAULT_TYPE):
     """
-    Runs via JobQueue every 12 hours. Creates a backup and sends to OWNER_ID.
+    Runs via JobQueue every 12 hours. Creates a backup artifact, sends it to
+    OWNER_ID and applies the tiered retention to local auto backups.
     """
     try:
-        path = await _create_backup_file("auto_backup")
-        await _send_backup_to_owner(context, path, caption="💾 Auto backup (every 12 hours)")
+        m, manifest = await asyncio.to_thread(_snapshot_artifact, "auto_backup")
+        await _send_artifact_to_owner(context, manifest,
+                                      _artifact_caption("💾 Auto backup (every 12 hours)", m, manifest))
     except Exception as e:
         logger.exception("Auto backup failed")
         try:
             await context.bot.send_message(chat_id=LOG_CHAT_ID, text=f"❌ Auto backup failed: {e}")
         except Exception:
             pass
-    prune_auto_backups(keep=1)
+    try:
+        removed = await asyncio.to_thread(prune_artifacts, BACKUP_FOLDER, "auto_backup")
+        if removed:
+            logger.info("Pruned %d old auto backup artifact(s)", removed)
+    except Exception:
+        logger.exception("Failed to prune auto backups")
 
 # -------------------- BUG REPORT COMMAND --------------------
 
@@ -1,63 +1,54 @@
-import sqlite3
 import asyncio
 import os
 import shutil
 import datetime
+from functools import partial
 from telegram import Message, Update, InputFile
 from telegram.ext import ContextTypes
 from config import DB_PATH, OWNER_ID, BACKUP_FOLDER
+from plugins.connections.pool import db_read
+from plugins.connections.worker import run_read
 from plugins.connections.logger import setup_logger
 from plugins.utils.decorators import mod_or_owner
+from plugins.utils.outbound import fan_out, send, INTERACTIVE
 
 logger = setup_logger(__name__)
 os.makedirs(BACKUP_FOLDER, exist_ok=True)
 
 async def fetch_ids(db_path):
-    """Fetch group and user IDs in a separate thread."""
-    loop = asyncio.get_event_loop()
+    """Fetch group and user IDs on the DB reader pool."""
     def get_ids():
         try:
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            c.execute("SELECT group_id FROM groups")
-            groups = [row[0] for row in c.fetchall()]
-            c.execute("SELECT user_id FROM users")
-            users = [row[0] for row in c.fetchall()]
-            conn.close()
+            with db_read() as conn:
+                c = conn.cursor()
+                c.execute("SELECT group_id FROM groups")
+                groups = [row[0] for row in c.fetchall()]
+                c.execute("SELECT user_id FROM users")
+                users = [row[0] for row in c.fetchall()]
             return groups, users
         except Exception as e:
             logger.error("Error fetching IDs: %s", e)
             return [], []
-    return await loop.run_in_executor(None, get_ids)
+    return await run_read(get_ids)
 
 async def broadcast_task(bot, reply: Message, groups: list, users: list, owner_id: int):
-    """Background broadcast fully detached from update."""
-    success_groups = 0
-    success_users = 0
+    """
+    Background broadcast fully detached from update. Forwards go through the
+    outbox's bulk lane, so they only use rate budget that games leave free.
+    """
+    success_groups, failed = await fan_out((gid, partial(reply.forward, chat_id=gid)) for gid in groups)
+    for gid, e in failed:
+        logger.debug("Failed to forward to group %s: %s", gid, e)
 
-    # Broadcast to groups
-    for gid in groups:
-        try:
-            await reply.forward(chat_id=gid)
-            success_groups += 1
-            await asyncio.sleep(0.05)
-        except Exception as e:
-            logger.debug("Failed to forward to group %s: %s", gid, e)
-            continue
-
-    # Broadcast to users
-    for uid in users:
-        try:
-            await reply.forward(chat_id=uid)
-            success_users += 1
-            await asyncio.sleep(0.05)
-        except Exception as e:
-            logger.debug("Failed to forward to user %s: %s", uid, e)
-            continue
+    success_users, failed = await fan_out((uid, partial(reply.forward, chat_id=uid)) for uid in users)
+    for uid, e in failed:
+        logger.debug("Failed to forward to user %s: %s", uid, e)
 
     # Log result to owner
     try:
-        await bot.send_message(
+        await send(
+            bot.send_message,
+            lane=INTERACTIVE,
             chat_id=owner_id,
             text=f"✅ Broadcast done!\nGroups: {success_groups}/{len(groups)}\nUsers: {success_users}/{len(users)}"
         )
@@ -1,9 +1,9 @@
-import sqlite3
 import logging
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
-from datetime import datetime, timedelta, timezone
-from config import DB_PATH
+from plugins.connections.pool import db_read
+from plugins.connections.worker import run_read
+from plugins.connections import rollups
 import html
 
 logger = logging.getLogger(__name__)
@@ -17,18 +17,10 @@ def group_stats_buttons():
         [ InlineKeyboardButton("🕒 Activity", callback_data="gstats_activity") ],
     ])
 
-async def gstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat = update.effective_chat
-    if chat.type not in ["group", "supergroup"]:
-        await update.message.reply_text("❌ This command can only be used in groups.")
-        return
-
-    group_id = chat.id
+def _group_overview(group_id: int):
     total_games = 0
     total_users = 0
-
-    try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
+    with db_read() as conn:
         c = conn.cursor()
 
         # Per-group games played
@@ -43,8 +35,17 @@ async def gstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
             WHERE group_id=? AND games_played>0
         """, (group_id,))
         total_users = c.fetchone()[0] or 0
+    return total_games, total_users
+
+async def gstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat = update.effective_chat
+    if chat.type not in ["group", "supergroup"]:
+        await update.message.reply_text("❌ This command can only be used in groups.")
+        return
 
-        conn.close()
+    group_id = chat.id
+    try:
+        total_games, total_users = await run_read(_group_overview, group_id)
 
         overview_text = (
             "<b>Group Statistics</b>\n\n"
@@ -62,36 +63,15 @@ async def gstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.exception(f"Critical error in gstats for group {group_id}: {e}")
         await update.message.reply_text("❌ Critical error fetching group stats. Try again later.")
 
-async def gstats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-
-    chat = update.effective_chat
-    if chat.type not in ["group", "supergroup"]:
-        await query.answer("❌ This command can only be used in groups.")
-        return
-
-    group_id = chat.id
-    selected_category = query.data.replace("gstats_", "")
-
-    current_category = context.chat_data.get('current_gstats_category')
-    if current_category == selected_category:
-        try:
-            await query.answer("ℹ️ You're already viewing this stats category.")
-        except Exception as e:
-            logger.error(f"Same-category reply failed: {e}")
-        return
-
-    # Defaults
+def _group_details(group_id: int) -> dict:
     total_games = total_users = 0
     win_rate = 0.0
-    active_users = 0
+    active_users = games_24h = games_30d = 0
     total_eliminations = total_penalties = 0
     top_players_info = "No players with games yet."
     most_recent_game = "No recent games"
 
-    try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
+    with db_read() as conn:
         c = conn.cursor()
 
         # Overview
@@ -117,15 +97,11 @@ async def gstats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         total_wins, total_gp = c.fetchone()
         win_rate = (total_wins / total_gp * 100.0) if total_gp > 0 else 0.0
 
-        # Active users in last 7 days (based on updated_at, stored as UTC "YYYY-mm-dd HH:MM:SS")
-        now_utc = datetime.now(timezone.utc)
-        seven_days_ago = (now_utc - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
-        c.execute("""
-            SELECT COUNT(DISTINCT user_id)
-            FROM user_group_stats
-            WHERE group_id=? AND updated_at IS NOT NULL AND updated_at >= ? AND games_played>0
-        """, (group_id, seven_days_ago))
-        active_users = c.fetchone()[0] or 0
+        # Windowed activity from the per-group rollups
+        week = rollups.window(conn, group_id, days=7)
+        active_users = week["active_players"]
+        games_24h = rollups.games_last_hours(conn, group_id, hours=24)
+        games_30d = rollups.window(conn, group_id, days=30)["games"]
 
         # Totals for eliminations/penalties
         c.execute("""
@@ -152,7 +128,41 @@ async def gstats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parts.append(f"{i}. {name} {at} - {w} wins, {sc} score")
             top_players_info = "\n".join(parts)
 
-        conn.close()
+    return {
+        "total_games": total_games,
+        "total_users": total_users,
+        "win_rate": win_rate,
+        "active_users": active_users,
+        "games_24h": games_24h,
+        "games_30d": games_30d,
+        "total_eliminations": total_eliminations,
+        "total_penalties": total_penalties,
+        "top_players_info": top_players_info,
+        "most_recent_game": most_recent_game,
+    }
+
+async def gstats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    chat = update.effective_chat
+    if chat.type not in ["group", "supergroup"]:
+        await query.answer("❌ This command can only be used in groups.")
+        return
+
+    group_id = chat.id
+    selected_category = query.data.replace("gstats_", "")
+
+    current_category = context.chat_data.get('current_gstats_category')
+    if current_category == selected_category:
+        try:
+            await query.answer("ℹ️ You're already viewing this stats category.")
+        except Exception as e:
+            logger.error(f"Same-category reply failed: {e}")
+        return
+
+    try:
+        s = await run_read(_group_details, group_id)
 
         # Compose output
         if selected_category == "overview":
@@ -160,23 +170,25 @@ async def gstats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "<b>Group Stats - Overview</b>\n\n"
                 f"🏘 Group: {html.escape(chat.title or 'Unknown')}\n"
                 f"🆔 ID: {group_id}\n"
-                f"🎮 Games Played: {total_games}\n"
-                f"👥 Players: {total_users}\n"
-                f"🏆 Win Rate: {win_rate:.1f}%"
+                f"🎮 Games Played: {s['total_games']}\n"
+                f"👥 Players: {s['total_users']}\n"
+                f"🏆 Win Rate: {s['win_rate']:.1f}%"
             )
         elif selected_category == "top_players":
             text = (
                 "<b>Group Stats - Top Players</b>\n\n"
-                f"🌟 Top 3 Players:\n{top_players_info}\n\n"
-                f"⚠️ Total Penalties: {total_penalties}\n"
-                f"☠️ Total Eliminations: {total_eliminations}"
+                f"🌟 Top 3 Players:\n{s['top_players_info']}\n\n"
+                f"⚠️ Total Penalties: {s['total_penalties']}\n"
+                f"☠️ Total Eliminations: {s['total_eliminations']}"
             )
         elif selected_category == "activity":
             text = (
                 "<b>Group Stats - Activity</b>\n\n"
-                f"🕒 Active Players (7 days): {active_users}\n"
-                f"📅 Last Game: {most_recent_game}\n"
-                f"🎮 Total Games: {total_games}"
+                f"🕒 Active Players (7 days): {s['active_users']}\n"
+                f"🔥 Games (24h): {s['games_24h']}\n"
+                f"📈 Games (30 days): {s['games_30d']}\n"
+                f"📅 Last Game: {s['most_recent_game']}\n"
+                f"🎮 Total Games: {s['total_games']}"
             )
         else:
             text = "❌ Unknown category"
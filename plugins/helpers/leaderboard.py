@@ -5,8 +5,9 @@ import logging
 import sqlite3
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, User
 from telegram.ext import ContextTypes
-from config import DB_PATH
-from plugins.game.db import ensure_columns_exist
+from plugins.connections.pool import db_read
+from plugins.connections.worker import run_read
+from plugins.connections.ranking import get_rank_index
 from plugins.utils.thumbnail import generate_card, download_user_photo_by_id
 
 logger = logging.getLogger(__name__)
@@ -14,63 +15,113 @@ logger = logging.getLogger(__name__)
 PER_PAGE = 5
 
 # ---------------- DB ----------------
-def get_all_users_sorted(limit: int = 100):
-    try:
-        ensure_columns_exist()
-        conn = sqlite3.connect(DB_PATH, timeout=10)
-        conn.row_factory = sqlite3.Row
+_PAGE_COLUMNS = """
+    user_id, IFNULL(username, '') AS username, IFNULL(first_name, '') AS first_name,
+    games_played, wins, losses, rounds_played, eliminations, total_score, penalties
+"""
+
+def get_leaderboard_page(direction: str = "first", cursor: tuple | None = None, limit: int = PER_PAGE):
+    """
+    One leaderboard page by keyset over idx_users_leaderboard (wins, total_score, user_id).
+
+    `direction` is "first", "next" (rows after `cursor`), "prev" (rows before
+    `cursor`) or "at" (rows starting at `cursor`); `cursor` is a
+    (wins, total_score, user_id) tuple. Returns (rows, first_rank, has_next).
+    """
+    if direction == "prev":
+        where, order = "WHERE (wins, total_score, user_id) > (?, ?, ?)", "ASC"
+    elif direction == "next":
+        where, order = "WHERE (wins, total_score, user_id) < (?, ?, ?)", "DESC"
+    elif direction == "at":
+        where, order = "WHERE (wins, total_score, user_id) <= (?, ?, ?)", "DESC"
+    else:
+        where, order, cursor = "", "DESC", None
+
+    with db_read() as conn:
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row
+        c.execute(
+            f"""
+            SELECT {_PAGE_COLUMNS}
+            FROM users {where}
+            ORDER BY wins {order}, total_score {order}, user_id {order}
+            LIMIT ?
+            """,
+            (*(cursor or ()), limit + 1),
+        )
+        rows = c.fetchall()
+
+    if direction == "prev":
+        if len(rows) < limit:
+            # fewer rows than a full page above the cursor: show the top instead
+            return get_leaderboard_page("first", None, limit)
+        rows = rows[:limit][::-1]
+        has_next = True
+    else:
+        if not rows and cursor is not None:
+            return get_leaderboard_page("first", None, limit)
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+    first_rank = 1
+    if rows and direction != "first":
+        first_rank = get_rank_index().rank(rows[0]['user_id']) or 1
+    return rows, first_rank, has_next
+
+def get_page_cursor(page: int, per_page: int = PER_PAGE) -> tuple | None:
+    """Cursor for the first row of 1-based `page` (for old `leaderboard_<n>` buttons)."""
+    uid = get_rank_index().at((max(1, page) - 1) * per_page + 1)
+    if uid is None:
+        return None
+    with db_read() as conn:
+        row = conn.execute("SELECT wins, total_score, user_id FROM users WHERE user_id = ?", (uid,)).fetchone()
+    return tuple(row) if row else None
+
+def _rank_rows(user_ids):
+    """Leaderboard columns for `user_ids`, keyed by user_id."""
+    if not user_ids:
+        return {}
+    with db_read() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute(
-            """
-            SELECT 
-                user_id, 
-                IFNULL(username, '') AS username, 
-                IFNULL(first_name, '') AS first_name, 
-                IFNULL(games_played, 0) AS games_played, 
-                IFNULL(wins, 0) AS wins, 
-                IFNULL(losses, 0) AS losses, 
-                IFNULL(rounds_played, 0) AS rounds_played, 
-                IFNULL(eliminations, 0) AS eliminations, 
-                IFNULL(total_score, 0) AS total_score, 
-                IFNULL(penalties, 0) AS penalties
+            f"""
+            SELECT user_id, IFNULL(username, '') AS username, IFNULL(first_name, '') AS first_name,
+                   games_played, wins, losses, rounds_played, eliminations, total_score, penalties
             FROM users
-            ORDER BY wins DESC, total_score DESC
-            LIMIT ?
+            WHERE user_id IN ({",".join("?" * len(user_ids))})
             """,
-            (limit,),
+            list(user_ids),
         )
-        result = cursor.fetchall()
-        conn.close()
-        return result
-    except Exception:
-        logger.exception("Error in get_all_users_sorted")
-        return []
+        return {row['user_id']: row for row in cursor.fetchall()}
 
 def get_user_rank(user_id):
     try:
-        all_users = get_all_users_sorted()
-        for idx, row in enumerate(all_users, start=1):
-            if row['user_id'] == user_id:
-                gp = row['games_played'] or 0
-                win_percent = round((row['wins'] or 0) / gp * 100, 1) if gp > 0 else 0
-                return {
-                    "username": (row['username'] or row['first_name'] or "Unknown"),
-                    "rank": idx,
-                    "total_users": len(all_users),
-                    "total_played": gp,
-                    "wins": row['wins'] or 0,
-                    "losses": row['losses'] or 0,
-                    "win_percent": win_percent,
-                    "rounds_played": row['rounds_played'] or 0,
-                    "eliminations": row['eliminations'] or 0,
-                    "total_score": row['total_score'] or 0,
-                    "penalties": row['penalties'] or 0
-                }
-        # Not in list
+        index = get_rank_index()
+        total = len(index)
+        rank = index.rank(user_id)
+        row = _rank_rows([user_id]).get(user_id) if rank is not None else None
+        if row is not None:
+            gp = row['games_played'] or 0
+            win_percent = round((row['wins'] or 0) / gp * 100, 1) if gp > 0 else 0
+            return {
+                "username": (row['username'] or row['first_name'] or "Unknown"),
+                "rank": rank,
+                "total_users": total,
+                "total_played": gp,
+                "wins": row['wins'] or 0,
+                "losses": row['losses'] or 0,
+                "win_percent": win_percent,
+                "rounds_played": row['rounds_played'] or 0,
+                "eliminations": row['eliminations'] or 0,
+                "total_score": row['total_score'] or 0,
+                "penalties": row['penalties'] or 0
+            }
+        # Not ranked yet
         return {
             "username": "Unknown",
-            "rank": len(all_users) + 1,
-            "total_users": len(all_users),
+            "rank": total + 1,
+            "total_users": total,
             "total_played": 0,
             "wins": 0,
             "losses": 0,
@@ -88,19 +139,49 @@ def get_user_rank(user_id):
             "eliminations": 0, "total_score": 0, "penalties": 0
         }
 
+def get_rank_neighbours(user_id: int, before: int = 1, after: int = 1):
+    """[(rank, row)] for the players just above and below `user_id`, user included."""
+    pairs = get_rank_index().neighbours(user_id, before, after)
+    rows = _rank_rows([uid for _, uid in pairs])
+    return [(rank, rows[uid]) for rank, uid in pairs if uid in rows]
+
+def get_user_stats_row(user_id: int):
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT first_name, username,
+                   games_played,
+                   wins,
+                   losses,
+                   rounds_played,
+                   eliminations,
+                   total_score,
+                   last_score,
+                   penalties
+            FROM users
+            WHERE user_id = ?
+        """, (user_id,))
+        return c.fetchone()
+
 # ---------------- UI helpers ----------------
 def _medal_for_rank(rank: int) -> str:
     return {1: "🥇", 2: "🥈", 3: "🥉"}.get(rank, "")
 
-def _build_pager_old(page: int, total_pages: int) -> InlineKeyboardMarkup | None:
-    if total_pages <= 1:
+def _cursor_data(prefix: str, row) -> str:
+    return f"{prefix}:{row['wins']}:{row['total_score']}:{row['user_id']}"
+
+def _build_pager(rows, first_rank: int, has_next: bool, per_page: int = PER_PAGE) -> InlineKeyboardMarkup | None:
+    total_pages = max(1, math.ceil(len(get_rank_index()) / per_page))
+    page = min(total_pages, (first_rank - 1) // per_page + 1)
+    has_prev = first_rank > 1
+    if not rows or (not has_prev and not has_next):
         return None
     buttons = []
     row = []
-    if page > 1:
-        row.append(InlineKeyboardButton("◄ Previous", callback_data=f"leaderboard_{page-1}"))
-    if page < total_pages:
-        row.append(InlineKeyboardButton("Next ►", callback_data=f"leaderboard_{page+1}"))
+    if has_prev:
+        row.append(InlineKeyboardButton("◄ Previous", callback_data=_cursor_data("leaderboard_prev", rows[0])))
+    if has_next:
+        row.append(InlineKeyboardButton("Next ►", callback_data=_cursor_data("leaderboard_next", rows[-1])))
     if row:
         buttons.append(row)
 
@@ -108,24 +189,15 @@ def _build_pager_old(page: int, total_pages: int) -> InlineKeyboardMarkup | None
     buttons.append(row2)
     return InlineKeyboardMarkup(buttons)
 
-def _build_leaderboard_text(all_users, page: int, per_page: int, viewer_id: int) -> str:
-    total = len(all_users)
-    total_pages = max(1, math.ceil(total / per_page))
-    page = max(1, min(page, total_pages))
-    start_idx = (page - 1) * per_page
-    end_idx = min(start_idx + per_page, total)
-
+def _build_leaderboard_text(rows, first_rank: int, viewer_id: int) -> str:
     text = "<b>──✦ Player Spotlight ✦──</b>\n\n"
     user_in_page = False
 
-    for i, row in enumerate(all_users[start_idx:end_idx], start=start_idx + 1):
-        rank = i
+    for rank, row in enumerate(rows, start=first_rank):
         medal = _medal_for_rank(rank)
         gp = row['games_played'] or 0
         wins = row['wins'] or 0
         losses = row['losses'] or 0
-        rounds_played = row['rounds_played'] or 0
-        eliminations = row['eliminations'] or 0
         total_score = row['total_score'] or 0
         penalties = row['penalties'] or 0
         win_percent = round(wins / gp * 100, 1) if gp > 0 else 0
@@ -150,16 +222,24 @@ def _build_leaderboard_text(all_users, page: int, per_page: int, viewer_id: int)
         text += f"   🏆 Wins: {me['wins']} | Lost: {me['losses']}\n"
         text += f"   ⭐ Score: {me['total_score']} | ⛔ Pen: {me['penalties']}\n"
 
-    return text, total_pages, page
+    return text
+
+def _render_page(direction: str, cursor: tuple | None, viewer_id: int):
+    """Fetch a page and build (text, pager, rows). Blocking; run on a reader thread."""
+    rows, first_rank, has_next = get_leaderboard_page(direction, cursor)
+    text = _build_leaderboard_text(rows, first_rank, viewer_id)
+    return text, _build_pager(rows, first_rank, has_next), rows
+
+def _render_legacy_page(page: int, viewer_id: int):
+    cursor = get_page_cursor(page)
+    return _render_page("at" if cursor else "first", cursor, viewer_id)
 
 # ---------------- Core flow ----------------
 async def _send_leaderboard_initial(update: Update, context: ContextTypes.DEFAULT_TYPE):
     viewer_id = update.effective_user.id
-    all_users = get_all_users_sorted()
-    text, total_pages, page = _build_leaderboard_text(all_users, page=1, per_page=PER_PAGE, viewer_id=viewer_id)
-    pager = _build_pager_old(page, total_pages)
+    text, pager, rows = await run_read(_render_page, "first", None, viewer_id)
 
-    top_user_id = all_users[0]['user_id'] if all_users else viewer_id
+    top_user_id = rows[0]['user_id'] if rows else viewer_id
     try:
         usr_pfp_path = await download_user_photo_by_id(top_user_id, context.bot)
     except Exception:
@@ -174,12 +254,10 @@ async def _send_leaderboard_initial(update: Update, context: ContextTypes.DEFAUL
         await update.message.reply_text(text=text, reply_markup=pager, parse_mode="HTML")
 
 
-async def _edit_leaderboard_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int):
+async def _edit_leaderboard_page(update: Update, context: ContextTypes.DEFAULT_TYPE, render, *args):
     query = update.callback_query
     viewer_id = query.from_user.id
-    all_users = get_all_users_sorted()
-    text, total_pages, page = _build_leaderboard_text(all_users, page=page, per_page=PER_PAGE, viewer_id=viewer_id)
-    pager = _build_pager_old(page, total_pages)
+    text, pager, _ = await run_read(render, *args, viewer_id)
 
     try:
         if query.message.photo:
@@ -214,8 +292,14 @@ async def leaderboard_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     try:
         if not data.startswith("leaderboard_"):
             return await query.answer()
-        page = int(data.split("_", 1)[1])
-        await _edit_leaderboard_page(update, context, page)
+        action = data.split("_", 1)[1]
+        if action.startswith(("next:", "prev:")):
+            direction, wins, score, uid = action.split(":")
+            cursor = (int(wins), int(score), int(uid))
+            await _edit_leaderboard_page(update, context, _render_page, direction, cursor)
+        else:
+            # buttons sent before keyset paging carry a page number
+            await _edit_leaderboard_page(update, context, _render_legacy_page, int(action))
     except (IndexError, ValueError):
         await query.answer()
 
@@ -228,7 +312,7 @@ async def users_rank(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user: User = update.effective_user
 
     user_id = user.id
-    stats = get_user_rank(user_id)
+    stats = await run_read(get_user_rank, user_id)
     text = (
         f"🏆 𝐘𝐎𝐔𝐑 𝐑𝐀𝐍𝐊\n\n"
         f"{stats['rank']}. {stats['username']} \n"
@@ -236,6 +320,17 @@ async def users_rank(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"   🆔 {user_id}\n"
         "───────────────\n"
     )
+    try:
+        neighbours = await run_read(get_rank_neighbours, user_id)
+    except Exception:
+        logger.exception("Failed to load rank neighbours")
+        neighbours = []
+    for rank, row in neighbours:
+        if row['user_id'] == user_id:
+            continue
+        arrow = "⬆️" if rank < stats['rank'] else "⬇️"
+        name = html.escape(row['first_name'] or row['username'] or "Unknown")
+        text += f"{arrow} {rank}. {name} — 🏆 {row['wins']} | ⭐ {row['total_score']}\n"
     await update.message.reply_text(text, parse_mode="HTML")
 
 
@@ -258,26 +353,8 @@ async def userinfo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         user: User = update.effective_user
 
-    stats = get_user_rank(user.id)
-    ensure_columns_exist()
-    import sqlite3
-    conn = sqlite3.connect(__import__("config").DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        SELECT first_name, username,
-               IFNULL(games_played,0),
-               IFNULL(wins,0),
-               IFNULL(losses,0),
-               IFNULL(rounds_played,0),
-               IFNULL(eliminations,0),
-               IFNULL(total_score,0),
-               IFNULL(last_score,0),
-               IFNULL(penalties,0)
-        FROM users
-        WHERE user_id = ?
-    """, (user.id,))
-    row = c.fetchone()
-    conn.close()
+    stats = await run_read(get_user_rank, user.id)
+    row = await run_read(get_user_stats_row, user.id)
     if not row:
         await update.message.reply_text("❌ No stats found. Play a game first!")
         return
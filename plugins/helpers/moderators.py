@@ -1,28 +1,15 @@
 # plugins/helpers/mods.py
-import sqlite3
 from telegram import Update
 from telegram.ext import CommandHandler, ContextTypes
-from config import DB_PATH, OWNER_ID, LOG_CHAT_ID
+from config import OWNER_ID, LOG_CHAT_ID
+from plugins.connections.pool import db_read, db_write
+from plugins.connections.worker import run_read, run_write
+from plugins.connections.ranking import update_ranks
+from plugins.connections.counters import bump
 import logging
 
 logger = logging.getLogger(__name__)
 
-# ---------------- Database Initialization for Mods ----------------
-def init_mods_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS mods (
-            mod_id INTEGER PRIMARY KEY,
-            username TEXT,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
-
 # ---------------- Helper Functions ----------------
 def is_owner(user_id: int) -> bool:
     """Check if the user is the owner."""
@@ -30,74 +17,66 @@ def is_owner(user_id: int) -> bool:
 
 def is_mod(user_id: int) -> bool:
     """Check if the user is a mod."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT mod_id FROM mods WHERE mod_id = ?", (user_id,))
-    exists = c.fetchone() is not None
-    conn.close()
-    return exists
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute("SELECT mod_id FROM mods WHERE mod_id = ?", (user_id,))
+        return c.fetchone() is not None
 
 def add_mod(mod_id: int, username: str) -> bool:
     """Add a mod to the DB if not exists. Returns True if added."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT mod_id FROM mods WHERE mod_id = ?", (mod_id,))
-    if c.fetchone():
-        conn.close()
-        return False  # Already exists
-    c.execute("INSERT INTO mods (mod_id, username) VALUES (?, ?)", (mod_id, username))
-    conn.commit()
-    conn.close()
+    with db_write() as conn:
+        c = conn.cursor()
+        c.execute("SELECT mod_id FROM mods WHERE mod_id = ?", (mod_id,))
+        if c.fetchone():
+            return False  # Already exists
+        c.execute("INSERT INTO mods (mod_id, username) VALUES (?, ?)", (mod_id, username))
     return True
 
 def remove_mod(mod_id: int) -> bool:
     """Remove a mod from the DB. Returns True if removed."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT mod_id FROM mods WHERE mod_id = ?", (mod_id,))
-    if not c.fetchone():
-        conn.close()
-        return False  # Not exists
-    c.execute("DELETE FROM mods WHERE mod_id = ?", (mod_id,))
-    conn.commit()
-    conn.close()
+    with db_write() as conn:
+        c = conn.cursor()
+        c.execute("SELECT mod_id FROM mods WHERE mod_id = ?", (mod_id,))
+        if not c.fetchone():
+            return False  # Not exists
+        c.execute("DELETE FROM mods WHERE mod_id = ?", (mod_id,))
     return True
 
 def get_all_mods() -> list:
     """Get list of all mods as (mod_id, username)."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT mod_id, username FROM mods")
-    mods = c.fetchall()
-    conn.close()
-    return mods
+    with db_read() as conn:
+        c = conn.cursor()
+        c.execute("SELECT mod_id, username FROM mods")
+        return c.fetchall()
 
 def reset_user_stats(user_id: int) -> bool:
     """Reset a user's stats in the users table. Returns True if user exists and reset."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-    if not c.fetchone():
-        conn.close()
-        return False
-    c.execute(
-        """
-        UPDATE users
-        SET games_played = 0,
-            wins = 0,
-            losses = 0,
-            rounds_played = 0,
-            eliminations = 0,
-            total_score = 0,
-            last_score = 0,
-            penalties = 0,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE user_id = ?
-        """,
-        (user_id,)
-    )
-    conn.commit()
-    conn.close()
+    with db_write() as conn:
+        c = conn.cursor()
+        c.execute("SELECT games_played, wins, losses, total_score, penalties FROM users WHERE user_id = ?", (user_id,))
+        old = c.fetchone()
+        if not old:
+            return False
+        games_played, wins, losses, total_score, penalties = old
+        c.execute(
+            """
+            UPDATE users
+            SET games_played = 0,
+                wins = 0,
+                losses = 0,
+                rounds_played = 0,
+                eliminations = 0,
+                total_score = 0,
+                last_score = 0,
+                penalties = 0,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+            """,
+            (user_id,)
+        )
+        bump(c, games_played=-games_played, wins=-wins, losses=-losses, total_score=-total_score,
+             penalties=-penalties, inactive_users=1 if games_played else 0)
+    update_ranks([(user_id, 0, 0)])
     return True
 
 # ---------------- Command Handlers ----------------
@@ -114,7 +93,7 @@ async def addmod(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     mod_user = reply.from_user
-    if add_mod(mod_user.id, mod_user.username or mod_user.full_name):
+    if await run_write(add_mod, mod_user.id, mod_user.username or mod_user.full_name):
         await update.message.reply_text(f"✅ Added @{mod_user.username or mod_user.full_name} as mod.")
         # Log to LOG_CHAT_ID if exists
         if LOG_CHAT_ID:
@@ -146,7 +125,7 @@ async def rmmod(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Provide a user ID or reply to a user's message to remove mod.")
         return
 
-    if remove_mod(mod_id):
+    if await run_write(remove_mod, mod_id):
         await update.message.reply_text(f"✅ Removed mod with ID {mod_id}.")
         if LOG_CHAT_ID:
             try:
@@ -163,7 +142,7 @@ async def mods(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ You are not authorized to use this command.")
         return
 
-    mod_list = get_all_mods()
+    mod_list = await run_read(get_all_mods)
     if not mod_list:
         await update.message.reply_text("❌ No mods added yet.")
         return
@@ -177,7 +156,7 @@ async def mods(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Mod/Owner-only: Reset user stats by userid or reply."""
     user = update.effective_user
-    if not (is_owner(user.id) or is_mod(user.id)):
+    if not (is_owner(user.id) or await run_read(is_mod, user.id)):
         await update.message.reply_text("❌ You are not authorized to use this command.")
         return
 
@@ -195,7 +174,7 @@ async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Provide a user ID or reply to a user's message to reset stats.")
         return
 
-    if reset_user_stats(target_id):
+    if await run_write(reset_user_stats, target_id):
         await update.message.reply_text(f"✅ Reset stats for user ID {target_id}.")
         if LOG_CHAT_ID:
             try:
@@ -207,7 +186,6 @@ async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ---------------- Register Handlers ----------------
 def register_mods_handlers(app):
-    init_mods_db() 
     app.add_handler(CommandHandler("addmod", addmod))
     app.add_handler(CommandHandler("rmmod", rmmod))
     app.add_handler(CommandHandler("mods", mods))
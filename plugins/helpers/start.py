@@ -2,6 +2,7 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from plugins.connections.db import save_user, save_group
+from plugins.connections.worker import run_read, run_write
 from config import LOG_CHAT_ID
 from plugins.connections.logger import setup_logger
 
@@ -40,7 +41,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     is_new = False
     try:
-        is_new = save_user(user)
+        is_new = await run_read(save_user, user)
     except Exception as e:
         logger.exception("Failed to save user: %s", e)
 
@@ -89,7 +90,7 @@ async def bot_added(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             # Save group to DB
             try:
-                save_group(chat, f"@{added_by.username or added_by.full_name}")
+                await run_write(save_group, chat, f"@{added_by.username or added_by.full_name}")
             except Exception:
                 logger.exception("Failed to save new group to DB.")
 
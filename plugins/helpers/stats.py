@@ -1,11 +1,14 @@
-import sqlite3
-import os
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
-from datetime import datetime, timedelta, timezone
-from config import DB_PATH
+from config import DB_PATH, DB_SIZE_BUDGET_MB
+from plugins.connections.pool import db_read
+from plugins.connections.worker import run_read
+from plugins.connections.counters import read_counters
+from plugins.connections import rollups
+from plugins.connections.maintenance import db_file_size
 from plugins.connections.logger import setup_logger
+from plugins.utils.outbound import outbox
 
 logger = setup_logger(__name__)
 
@@ -20,35 +23,20 @@ def stats_buttons():
             InlineKeyboardButton("🏘 Group Stats", callback_data="stats_groups"),
             InlineKeyboardButton("🌟 Top Players", callback_data="stats_top_players"),
         ],
+        [
+            InlineKeyboardButton("📈 30-Day Trend", callback_data="stats_trend_30"),
+            InlineKeyboardButton("📉 90-Day Trend", callback_data="stats_trend_90"),
+        ],
     ])
 
-async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    total_users = total_groups = total_games = "N/A"
-
-    try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
-        c = conn.cursor()
-
-        try:
-            c.execute("SELECT COUNT(*) FROM users")
-            total_users = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching total_users: %s", e)
-
-        try:
-            c.execute("SELECT COUNT(*) FROM groups")
-            total_groups = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching total_groups: %s", e)
+def _overview_counts():
+    counters = read_counters()
+    return counters["users"], counters["groups"], counters["games"]
 
-        try:
-            c.execute("SELECT COUNT(*) FROM games")
-            total_games = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching total_games: %s", e)
-            total_games = 0
 
-        conn.close()
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        total_users, total_groups, total_games = await run_read(_overview_counts)
 
         overview_text = (
             "<b>Bot Statistics</b>\n\n"
@@ -66,20 +54,7 @@ async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Critical error fetching stats. Please try again later.")
 
 
-async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-
-    selected_category = query.data.replace("stats_", "")
-    current_category = context.chat_data.get('current_stats_category')
-    if current_category == selected_category:
-        try:
-            await query.message.reply_text("ℹ️ You're already viewing this stats category.")
-        except Exception:
-            logger.debug("Couldn't notify same category")
-        return
-
-    # Defaults
+def _collect_stats() -> dict:
     total_users = total_groups = total_wins = total_losses = total_games = total_penalties = 0
     db_size_mb = storage_percentage = 0.0
     active_users = recent_games = avg_games_per_user = 0.0
@@ -90,58 +65,38 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     win_rate = 0.0
     recent_registrations = 0
 
-    try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
+    with db_read() as conn:
         c = conn.cursor()
 
-        # Counts
+        # Precomputed aggregates, kept current by the writers
         try:
-            c.execute("SELECT COUNT(*) FROM users")
-            total_users = c.fetchone()[0] or 0
+            counters = read_counters(conn)
+            total_users = counters["users"]
+            total_groups = counters["groups"]
+            total_wins = counters["wins"]
+            total_losses = counters["losses"]
+            total_games = counters["games_played"]
+            total_penalties = counters["penalties"]
+            inactive_users = counters["inactive_users"]
+            avg_score = (counters["total_score"] / total_users) if total_users > 0 else 0.0
         except Exception as e:
-            logger.error("Error fetching total_users: %s", e)
+            logger.error("Error fetching bot_counters: %s", e)
 
+        # DB size (database + WAL) against the configured quota
         try:
-            c.execute("SELECT COUNT(*) FROM groups")
-            total_groups = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching total_groups: %s", e)
-
-        # Sums
-        try:
-            c.execute("SELECT COALESCE(SUM(wins),0), COALESCE(SUM(losses),0), COALESCE(SUM(games_played),0), COALESCE(SUM(penalties),0) FROM users")
-            total_wins, total_losses, total_games, total_penalties = c.fetchone()
-        except Exception as e:
-            logger.error("Error fetching user sums: %s", e)
-
-        # DB size (assume 500 MB quota)
-        try:
-            db_size_bytes = os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0
-            db_size_mb = db_size_bytes / (1024 * 1024)
-            storage_percentage = (db_size_mb / 500.0) * 100.0
+            db_size_mb = db_file_size(DB_PATH) / (1024 * 1024)
+            storage_percentage = (db_size_mb / DB_SIZE_BUDGET_MB) * 100.0
         except Exception as e:
             logger.error("Error fetching DB size: %s", e)
 
-        now_utc = datetime.now(timezone.utc)
-        one_day_ago_str = (now_utc - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
-        seven_days_ago_str = (now_utc - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
-
-        # Active users (updated in last 7 days)
-        try:
-            c.execute("SELECT COUNT(DISTINCT user_id) FROM users WHERE updated_at IS NOT NULL AND updated_at >= ?", (seven_days_ago_str,))
-            active_users = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching active_users: %s", e)
-
-        # Recent games (24h)
+        # Windowed activity from the hourly/daily rollups
         try:
-            now_utc = datetime.now(timezone.utc)
-            one_day_ago_str = (now_utc - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
-
-            c.execute("SELECT COUNT(*) FROM games WHERE ended_at >= ?", (one_day_ago_str,))
-            recent_games = c.fetchone()[0] or 0
+            week = rollups.window(conn, days=7)
+            active_users = week["active_players"]
+            recent_registrations = week["new_users"]
+            recent_games = rollups.games_last_hours(conn, hours=24)
         except Exception as e:
-            logger.error("Error fetching recent_games: %s", e)
+            logger.error("Error fetching activity rollups: %s", e)
 
         # Avg games per user
         try:
@@ -151,7 +106,7 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Top players
         try:
-            c.execute("SELECT first_name, username, wins FROM users ORDER BY wins DESC, total_score DESC LIMIT 3")
+            c.execute("SELECT first_name, username, wins FROM users ORDER BY wins DESC, total_score DESC, user_id DESC LIMIT 3")
             rows = c.fetchall()
             if rows:
                 lines = []
@@ -166,13 +121,6 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.error("Error fetching top_players: %s", e)
             top_players_info = "N/A"
 
-        # Average score
-        try:
-            c.execute("SELECT COALESCE(AVG(total_score),0) FROM users")
-            avg_score = c.fetchone()[0] or 0.0
-        except Exception as e:
-            logger.error("Error fetching avg_score: %s", e)
-
         # Most active group
         try:
             c.execute("SELECT title, group_id, games_played FROM groups ORDER BY games_played DESC LIMIT 1")
@@ -186,56 +134,117 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.error("Error fetching most_active_group: %s", e)
             most_active_group_info = "N/A"
 
-        try:
-            c.execute("SELECT COUNT(*) FROM users WHERE COALESCE(games_played,0) = 0")
-            inactive_users = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching inactive_users: %s", e)
-
         try:
             win_rate = (total_wins / total_games * 100.0) if total_games > 0 else 0.0
         except Exception as e:
             logger.error("Error calculating win_rate: %s", e)
 
+    return {
+        "total_users": total_users,
+        "total_groups": total_groups,
+        "total_wins": total_wins,
+        "total_losses": total_losses,
+        "total_games": total_games,
+        "total_penalties": total_penalties,
+        "db_size_mb": db_size_mb,
+        "storage_percentage": storage_percentage,
+        "active_users": active_users,
+        "recent_games": recent_games,
+        "avg_games_per_user": avg_games_per_user,
+        "avg_score": avg_score,
+        "top_players_info": top_players_info,
+        "most_active_group_info": most_active_group_info,
+        "inactive_users": inactive_users,
+        "win_rate": win_rate,
+        "recent_registrations": recent_registrations,
+    }
+
+
+def _collect_trend(days: int) -> dict:
+    with db_read() as conn:
+        return rollups.trend(conn, days=days)
+
+
+def _change(current: int, previous: int) -> str:
+    if not previous:
+        return "new" if current else "—"
+    pct = (current - previous) / previous * 100.0
+    return f"{pct:+.0f}%"
+
+
+def _trend_text(days: int, t: dict) -> str:
+    cur, prev = t["current"], t["previous"]
+    return (
+        f"<b>{days}-Day Trend</b>\n\n"
+        f"🎮 Games: {cur['games']} ({_change(cur['games'], prev['games'])})\n"
+        f"📅 Games/Day: {cur['games'] / days:.1f}\n"
+        f"🕒 Active Players: {cur['active_players']} ({_change(cur['active_players'], prev['active_players'])})\n"
+        f"🆕 New Users: {cur['new_users']} ({_change(cur['new_users'], prev['new_users'])})\n\n"
+        f"<i>Compared with the {days} days before.</i>"
+    )
+
+
+async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    selected_category = query.data.replace("stats_", "")
+    current_category = context.chat_data.get('current_stats_category')
+    if current_category == selected_category:
         try:
-            c.execute("SELECT COUNT(*) FROM users WHERE created_at IS NOT NULL AND created_at >= ?", (seven_days_ago_str,))
-            recent_registrations = c.fetchone()[0] or 0
-        except Exception as e:
-            logger.error("Error fetching recent_registrations: %s", e)
+            await query.message.reply_text("ℹ️ You're already viewing this stats category.")
+        except Exception:
+            logger.debug("Couldn't notify same category")
+        return
+
+    try:
+        if selected_category.startswith("trend_"):
+            days = 90 if selected_category == "trend_90" else 30
+            text = _trend_text(days, await run_read(_collect_trend, days))
+            await query.edit_message_text(text=text, parse_mode="HTML", reply_markup=stats_buttons())
+            context.chat_data['current_stats_category'] = selected_category
+            return
 
-        conn.close()
+        s = await run_read(_collect_stats)
 
         if selected_category == "bot":
+            q = outbox.stats()
             text = (
                 "<b>Bot Stats</b>\n\n"
-                f"💾 Storage: {db_size_mb:.2f} MB ({storage_percentage:.1f}% of 500 MB)\n"
-                f"🎮 Total Games: {total_games}\n"
-                f"🏆 Win Rate: {win_rate:.1f}%"
+                f"💾 Storage: {s['db_size_mb']:.2f} MB ({s['storage_percentage']:.1f}% of {DB_SIZE_BUDGET_MB} MB)\n"
+                f"🎮 Total Games: {s['total_games']}\n"
+                f"🏆 Win Rate: {s['win_rate']:.1f}%\n"
+                f"📤 Outbox: {q['queued']} queued in {q['chats']} chats "
+                f"(game {q['realtime_queued']} / replies {q['interactive_queued']} / bulk {q['bulk_queued']}), "
+                f"{q['retried']} retried, {q['failed']} failed\n"
+                f"⏱ Delivery p50/p95: game {q['realtime_p50']:.1f}/{q['realtime_p95']:.1f}s, "
+                f"replies {q['interactive_p50']:.1f}/{q['interactive_p95']:.1f}s, "
+                f"bulk {q['bulk_p50']:.1f}/{q['bulk_p95']:.1f}s"
             )
         elif selected_category == "users":
             text = (
                 "<b>User Stats</b>\n\n"
-                f"👥 Total Users: {total_users}\n"
-                f"🕒 Active Users (7 days): {active_users}\n"
-                f"😴 Inactive Users: {inactive_users}\n"
-                f"🆕 New Users (7 days): {recent_registrations}\n"
-                f"🎮 Avg. Games/User: {avg_games_per_user:.1f}\n"
-                f"📊 Avg. Score: {avg_score:.1f}"
+                f"👥 Total Users: {s['total_users']}\n"
+                f"🕒 Active Users (7 days): {s['active_users']}\n"
+                f"😴 Inactive Users: {s['inactive_users']}\n"
+                f"🆕 New Users (7 days): {s['recent_registrations']}\n"
+                f"🎮 Avg. Games/User: {s['avg_games_per_user']:.1f}\n"
+                f"📊 Avg. Score: {s['avg_score']:.1f}"
             )
         elif selected_category == "groups":
             text = (
                 "<b>Group Stats</b>\n\n"
-                f"🏘 Total Groups: {total_groups}\n"
-                f"🔥 Active Groups (24h): {recent_games}\n"
-                f"🏆 Most Active Group: {most_active_group_info}"
+                f"🏘 Total Groups: {s['total_groups']}\n"
+                f"🔥 Active Groups (24h): {s['recent_games']}\n"
+                f"🏆 Most Active Group: {s['most_active_group_info']}"
             )
         elif selected_category == "top_players":
             text = (
                 "<b>Top 3 Players</b>\n\n"
-                f"{top_players_info}\n\n"
-                f"⚠️ Total Penalties: {total_penalties}\n"
-                f"🏆 Total Wins: {total_wins}\n"
-                f"❌ Total Losses: {total_losses}"
+                f"{s['top_players_info']}\n\n"
+                f"⚠️ Total Penalties: {s['total_penalties']}\n"
+                f"🏆 Total Wins: {s['total_wins']}\n"
+                f"❌ Total Losses: {s['total_losses']}"
             )
         else:
             text = "❌ Unknown category"
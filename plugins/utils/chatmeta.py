@@ -0,0 +1,153 @@
+# plugins/utils/chatmeta.py
+import time
+import logging
+from typing import Dict, Optional
+from telegram import Update
+from telegram.ext import ContextTypes, TypeHandler
+from config import CHAT_META_TTL_SEC, CHAT_META_MISS_TTL_SEC
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMeta:
+    """What the bot knows about a group without asking Telegram again."""
+
+    __slots__ = ("chat_id", "title", "username", "invite_link", "expires")
+
+    def __init__(self, chat_id: int, title: Optional[str] = None, username: Optional[str] = None):
+        self.chat_id = chat_id
+        self.title = title
+        self.username = username
+        self.invite_link: Optional[str] = None
+        self.expires = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+
+# Shared by every plugin: chat_id -> ChatMeta, plus the bot's own username
+_chats: Dict[int, ChatMeta] = {}
+_bot_username: Optional[str] = None
+
+# Metadata calls that actually reached the Bot API (for /stats and benchmarks)
+api_calls = {"get_me": 0, "get_chat": 0, "export_chat_invite_link": 0}
+
+
+def remember_chat(chat, ttl: float = CHAT_META_TTL_SEC) -> None:
+    """Store/refresh a group's title and username from any Chat object we were handed."""
+    if chat is None or chat.type == "private":
+        return
+    meta = _chats.get(chat.id)
+    if meta is None:
+        meta = _chats[chat.id] = ChatMeta(chat.id)
+    if chat.title:
+        meta.title = chat.title
+    username = getattr(chat, "username", None)
+    if username != meta.username:
+        meta.username = username
+        meta.invite_link = None
+    if getattr(chat, "invite_link", None):
+        meta.invite_link = chat.invite_link
+    meta.expires = time.monotonic() + ttl
+
+
+def forget_chat(chat_id: int) -> None:
+    _chats.pop(chat_id, None)
+
+
+def cached_chat(chat_id: int) -> Optional[ChatMeta]:
+    """Cached entry even if expired; never calls the API."""
+    return _chats.get(chat_id)
+
+
+async def get_chat_meta(bot, chat_id: int) -> Optional[ChatMeta]:
+    """Cached metadata, fetched with get_chat only when missing or expired."""
+    meta = _chats.get(chat_id)
+    if meta is not None and meta.fresh:
+        return meta
+    try:
+        api_calls["get_chat"] += 1
+        remember_chat(await bot.get_chat(chat_id))
+        return _chats.get(chat_id)
+    except Exception as e:
+        logger.debug("get_chat(%s) failed: %s", chat_id, e)
+        # keep serving the stale entry, and don't retry on every call
+        if meta is None:
+            meta = _chats[chat_id] = ChatMeta(chat_id)
+        meta.expires = time.monotonic() + CHAT_META_MISS_TTL_SEC
+        return meta
+
+
+async def chat_title(bot, chat_id: int, default: str = "Unknown Group") -> str:
+    meta = await get_chat_meta(bot, chat_id)
+    return (meta.title if meta else None) or default
+
+
+def group_link(chat_id: int) -> Optional[str]:
+    """
+    Link back to a group from the cache only: public groups by username,
+    private supergroups via t.me/c/<id>. Safe on the hot path.
+    """
+    meta = _chats.get(chat_id)
+    if meta is not None and meta.username:
+        return f"https://t.me/{meta.username}"
+    chat_id_str = str(chat_id)
+    if chat_id_str.startswith("-100"):
+        return f"https://t.me/c/{chat_id_str[4:]}"
+    return None
+
+
+async def invite_link(bot, chat_id: int) -> Optional[str]:
+    """
+    A join link: the public username if any, otherwise the exported invite
+    link (exported once and cached, since each export revokes the last one).
+    """
+    meta = await get_chat_meta(bot, chat_id)
+    if meta is not None and meta.username:
+        return f"https://t.me/{meta.username}"
+    if meta is not None and meta.invite_link:
+        return meta.invite_link
+    try:
+        api_calls["export_chat_invite_link"] += 1
+        link = await bot.export_chat_invite_link(chat_id)
+    except Exception as e:
+        logger.debug("export_chat_invite_link(%s) failed: %s", chat_id, e)
+        return None
+    if meta is not None:
+        meta.invite_link = link
+    return link
+
+
+async def bot_username(bot) -> str:
+    """The bot's @username; get_me runs at most once per process."""
+    global _bot_username
+    if _bot_username is None:
+        try:
+            # set by Application.initialize(), no request needed
+            _bot_username = bot.username or ""
+        except Exception:
+            api_calls["get_me"] += 1
+            _bot_username = (await bot.get_me()).username or ""
+    return _bot_username
+
+
+async def track_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Runs ahead of all handlers: refresh the cache from whatever chat the update carries."""
+    try:
+        member = update.my_chat_member
+        if member is not None and member.new_chat_member.status in ("left", "kicked"):
+            forget_chat(member.chat.id)
+            return
+        remember_chat(update.effective_chat)
+        message = update.effective_message
+        if message is not None and message.migrate_to_chat_id:
+            forget_chat(message.chat.id)
+    except Exception:
+        logger.exception("Failed to update chat metadata cache")
+
+
+def chatmeta_handlers(app):
+    # group -1 runs before every other handler group; the handler never awaits,
+    # so the cache is current by the time group 0 handlers look at it
+    app.add_handler(TypeHandler(Update, track_chat), group=-1)
@@ -2,6 +2,7 @@ from functools import wraps
 from telegram import Update
 from telegram.ext import ContextTypes
 from plugins.helpers.moderators import is_owner, is_mod
+from plugins.connections.worker import run_read
 
 def admin_only(func):
     @wraps(func)
@@ -40,7 +41,7 @@ def mod_only(func):
     @wraps(func)
     async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         user = update.effective_user
-        if not user or not is_mod(user.id):
+        if not user or not await run_read(is_mod, user.id):
             await update.message.reply_text("❌ You must be a mod to use this command.")
             return
         return await func(update, context, *args, **kwargs)
@@ -51,7 +52,7 @@ def mod_or_owner(func):
     @wraps(func)
     async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         user = update.effective_user
-        if not user or not (is_owner(user.id) or is_mod(user.id)):
+        if not user or not (is_owner(user.id) or await run_read(is_mod, user.id)):
             await update.message.reply_text("❌ You are not authorized to use this command.")
             return
         return await func(update, context, *args, **kwargs)
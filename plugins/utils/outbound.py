@@ -0,0 +1,380 @@
+# plugins/utils/outbound.py
+import asyncio
+import logging
+from collections import deque
+from functools import partial
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+from config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_GROUP_RATE, OUTBOUND_GROUP_BURST,
+    OUTBOUND_PRIVATE_RATE, OUTBOUND_PRIVATE_BURST, OUTBOUND_MAX_RETRIES,
+    OUTBOUND_BULK_RESERVE, OUTBOUND_BULK_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+Call = Callable[[], Awaitable[Any]]
+
+# Priority lanes, highest first: live gameplay, replies to commands, then
+# broadcasts/notifications which only get capacity nobody else is using.
+REALTIME, INTERACTIVE, BULK = 0, 1, 2
+LANES = ("realtime", "interactive", "bulk")
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self.stamp is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait(self, now: float, need: float = 1) -> float:
+        """Seconds until `need` tokens are available (0 if they are now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _Job:
+    __slots__ = ("call", "fallback", "future", "queued_at", "attempts")
+
+    def __init__(self, call: Call, fallback: Optional[Call], future: asyncio.Future, queued_at: float):
+        self.call = call
+        self.fallback = fallback
+        self.future = future
+        self.queued_at = queued_at
+        self.attempts = 0
+
+
+def _posts_message(call: Call) -> bool:
+    """send_*/reply_*/forward_*/copy_* calls create a message, so repeating one may duplicate it."""
+    name = getattr(getattr(call, "func", call), "__name__", "")
+    return name.startswith(("send_", "reply_", "forward_", "copy_"))
+
+
+def _retry_seconds(e: RetryAfter) -> float:
+    delay = e.retry_after
+    return delay.total_seconds() if hasattr(delay, "total_seconds") else float(delay)
+
+
+class OutboundScheduler:
+    """
+    All bot sends go through here. Each chat has one FIFO per lane, drained
+    by one worker task that always serves the highest-priority lane first;
+    within a lane, messages leave a chat in the order they were queued.
+
+    A send takes a token from the chat's bucket (groups ~20/min, private
+    chats ~1/s), then a grant from the global bucket (~30/s). Waiting
+    realtime senders are granted before interactive ones, and bulk only gets
+    a grant while more than `bulk_reserve` tokens are left, so a broadcast
+    never eats the headroom a game needs for its next burst.
+
+    RetryAfter and network errors are retried in place, so the chat's later
+    messages wait behind them instead of overtaking or being dropped.
+    """
+
+    def __init__(self, global_rate: float = OUTBOUND_GLOBAL_RATE, global_burst: int = OUTBOUND_GLOBAL_RATE,
+                 group_rate: float = OUTBOUND_GROUP_RATE, group_burst: int = OUTBOUND_GROUP_BURST,
+                 private_rate: float = OUTBOUND_PRIVATE_RATE, private_burst: int = OUTBOUND_PRIVATE_BURST,
+                 max_retries: int = OUTBOUND_MAX_RETRIES, bulk_reserve: int = OUTBOUND_BULK_RESERVE):
+        self.global_bucket = TokenBucket(global_rate, max(global_burst, bulk_reserve + 1))
+        self.group_limits = (group_rate, group_burst)
+        self.private_limits = (private_rate, private_burst)
+        self.max_retries = max_retries
+        self.bulk_reserve = bulk_reserve
+        self._queues: Dict[int, Tuple[Deque[_Job], ...]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        # global grant waiters per lane, and the lane each waiting chat sits in
+        self._waiters: Tuple[Deque[asyncio.Future], ...] = tuple(deque() for _ in LANES)
+        self._waiting: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._latency: Tuple[Deque[float], ...] = tuple(deque(maxlen=1000) for _ in LANES)
+        self.sent = self.retried = self.failed = 0
+
+    # ---------- public API ----------
+    def submit(self, chat_id: int, call: Call, fallback: Optional[Call] = None,
+               lane: int = REALTIME) -> asyncio.Future:
+        """
+        Queue `call()` for `chat_id` in `lane`; the future resolves with its
+        result. `fallback()` is sent in the same slot if `call()` fails for
+        good (e.g. a video that can't be sent falls back to plain text).
+        """
+        loop = asyncio.get_running_loop()
+        job = _Job(call, fallback, loop.create_future(), loop.time())
+        queues = self._queues.get(chat_id)
+        if queues is None:
+            queues = self._queues[chat_id] = tuple(deque() for _ in LANES)
+        queues[lane].append(job)
+        if chat_id not in self._workers:
+            self._workers[chat_id] = loop.create_task(self._drain(chat_id, queues))
+            if len(self._buckets) > 2 * len(self._workers) + 1024:
+                self._prune_buckets(loop.time())
+        elif chat_id in self._waiting and lane < self._waiting[chat_id][0]:
+            self._promote(chat_id, lane)
+        return job.future
+
+    def stats(self) -> dict:
+        depths = [sum(len(q) for q in queues) for queues in self._queues.values()]
+        out = {
+            "queued": sum(depths),
+            "chats": len(depths),
+            "max_chat_depth": max(depths, default=0),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+        for lane, name in enumerate(LANES):
+            lat = sorted(self._latency[lane])
+            out[f"{name}_queued"] = sum(len(queues[lane]) for queues in self._queues.values())
+            out[f"{name}_p50"] = lat[len(lat) // 2] if lat else 0.0
+            out[f"{name}_p95"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))] if lat else 0.0
+        return out
+
+    # ---------- per-chat side ----------
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            rate, burst = self.private_limits if chat_id > 0 else self.group_limits
+            bucket = self._buckets[chat_id] = TokenBucket(rate, burst)
+        return bucket
+
+    def _prune_buckets(self, now: float):
+        """Forget idle chats whose bucket has refilled (a new one starts full anyway)."""
+        for chat_id in [c for c, b in self._buckets.items() if c not in self._workers and b.full(now)]:
+            del self._buckets[chat_id]
+
+    @staticmethod
+    def _top(queues) -> Optional[int]:
+        """Highest lane with a live job, dropping jobs whose caller gave up."""
+        for lane, queue in enumerate(queues):
+            while queue and queue[0].future.cancelled():
+                queue.popleft()
+            if queue:
+                return lane
+        return None
+
+    async def _drain(self, chat_id: int, queues):
+        loop = asyncio.get_running_loop()
+        try:
+            while (lane := self._top(queues)) is not None:
+                bucket = self._bucket(chat_id)
+                while (wait := bucket.wait(loop.time())) > 0:
+                    await asyncio.sleep(wait)
+                bucket.take(loop.time())
+                # re-check: a higher lane may have been queued while we waited
+                if (lane := self._top(queues)) is None:
+                    break
+                await self._grant(chat_id, lane)
+                lane = self._top(queues)
+                if lane is None:
+                    break
+                queue = queues[lane]
+                job = queue[0]
+                try:
+                    result = await job.call()
+                except RetryAfter as e:
+                    if self._retry(chat_id, job, e):
+                        await asyncio.sleep(_retry_seconds(e))
+                        continue
+                    self._fail(queue, job, e)
+                    continue
+                except BadRequest as e:
+                    self._fail(queue, job, e)
+                    continue
+                except TimedOut as e:
+                    # the request may have reached Telegram: retrying (or falling back
+                    # from) a message-creating call could post it twice
+                    if _posts_message(job.call):
+                        job.fallback = None
+                    elif self._retry(chat_id, job, e):
+                        await asyncio.sleep(min(2 ** job.attempts, 30))
+                        continue
+                    self._fail(queue, job, e)
+                    continue
+                except NetworkError as e:
+                    # connection errors; BadRequest and TimedOut are subclasses, handled above
+                    if self._retry(chat_id, job, e):
+                        await asyncio.sleep(min(2 ** job.attempts, 30))
+                        continue
+                    self._fail(queue, job, e)
+                    continue
+                except Exception as e:
+                    self._fail(queue, job, e)
+                    continue
+                queue.popleft()
+                self.sent += 1
+                self._latency[lane].append(loop.time() - job.queued_at)
+                if not job.future.done():
+                    job.future.set_result(result)
+        finally:
+            self._workers.pop(chat_id, None)
+            # if cancelled mid-queue the rest stays queued for the next submit
+            if not any(queues):
+                self._queues.pop(chat_id, None)
+                bucket = self._buckets.get(chat_id)
+                if bucket is not None and bucket.full(loop.time()):
+                    self._buckets.pop(chat_id, None)
+
+    def _retry(self, chat_id: int, job: _Job, e: Exception) -> bool:
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            return False
+        self.retried += 1
+        logger.info("Send to %s hit %s, retry %d/%d", chat_id, e, job.attempts, self.max_retries)
+        return True
+
+    def _fail(self, queue: Deque[_Job], job: _Job, e: Exception):
+        if job.fallback is not None:
+            job.call, job.fallback, job.attempts = job.fallback, None, 0
+            return
+        queue.popleft()
+        self.failed += 1
+        if not job.future.done():
+            job.future.set_exception(e)
+
+    # ---------- global grants ----------
+    def _need(self, lane: int) -> float:
+        return 1 + (self.bulk_reserve if lane == BULK else 0)
+
+    async def _grant(self, chat_id: int, lane: int):
+        """Wait for a global token; higher lanes are always served first."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not any(self._waiters[:lane + 1]) and self.global_bucket.wait(now, self._need(lane)) <= 0:
+            self.global_bucket.take(now)
+            return
+        fut = loop.create_future()
+        self._waiters[lane].append(fut)
+        self._waiting[chat_id] = (lane, fut)
+        self._arm(loop)
+        try:
+            await fut
+        finally:
+            self._waiting.pop(chat_id, None)
+
+    def _promote(self, chat_id: int, lane: int):
+        """A waiting chat got a higher-lane message: move it up the grant order."""
+        old, fut = self._waiting[chat_id]
+        try:
+            self._waiters[old].remove(fut)
+        except ValueError:
+            return
+        self._waiters[lane].append(fut)
+        self._waiting[chat_id] = (lane, fut)
+        self._arm(asyncio.get_running_loop())
+
+    def _arm(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for lane, waiters in enumerate(self._waiters):
+            while waiters and waiters[0].done():
+                waiters.popleft()
+            if waiters:
+                delay = self.global_bucket.wait(loop.time(), self._need(lane))
+                self._timer = loop.call_later(delay, self._dispatch, loop)
+                return
+
+    def _dispatch(self, loop):
+        self._timer = None
+        now = loop.time()
+        for lane, waiters in enumerate(self._waiters):
+            while waiters:
+                fut = waiters[0]
+                if fut.done():
+                    waiters.popleft()
+                    continue
+                if self.global_bucket.wait(now, self._need(lane)) > 0:
+                    # lower lanes need at least as many tokens, so nobody else goes either
+                    self._arm(loop)
+                    return
+                waiters.popleft()
+                self.global_bucket.take(now)
+                fut.set_result(None)
+        self._arm(loop)
+
+
+outbox = OutboundScheduler()
+
+
+def _chat_of(kwargs: dict) -> int:
+    return int(kwargs["chat_id"])
+
+
+async def send(method: Callable[..., Awaitable[Any]], lane: int = REALTIME, **kwargs) -> Any:
+    """
+    Queue `method(**kwargs)` (a bound Bot method taking `chat_id`) and wait
+    until it is delivered. Raises the final error if it never is.
+    """
+    return await outbox.submit(_chat_of(kwargs), partial(method, **kwargs), lane=lane)
+
+
+def post(method: Callable[..., Awaitable[Any]], fallback: Optional[Call] = None,
+         lane: int = REALTIME, **kwargs) -> asyncio.Future:
+    """Queue `method(**kwargs)` without waiting; a final failure is logged, not raised."""
+    future = outbox.submit(_chat_of(kwargs), partial(method, **kwargs), fallback, lane=lane)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+async def reply(message, text: str, lane: int = INTERACTIVE, **kwargs) -> Any:
+    """`message.reply_text(text, **kwargs)` through the outbox, in the interactive lane."""
+    return await outbox.submit(message.chat_id, partial(message.reply_text, text, **kwargs), lane=lane)
+
+
+def post_reply(message, text: str, lane: int = INTERACTIVE, **kwargs) -> asyncio.Future:
+    """`reply` without waiting for delivery; a final failure is logged, not raised."""
+    future = outbox.submit(message.chat_id, partial(message.reply_text, text, **kwargs), lane=lane)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+async def fan_out(calls: Iterable[Tuple[int, Call]], lane: int = BULK,
+                  window: int = OUTBOUND_BULK_WINDOW) -> Tuple[int, List[Tuple[int, BaseException]]]:
+    """
+    Queue `(chat_id, call)` pairs with at most `window` in flight, so a
+    100k-recipient broadcast is never queued all at once. Returns
+    (delivered, [(chat_id, error), ...]).
+    """
+    slots = asyncio.Semaphore(window)
+    delivered = 0
+    failures: List[Tuple[int, BaseException]] = []
+
+    def done(chat_id, future):
+        nonlocal delivered
+        slots.release()
+        if future.cancelled():
+            failures.append((chat_id, asyncio.CancelledError()))
+        elif future.exception() is not None:
+            failures.append((chat_id, future.exception()))
+        else:
+            delivered += 1
+
+    for chat_id, call in calls:
+        await slots.acquire()
+        outbox.submit(chat_id, call, lane=lane).add_done_callback(partial(done, chat_id))
+    for _ in range(window):
+        await slots.acquire()
+    return delivered, failures
+
+
+def _log_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Outbound message dropped: %s", future.exception())